@@ -0,0 +1,16 @@
+"""
+⏱️ LATU Benchmark Paketi
+
+Yerel sahte OpenAI / Anthropic sunucusu (stub_server) ve gerçek
+main() giriş noktalarını ile orkestrasyon yollarını ona karşı çalıştıran
+benchmark koşucusu (run). Sonuçlar JSON baseline ile karşılaştırılır.
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+# Pipeline modülleri scripts/ altında düz modüller olarak duruyor
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
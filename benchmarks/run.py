@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ LATU Benchmark Koşucusu
+LATU Trading System - Benchmark Pipeline
+
+Sahte OpenAI / Anthropic sunucusunu başlatır, pipeline'ı canlı backend
+ile ona yönlendirir ve iki senaryo ölçer:
+
+- entrypoints: gpt_analysis / claude_analysis / final_comparison /
+  orchestrator main() giriş noktaları ayrı süreçlerde (gerçek CLI yolu)
+- concurrency: BatchRunner orkestrasyonu farklı eşzamanlılık
+  seviyelerinde; aşama gecikmesi p50/p95/p99, sembol başına uçtan uca
+  süre ve sembol/dakika
+- speculative: tek sembol uçtan uca süresi, sıralı GPT → Claude zinciri
+  ile Claude'un GPT'yle paralel başladığı spekülatif mod karşılaştırması
+- worker: sıcak worker havuzuna kuyruktan verilen isteğin uçtan uca
+  süresi (orchestrator giriş noktasındaki süreç başlatma maliyeti olmadan)
+- hedging: isteklerin küçük bir kısmı çok yavaşken GPT çağrısının p50/p99
+  süresi, doğrudan canlı backend ile p95 hedge'li yönlendirici karşılaştırması
+- startup: aşama modüllerinin `python -X importtime` kümülatif import
+  süresi ve `latu <komut> --help` duvar saati
+
+Sonuçlar JSON baseline ile karşılaştırılır; tolerans aşılırsa çıkış
+kodu 1 olur. Baseline makineye özgüdür: süreler ve sembol/dakika, iki
+çalıştırmanın `python -c pass` kalibrasyon oranıyla ölçeklenerek
+karşılaştırılır; kalibrasyonsuz baseline'da sadece birimsiz metrikler
+(speedup, failed) karşılaştırılır.
+
+Başlangıç ayrıca baseline'dan bağımsız bir bütçeye tabidir: bütçe aynı makinede ölçülen `python -c pass` süresinin STARTUP_BUDGET_RATIO
+katıdır (donanımdan bağımsız). Import süresi bunu aşarsa ya da ağır bir
+bağımlılık (SDK'lar, requests, pandas/numpy, http.server) import anında
+yüklenirse çıkış kodu 1 olur.
+
+    python -m benchmarks.run                     # baseline ile karşılaştır
+    python -m benchmarks.run --update-baseline   # baseline'ı yeniden yaz
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from benchmarks import SCRIPTS_DIR
+from benchmarks.stub_server import StubServer, StubConfig, DEFAULT_LATENCY, DEFAULT_TOKENS_PER_SECOND
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_LEVELS = (1, 4, 8)
+DEFAULT_SYMBOLS = 16
+DEFAULT_REPEATS = 3
+DEFAULT_TOLERANCE = 0.25
+# Hedge senaryosu: isteklerin %3'ü 1 saniye ek gecikmeyle döner
+DEFAULT_HEDGE_CALLS = 200
+HEDGE_TAIL_RATE = 0.03
+HEDGE_TAIL_LATENCY = 1.0
+# Bu kadar milisaniyeden küçük gecikme farkları gürültü sayılır
+MIN_DELTA_MS = 5.0
+# Aşama modülü import bütçesi, `python -c pass` süresinin katı olarak
+# (ertelenmiş import'larla ~5-6.5x; pandas/SDK gibi bir bağımlılık eklemek bunu aşar)
+STARTUP_BUDGET_RATIO = 8.0
+STARTUP_MODULES = {'gpt': 'gpt_analysis', 'claude': 'claude_analysis', 'final': 'final_comparison',
+                   'run': 'orchestrator'}
+# İlk kullanıma kadar yüklenmemesi gereken modüller
+DEFERRED_IMPORTS = ('openai', 'anthropic', 'requests', 'pandas', 'numpy', 'http.server',
+                    'concurrent.futures')
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(values):
+    """📊 p50/p95/p99 (milisaniye)"""
+
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    array = np.asarray(values, dtype=float) * 1000
+    return {f"p{p}": round(float(np.percentile(array, p)), 2) for p in PERCENTILES}
+
+def _isolated_env(server, workdir):
+    """🌐 Sahte sunucuya yönlenen ve geçici klasöre yazan ortam"""
+
+    env = dict(os.environ)
+    env.update(server.env())
+    env.update({
+        'LATU_LLM_BACKEND': 'live',
+        'LATU_CACHE': 'off',
+        'LATU_RESULTS_DB': os.path.join(workdir, 'results.sqlite'),
+        'LATU_OUTBOX_DIR': os.path.join(workdir, 'outbox'),
+        'LATU_CHECKPOINT_DIR': os.path.join(workdir, 'checkpoints'),
+        'LATU_HANDOFF_DIR': os.path.join(workdir, 'handoff'),
+        'PYTHONWARNINGS': 'ignore'
+    })
+    return env
+
+
+def bench_entrypoints(server, workdir, repeats=DEFAULT_REPEATS):
+    """🚪 Her CLI giriş noktasını ayrı süreçte çalıştır ve duvar saatini ölç"""
+
+    env = _isolated_env(server, workdir)
+    webhook = f"{server.url}/webhook"
+    market = ['--symbol', 'BENCHUSDT', '--price', '65325', '--change', '1.2', '--volume', '1000000']
+
+    from llm_backend import MockBackend
+    mock = MockBackend()
+    gpt_text = mock.complete('gpt', 'openai', 'gpt-4', None, 'Fiyat: $65325', 600)
+    claude_text = mock.complete('claude', 'anthropic', 'claude-3-sonnet-20240229', None, 'Fiyat: $65325', 1500)
+
+    commands = {
+        'gpt_analysis': ['gpt_analysis.py', *market, '--webhook-url', webhook],
+        'claude_analysis': ['claude_analysis.py', '--symbol', 'BENCHUSDT', '--gpt-result', gpt_text,
+                            '--webhook-url', webhook],
+        'final_comparison': ['final_comparison.py', '--symbol', 'BENCHUSDT', '--gpt-result', gpt_text,
+                             '--claude-result', claude_text, '--webhook-url', webhook],
+        'orchestrator': ['orchestrator.py', *market, '--webhook-url', webhook]
+    }
+
+    results = {}
+    for name, command in commands.items():
+        durations = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            completed = subprocess.run([sys.executable, *command], cwd=SCRIPTS_DIR, env=env,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            durations.append(time.perf_counter() - started)
+            if completed.returncode != 0:
+                raise RuntimeError(f"{name} başarısız oldu:\n{completed.stdout[-2000:]}")
+        results[name] = percentiles(durations)
+        print(f"🚪 {name:<17} p50 {results[name]['p50']:.1f}ms")
+    return results
+
+def bench_concurrency(server, workdir, levels=DEFAULT_LEVELS, symbols=DEFAULT_SYMBOLS):
+    """🌐 BatchRunner'ı farklı eşzamanlılık seviyelerinde çalıştır"""
+
+    os.environ.update(_isolated_env(server, workdir))
+
+    from llm_backend import LiveBackend
+    from batch_runner import BatchRunner
+    from result_store import get_store
+
+    results = {}
+    for level in levels:
+        db_path = os.path.join(workdir, f"concurrency_{level}.sqlite")
+        os.environ['LATU_RESULTS_DB'] = db_path
+        watchlist = [{'symbol': f"BENCH{i}USDT", 'price': 100.0 + i, 'change': 1.0, 'volume': 1e6}
+                     for i in range(symbols)]
+        limits = {provider: {'concurrency': level, 'rate': 1000.0, 'burst': level}
+                  for provider in ('openai', 'anthropic')}
+
+        runner = BatchRunner(backend=LiveBackend(), limits=limits, webhook_url=f"{server.url}/webhook")
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            outcome = runner.run(watchlist)
+        elapsed = time.perf_counter() - started
+
+        failed = [item['symbol'] for item in outcome if item['status'] == 'failed']
+        store = get_store(db_path)
+        stages = {}
+        for stage in ('gpt', 'claude', 'final'):
+            latencies = [row['latency'] for item in watchlist
+                         for row in store.history(item['symbol'], stage=stage) if row['latency'] is not None]
+            stages[stage] = percentiles(latencies)
+
+        results[str(level)] = {
+            'symbols': symbols,
+            'failed': len(failed),
+            'symbols_per_minute': round(symbols / elapsed * 60, 1),
+            'end_to_end': percentiles([item['duration'] for item in outcome]),
+            'stages': stages
+        }
+        print(f"🌐 eşzamanlılık {level:<3} {results[str(level)]['symbols_per_minute']:>8.1f} sembol/dk | "
+              f"uçtan uca p50 {results[str(level)]['end_to_end']['p50']:.1f}ms "
+              f"p99 {results[str(level)]['end_to_end']['p99']:.1f}ms"
+              + (f" | ❌ {len(failed)} başarısız" if failed else ''))
+    return results
+
+
+def bench_speculative(server, workdir, symbols=DEFAULT_SYMBOLS):
+    """⚡ Sıralı ve spekülatif zincirin sembol başına uçtan uca süresi"""
+
+    os.environ.update(_isolated_env(server, workdir))
+    os.environ['LATU_RESULTS_DB'] = os.path.join(workdir, 'speculative.sqlite')
+
+    from llm_backend import LiveBackend
+    from orchestrator import run_pipeline
+
+    backend = LiveBackend()
+    results = {}
+    for mode in ('serial', 'speculative'):
+        durations = []
+        failed = 0
+        for i in range(symbols):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                outcome = run_pipeline(f"SPEC{i}USDT", 100.0 + i, 1.0, 1e6, backend=backend,
+                                       speculative=mode == 'speculative')
+            durations.append(time.perf_counter() - started)
+            failed += not outcome['final']
+        results[mode] = {'failed': failed, 'end_to_end': percentiles(durations)}
+
+    serial, speculative = (results[mode]['end_to_end']['p50'] for mode in ('serial', 'speculative'))
+    results['speedup'] = round(serial / speculative, 2) if speculative else None
+    print(f"⚡ sıralı p50 {serial:.1f}ms | spekülatif p50 {speculative:.1f}ms | hızlanma x{results['speedup']}")
+    return results
+
+
+def bench_worker(server, workdir, symbols=DEFAULT_SYMBOLS):
+    """🏭 Sıcak worker havuzunda istek başına kuyruk → tamamlanma süresi"""
+
+    os.environ.update(_isolated_env(server, workdir))
+    os.environ['LATU_RESULTS_DB'] = os.path.join(workdir, 'worker.sqlite')
+
+    from llm_backend import LiveBackend
+    from worker import MemoryQueue, WorkerPool
+
+    queue = MemoryQueue()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pool = WorkerPool(queue, workers=1, backend=LiveBackend()).start()
+        durations = []
+        for i in range(symbols):
+            request_id = queue.put({'symbol': f"WORK{i}USDT", 'price': 100.0 + i, 'change': 1.0, 'volume': 1e6,
+                                    'webhook_url': f"{server.url}/webhook"})
+            queue.wait_idle()
+            record = queue.record(request_id)
+            durations.append(record['finished_at'] - record['enqueued_at'])
+        pool.drain()
+
+    results = {'failed': queue.counts().get('failed', 0), 'end_to_end': percentiles(durations)}
+    print(f"🏭 worker            p50 {results['end_to_end']['p50']:.1f}ms")
+    return results
+
+
+def bench_hedging(server, workdir, calls=DEFAULT_HEDGE_CALLS):
+    """🧭 Kuyruk gecikmesi altında doğrudan ve hedge'li çağrı süreleri"""
+
+    os.environ.update(_isolated_env(server, workdir))
+
+    from llm_backend import LiveBackend
+    from prompts import GPT_SYSTEM_PROMPT, gpt_prompt
+    from router import RoutedBackend
+
+    prompt = gpt_prompt("## MEVCUT PIYASA VERİSİ:\n- Sembol: HEDGEUSDT\n- Son fiyat: $100.00")
+    config = server.config
+    config.tail_rate, config.tail_latency = HEDGE_TAIL_RATE, HEDGE_TAIL_LATENCY
+    results = {}
+    try:
+        for mode, backend in (('direct', LiveBackend()), ('hedged', RoutedBackend(LiveBackend()))):
+            durations = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(calls):
+                    started = time.perf_counter()
+                    backend.complete('gpt', 'openai', 'gpt-4', GPT_SYSTEM_PROMPT, prompt, 600, 0.7)
+                    durations.append(time.perf_counter() - started)
+            results[mode] = percentiles(durations)
+    finally:
+        config.tail_rate, config.tail_latency = 0.0, 0.0
+
+    print(f"🧭 doğrudan p99 {results['direct']['p99']:.1f}ms | hedge'li p99 {results['hedged']['p99']:.1f}ms")
+    return results
+
+def _import_times(module):
+    """📦 `-X importtime` çıktısından {modül: kümülatif mikro saniye}"""
+
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=SCRIPTS_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} import edilemedi:\n{completed.stderr[-2000:]}")
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+def bench_calibration(repeats=DEFAULT_REPEATS):
+    """⏱️ `python -c pass` duvar saati: başlangıç bütçesinin makineye göre ölçeği"""
+
+    durations = []
+    for _ in range(repeats + 1):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        durations.append(time.perf_counter() - started)
+    # İlk çalıştırma ısınmadır
+    result = percentiles(durations[1:])
+    print(f"⏱️ python -c pass p50 {result['p50']:.1f}ms")
+    return result
+
+def bench_startup(repeats=DEFAULT_REPEATS):
+    """🚀 Aşama modüllerinin import süresi ve `latu <komut> --help` başlangıcı"""
+
+    results = {}
+    for command, module in STARTUP_MODULES.items():
+        # İlk çalıştırma .pyc'leri yazar, ölçüme katılmaz
+        _import_times(module)
+        imports, help_durations, loaded = [], [], set()
+        for _ in range(repeats):
+            times = _import_times(module)
+            imports.append(times[module] / 1e6)
+            loaded.update(name for name in DEFERRED_IMPORTS if name in times)
+
+            started = time.perf_counter()
+            subprocess.run([sys.executable, 'latu.py', command, '--help'], cwd=SCRIPTS_DIR,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            help_durations.append(time.perf_counter() - started)
+        results[module] = {'import': percentiles(imports), 'help': percentiles(help_durations),
+                           'eager_imports': sorted(loaded)}
+        print(f"🚀 {module:<17} import p50 {results[module]['import']['p50']:.1f}ms | "
+              f"latu {command} --help p50 {results[module]['help']['p50']:.1f}ms")
+    return results
+
+def check_startup_budget(startup, calibration, ratio=STARTUP_BUDGET_RATIO):
+    """💰 Başlangıç bütçesi ihlalleri (baseline'dan bağımsız, `python -c pass` süresine göre)"""
+
+    budget = calibration['p50'] * ratio
+    violations = []
+    for module, result in startup.items():
+        if result['import']['p50'] > budget:
+            violations.append(f"{module} import p50 {result['import']['p50']:.1f}ms > {budget:.1f}ms "
+                              f"({ratio:g} × python -c pass {calibration['p50']:.1f}ms)")
+        if result['eager_imports']:
+            violations.append(f"{module} import anında yükleniyor: {', '.join(result['eager_imports'])}")
+    return violations
+
+
+def _metrics(report, prefix=''):
+    """🔎 Rapor ağacını (yol, değer) çiftlerine düzleştir"""
+
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _metrics(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+def _calibration_scale(report, baseline):
+    """⚖️ Bu makinenin baseline makinesine göre yavaşlık katı (`python -c pass` p50 oranı)"""
+
+    current = (report.get('startup_calibration') or {}).get('p50')
+    previous = (baseline.get('startup_calibration') or {}).get('p50')
+    if not (current and previous):
+        return None
+    return current / previous
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """⚖️ Baseline'a göre regresyonları listele (süreler makine kalibrasyonuyla ölçeklenir)"""
+
+    sections = ('entrypoints', 'concurrency', 'speculative', 'worker', 'hedging', 'startup')
+    current = dict(_metrics({name: report.get(name, {}) for name in sections}))
+    previous = dict(_metrics({name: baseline.get(name, {}) for name in sections}))
+    # Kalibrasyonsuz baseline'da mutlak süreler başka makineye taşınamaz: sadece birimsiz metrikler
+    scale = _calibration_scale(report, baseline)
+
+    regressions = []
+    for path, old in previous.items():
+        new = current.get(path)
+        if new is None:
+            continue
+        if path.endswith('.failed'):
+            if new > old:
+                regressions.append((path, old, new))
+        elif not old:
+            continue
+        elif path.endswith('speedup'):
+            if new < old * (1 - tolerance):
+                regressions.append((path, old, new))
+        elif scale is None:
+            continue
+        elif path.endswith('symbols_per_minute'):
+            if new < old / scale * (1 - tolerance):
+                regressions.append((path, old, new))
+        elif '.p' in path:
+            expected = old * scale
+            if new > expected * (1 + tolerance) and new - expected > MIN_DELTA_MS:
+                regressions.append((path, old, new))
+    return regressions
+
+def main():
+    """⏱️ Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Benchmark (sahte OpenAI/Anthropic sunucusu ile)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON dosyası')
+    parser.add_argument('--update-baseline', action='store_true', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--output', help='Sonuç JSON dosyası')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='İzin verilen sapma oranı')
+    parser.add_argument('--levels', default=','.join(map(str, DEFAULT_LEVELS)), help='Eşzamanlılık seviyeleri')
+    parser.add_argument('--symbols', type=int, default=DEFAULT_SYMBOLS, help='Seviye başına sembol sayısı')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='Giriş noktası tekrar sayısı')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Sahte sunucu ilk token gecikmesi')
+    parser.add_argument('--tokens-per-second', type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Enjekte edilen hata oranı (0-1)')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--skip-entrypoints', action='store_true', help='Süreç başlatan senaryoyu atla')
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_RATIO,
+                        help='Aşama modülü import bütçesi (`python -c pass` süresinin katı)')
+
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',') if level]
+    config = StubConfig(args.latency, args.tokens_per_second, args.error_rate, args.error_status, seed=42)
+
+    print("⏱️ LATU Benchmark Başlatıldı")
+    with tempfile.TemporaryDirectory(prefix='latu-bench-') as workdir, StubServer(config) as server:
+        print(f"🧪 Sahte sunucu: {server.url}")
+        report = {
+            'config': {**config.to_dict(), 'levels': levels, 'symbols': args.symbols, 'repeats': args.repeats},
+            'python': sys.version.split()[0],
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'entrypoints': {} if args.skip_entrypoints else bench_entrypoints(server, workdir, args.repeats),
+            'concurrency': bench_concurrency(server, workdir, levels, args.symbols),
+            'speculative': bench_speculative(server, workdir, args.symbols),
+            'worker': bench_worker(server, workdir, args.symbols),
+            'hedging': bench_hedging(server, workdir),
+            'startup': bench_startup(args.repeats),
+            'startup_calibration': bench_calibration(args.repeats),
+            'server': dict(server.counters)
+        }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    violations = check_startup_budget(report['startup'], report['startup_calibration'], args.startup_budget)
+    if violations:
+        print("❌ BAŞLANGIÇ BÜTÇESİ AŞILDI:")
+        for violation in violations:
+            print(f"   {violation}")
+        sys.exit(1)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline güncellendi: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ Baseline yok ({args.baseline}); --update-baseline ile oluşturun")
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    scale = _calibration_scale(report, baseline)
+    if scale is None:
+        print("⚠️ Baseline'da kalibrasyon yok: sadece birimsiz metrikler karşılaştırılıyor "
+              "(--update-baseline ile yeniden oluşturun)")
+    else:
+        print(f"⚖️ Makine ölçeği: {scale:.2f}x (python -c pass p50 oranı)")
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ PERFORMANS REGRESYONU (tolerans %{args.tolerance * 100:.0f}):")
+        for path, old, new in regressions:
+            print(f"   {path}: {old} → {new}")
+        sys.exit(1)
+    print(f"✅ Baseline içinde (tolerans %{args.tolerance * 100:.0f})")
+
+if __name__ == "__main__":
+    main()
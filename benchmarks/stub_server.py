@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧪 Sahte LLM Sunucusu
+LATU Trading System - Benchmark Stub Server
+
+OpenAI chat-completions (`/v1/chat/completions`) ve Anthropic messages
+(`/v1/messages`) wire formatlarını, streaming (SSE) dahil, konuşan yerel
+HTTP sunucusu. Gecikme, kuyruk gecikmesi (isteklerin bir kısmı çok
+yavaş), token hızı ve hata enjeksiyonu ayarlanabilir.
+Dashboard webhook'ları ve GitHub dispatch çağrılarını da kabul eder.
+OpenAI Batch (`/v1/files`, `/v1/batches`) ve Anthropic Message Batches
+(`/v1/messages/batches`) uç noktaları gece taraması testleri için yerel
+yerine geçen sürümlerdir: satırlar hemen işlenir, iş `latency` saniye
+sonra tamamlanmış görünür; hata oranı satır bazında uygulanır.
+Yanıt metinleri MockBackend şablonlarından üretilir, böylece karar
+kayıtları gerçekçi şekilde ayrıştırılır.
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# scripts/ yolu paket (benchmarks/__init__.py) import edilirken eklenir
+from llm_backend import MockBackend
+
+DEFAULT_LATENCY = 0.05            # ilk token'a kadar gecikme (saniye)
+DEFAULT_TOKENS_PER_SECOND = 2000  # çıktı token hızı
+CHARS_PER_TOKEN = 4
+
+
+class StubConfig:
+    """⚙️ Sunucu davranış ayarları"""
+
+    def __init__(self, latency=DEFAULT_LATENCY, tokens_per_second=DEFAULT_TOKENS_PER_SECOND,
+                 error_rate=0.0, error_status=500, seed=None, tail_rate=0.0, tail_latency=0.0):
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def delay(self):
+        """⏳ İlk token gecikmesi (tail_rate oranında istek tail_latency kadar ek bekler)"""
+        if not self.tail_rate:
+            return self.latency
+        with self.lock:
+            slow = self.random.random() < self.tail_rate
+        return self.latency + (self.tail_latency if slow else 0.0)
+
+    def to_dict(self):
+        return {
+            'latency': self.latency,
+            'tail_rate': self.tail_rate,
+            'tail_latency': self.tail_latency,
+            'tokens_per_second': self.tokens_per_second,
+            'error_rate': self.error_rate,
+            'error_status': self.error_status
+        }
+
+
+def _stage(provider, system, prompt):
+    """🔎 İstekten pipeline aşamasını çıkar (şablon seçimi için)"""
+
+    if provider == 'anthropic':
+        return 'claude'
+    return 'final' if 'KARŞILAŞTIRMA TABLOSU' in (system or '') + prompt else 'gpt'
+
+def _tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def _jsonl(items):
+    return ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items).encode('utf-8')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """📡 OpenAI / Anthropic / webhook / dispatch uç noktaları"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'LATUStub/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            return {}
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+    def _event(self, data, event=None):
+        lines = f"event: {event}\n" if event else ''
+        payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"{lines}data: {payload}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _chunks(self, text):
+        """⏳ Metni token hızına göre parça parça üret"""
+
+        size = CHARS_PER_TOKEN * 8
+        delay = 8 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for start in range(0, len(text), size):
+            if delay:
+                time.sleep(delay)
+            yield text[start:start + size]
+
+    def _inject_error(self):
+        if not self.config.should_fail():
+            return False
+        status = self.config.error_status
+        headers = {'Retry-After': '0'} if status == 429 else None
+        self._send_json(status, {'error': {'type': 'stub_error', 'message': 'injected failure'}}, headers)
+        self.server.count('errors')
+        return True
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        parts = path.strip('/').split('/')
+
+        if path.startswith('/v1/files/') and path.endswith('/content'):
+            content = self.server.files.get(parts[2])
+            if content is None:
+                self._send_json(404, {'error': {'message': 'file not found'}})
+                return
+            self._send_bytes(content)
+        elif path.startswith('/v1/messages/batches/') and path.endswith('/results'):
+            batch = self.server.batches.get(parts[3])
+            if batch is None:
+                self._send_json(404, {'error': {'message': 'batch not found'}})
+                return
+            self._send_bytes(batch['results'])
+        elif path.startswith('/v1/messages/batches/'):
+            batch = self.server.batches.get(parts[3])
+            if batch is None:
+                self._send_json(404, {'error': {'message': 'batch not found'}})
+                return
+            self._send_json(200, self._batch_view(batch))
+        elif path.startswith('/v1/batches/'):
+            batch = self.server.batches.get(parts[2])
+            if batch is None:
+                self._send_json(404, {'error': {'message': 'batch not found'}})
+                return
+            self._send_json(200, self._batch_view(batch))
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def _send_bytes(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/jsonl')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _upload(self):
+        """📎 multipart/form-data dosya yüklemesi (OpenAI /v1/files)"""
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode('utf-8')
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+        content = next((part.get_payload(decode=True) for part in message.iter_parts()
+                        if part.get_param('name', header='content-disposition') == 'file'), b'')
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.server.files[file_id] = content
+        self._send_json(200, {'id': file_id, 'object': 'file', 'bytes': len(content), 'purpose': 'batch'})
+
+    def _batch_view(self, batch):
+        # İş, oluşturulduktan 'latency' saniye sonra tamamlanmış görünür
+        done = time.time() >= batch['ready_at']
+        if batch['provider'] == 'anthropic':
+            return {'id': batch['id'], 'type': 'message_batch',
+                    'processing_status': 'ended' if done else 'in_progress',
+                    'request_counts': batch['counts'] if done else {},
+                    'results_url': f"{self.server.url}/v1/messages/batches/{batch['id']}/results" if done else None}
+        return {'id': batch['id'], 'object': 'batch', 'status': 'completed' if done else 'in_progress',
+                'output_file_id': batch['output_file_id'] if done else None,
+                'error_file_id': batch['error_file_id'] if done else None,
+                'request_counts': batch['counts'] if done else {}}
+
+    def _openai_batch(self, payload):
+        lines = self.server.files.get(payload.get('input_file_id'), b'').decode('utf-8').splitlines()
+        outputs, errors = [], []
+        for line in filter(None, lines):
+            request = json.loads(line)
+            if self.config.should_fail():
+                errors.append({'id': f"batch_req_{uuid.uuid4().hex[:16]}", 'custom_id': request['custom_id'],
+                               'response': None, 'error': {'code': 'server_error', 'message': 'injected failure'}})
+                continue
+            body = request['body']
+            messages = body.get('messages') or []
+            system = next((m['content'] for m in messages if m.get('role') == 'system'), None)
+            prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+            text = self._render('openai', body.get('model', 'gpt-4'), system, prompt)
+            outputs.append({'id': f"batch_req_{uuid.uuid4().hex[:16]}", 'custom_id': request['custom_id'],
+                            'response': {'status_code': 200, 'body': {
+                                'object': 'chat.completion', 'model': body.get('model'),
+                                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                                             'finish_reason': 'stop'}],
+                                'usage': {'prompt_tokens': _tokens((system or '') + prompt),
+                                          'completion_tokens': _tokens(text)}}},
+                            'error': None})
+
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        output_file_id = f"file-{uuid.uuid4().hex[:24]}"
+        error_file_id = f"file-{uuid.uuid4().hex[:24]}" if errors else None
+        self.server.files[output_file_id] = _jsonl(outputs)
+        if errors:
+            self.server.files[error_file_id] = _jsonl(errors)
+        batch = {'id': batch_id, 'provider': 'openai', 'ready_at': time.time() + self.config.latency,
+                 'output_file_id': output_file_id, 'error_file_id': error_file_id,
+                 'counts': {'total': len(outputs) + len(errors), 'completed': len(outputs), 'failed': len(errors)}}
+        self.server.batches[batch_id] = batch
+        self._send_json(200, self._batch_view(batch))
+
+    def _anthropic_batch(self, payload):
+        # Gerçek API gibi geçersiz custom_id'leri reddet
+        invalid = [request.get('custom_id') for request in payload.get('requests') or []
+                   if not re.match(r'^[a-zA-Z0-9_-]{1,64}$', str(request.get('custom_id') or ''))]
+        if invalid:
+            self._send_json(400, {'type': 'error', 'error': {
+                'type': 'invalid_request_error', 'message': f"invalid custom_id: {invalid[0]!r}"}})
+            return
+        results = []
+        for request in payload.get('requests') or []:
+            if self.config.should_fail():
+                results.append({'custom_id': request['custom_id'], 'result': {
+                    'type': 'errored', 'error': {'type': 'api_error', 'message': 'injected failure'}}})
+                continue
+            params = request['params']
+            system = params.get('system')
+            if isinstance(system, list):
+                system = ''.join(block.get('text', '') for block in system)
+            content = params['messages'][-1]['content'] if params.get('messages') else ''
+            model = params.get('model', 'claude-3-sonnet-20240229')
+            text = self._render('anthropic', model, system, content)
+            results.append({'custom_id': request['custom_id'], 'result': {'type': 'succeeded', 'message': {
+                'id': f"msg_{uuid.uuid4().hex[:24]}", 'type': 'message', 'role': 'assistant', 'model': model,
+                'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn',
+                'usage': {'input_tokens': _tokens((system or '') + content), 'output_tokens': _tokens(text)}}}})
+
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        succeeded = sum(1 for item in results if item['result']['type'] == 'succeeded')
+        batch = {'id': batch_id, 'provider': 'anthropic', 'ready_at': time.time() + self.config.latency,
+                 'results': _jsonl(results),
+                 'counts': {'processing': 0, 'succeeded': succeeded, 'errored': len(results) - succeeded}}
+        self.server.batches[batch_id] = batch
+        self._send_json(200, self._batch_view(batch))
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path.endswith('/files'):
+            self.server.count('batches')
+            self._upload()
+            return
+
+        payload = self._read_json()
+
+        if path.endswith('/messages/batches'):
+            self.server.count('batches')
+            self._anthropic_batch(payload)
+        elif path.endswith('/batches'):
+            self.server.count('batches')
+            self._openai_batch(payload)
+        elif path.endswith('/chat/completions'):
+            self.server.count('openai')
+            if not self._inject_error():
+                self._openai(payload)
+        elif path.endswith('/messages'):
+            self.server.count('anthropic')
+            if not self._inject_error():
+                self._anthropic(payload)
+        elif path.endswith('/dispatches'):
+            self.server.count('dispatches')
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self.server.count('webhooks')
+            self._send_json(200, {'ok': True})
+
+    def _render(self, provider, model, system, prompt):
+        stage = _stage(provider, system, prompt)
+        return self.server.mock._render(stage, provider, model, prompt)
+
+    def _openai(self, payload):
+        messages = payload.get('messages') or []
+        system = next((m['content'] for m in messages if m.get('role') == 'system'), None)
+        prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        model = payload.get('model', 'gpt-4')
+        text = self._render('openai', model, system, prompt)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(self.config.delay())
+
+        if payload.get('stream'):
+            self._start_stream()
+            for chunk in self._chunks(text):
+                self._event({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                             'model': model, 'choices': [{'index': 0, 'delta': {'content': chunk},
+                                                          'finish_reason': None}]})
+            self._event({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                         'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+            self._event('[DONE]')
+            return
+
+        for _ in self._chunks(text):
+            pass
+        prompt_tokens = _tokens((system or '') + prompt)
+        completion_tokens = _tokens(text)
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        })
+
+    def _anthropic(self, payload):
+        messages = payload.get('messages') or []
+        system = payload.get('system')
+        cacheable = False
+        if isinstance(system, list):
+            cacheable = any(block.get('cache_control') for block in system)
+            system = ''.join(block.get('text', '') for block in system)
+        content = messages[-1]['content'] if messages else ''
+        if isinstance(content, list):
+            content = ''.join(block.get('text', '') for block in content)
+        model = payload.get('model', 'claude-3-sonnet-20240229')
+        text = self._render('anthropic', model, system, content)
+        message_id = f"msg_{uuid.uuid4().hex[:24]}"
+        usage = {'input_tokens': _tokens((system or '') + content), 'output_tokens': _tokens(text)}
+        if cacheable and system:
+            # cache_control'lü system önekleri: ilk istekte yazılır, sonrakilerde okunur
+            cached = self.server.cache_prefix(system)
+            usage['input_tokens'] = _tokens(content)
+            usage['cache_read_input_tokens' if cached else 'cache_creation_input_tokens'] = _tokens(system)
+
+        time.sleep(self.config.delay())
+
+        if payload.get('stream'):
+            self._start_stream()
+            self._event({'type': 'message_start', 'message': {
+                'id': message_id, 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+                'stop_reason': None, 'stop_sequence': None,
+                'usage': {'input_tokens': usage['input_tokens'], 'output_tokens': 0}}}, 'message_start')
+            self._event({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+                        'content_block_start')
+            for chunk in self._chunks(text):
+                self._event({'type': 'content_block_delta', 'index': 0,
+                             'delta': {'type': 'text_delta', 'text': chunk}}, 'content_block_delta')
+            self._event({'type': 'content_block_stop', 'index': 0}, 'content_block_stop')
+            self._event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                         'usage': {'output_tokens': usage['output_tokens']}}, 'message_delta')
+            self._event({'type': 'message_stop'}, 'message_stop')
+            return
+
+        for _ in self._chunks(text):
+            pass
+        self._send_json(200, {
+            'id': message_id,
+            'type': 'message',
+            'role': 'assistant',
+            'model': model,
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': usage
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    """🧪 Arka plan thread'inde çalışan sahte sunucu"""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), StubHandler)
+        self.config = config or StubConfig()
+        self.mock = MockBackend()
+        self.counters = {'openai': 0, 'anthropic': 0, 'webhooks': 0, 'dispatches': 0, 'errors': 0, 'batches': 0}
+        # Batch uç noktalarının dosya ve iş kayıtları
+        self.files = {}
+        self.batches = {}
+        self._counter_lock = threading.Lock()
+        self._prefixes = set()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Yönlendirici kaybeden hedge'in akışını kapatır: istemcinin bağlantıyı kesmesi hata değildir
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def cache_prefix(self, text):
+        """🧊 Önek daha önce cache'lendiyse True, değilse kaydet"""
+        with self._counter_lock:
+            if text in self._prefixes:
+                return True
+            self._prefixes.add(text)
+            return False
+
+    def env(self):
+        """🌐 Pipeline'ı bu sunucuya yönlendiren ortam değişkenleri"""
+        return {
+            'OPENAI_API_KEY': 'stub',
+            'OPENAI_API_BASE': f"{self.url}/v1",
+            'ANTHROPIC_API_KEY': 'stub',
+            'ANTHROPIC_BASE_URL': self.url,
+            'GITHUB_TOKEN': 'stub',
+            'GITHUB_API_URL': self.url
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """🧪 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Sahte OpenAI / Anthropic Sunucusu')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='İlk token gecikmesi (saniye)')
+    parser.add_argument('--tokens-per-second', type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Hata döndürülecek istek oranı (0-1)')
+    parser.add_argument('--error-status', type=int, default=500, help='Enjekte edilen hata kodu (500/429/...)')
+
+    args = parser.parse_args()
+    config = StubConfig(args.latency, args.tokens_per_second, args.error_rate, args.error_status)
+    server = StubServer(config, port=args.port)
+
+    print(f"🧪 Sahte LLM sunucusu: {server.url}")
+    for name, value in server.env().items():
+        print(f"export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
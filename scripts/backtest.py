@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏪ Offline Backtest / Replay Harness
+LATU Trading System - Backtest Pipeline
+
+Yerel bir dakikalık OHLCV dosyasını karar noktaları boyunca yürütür ve
+her noktada GPT → Claude → Final zincirini takılabilir bir backend ile
+(kayıtlı yanıtlar veya mock LLM) çalıştırır; `rules` modunda LLM yerine
+tamamen vektörel bir kural motoru karar verir. Üretilen AL/SAT/BEKLE
+kararları önerilen stop/hedeflerle simüle edilir ve PnL, isabet oranı,
+çağrı/saniye ve karar başına maliyet raporlanır.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import numpy as np
+from market_data import load_candles, compute_indicator_series, WINDOW_MINUTES
+from metrics import model_cost
+
+DEFAULT_STEP_MINUTES = 60
+DEFAULT_HORIZON_MINUTES = 240
+DEFAULT_RESULTS_DB = 'results/backtest.sqlite'
+
+# Kural motoru: stop / hedef = 4s volatilitenin katları
+RULE_STOP_VOLATILITY = 0.5
+RULE_TARGET_VOLATILITY = 1.0
+RULE_POSITION_PCT = 0.5
+
+DIRECTIONS = {'AL': 1, 'SAT': -1}
+
+
+class UsageMeter:
+    """🧮 Backend çağrılarını ve token kullanımını sayan katman"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = 0
+        self.tokens = {}
+
+    def _count(self, model, usage):
+        self.calls += 1
+        if usage:
+            totals = self.tokens.setdefault(model, {'input_tokens': 0, 'output_tokens': 0})
+            totals['input_tokens'] += usage.get('input_tokens') or 0
+            totals['output_tokens'] += usage.get('output_tokens') or 0
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        text = self.backend.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+        self._count(model, getattr(text, 'usage', None))
+        return text
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        self._count(model, None)
+        yield from self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature)
+
+    def cost(self):
+        """💵 MODEL_PRICES'a göre toplam maliyet (USD)"""
+
+        return sum(model_cost(model, usage['input_tokens'], usage['output_tokens'])
+                   for model, usage in self.tokens.items())
+
+
+def decision_points(series, step=DEFAULT_STEP_MINUTES, warmup=WINDOW_MINUTES):
+    """📍 Isınma penceresinden sonra her `step` dakikada bir bar indeksi"""
+    return np.arange(min(warmup, len(series)) - 1, len(series), step)
+
+def indicators_at(series, index, window=WINDOW_MINUTES):
+    """📊 Gösterge serisinin bir barını compute_indicators sözlüğüne çevir"""
+
+    row = series.iloc[index]
+    values = {name: float(value) for name, value in row.items()}
+    values['bars'] = int(min(index + 1, window))
+    values['start'] = str(series.index[max(0, index - window + 1)])
+    values['end'] = str(series.index[index])
+    return values
+
+
+def rule_decisions(series, points):
+    """📐 Vektörel kural motoru: EMA trendi + MACD momentumu + RSI filtresi"""
+
+    rows = series.iloc[points]
+    close = rows['close'].to_numpy()
+    trend = rows['ema_fast'].to_numpy() > rows['ema_slow'].to_numpy()
+    momentum = rows['macd_hist'].to_numpy()
+    rsi_values = rows['rsi'].to_numpy()
+
+    direction = np.where(trend & (momentum > 0) & (rsi_values < 70), 1,
+                         np.where(~trend & (momentum < 0) & (rsi_values > 30), -1, 0))
+    volatility = rows['volatility_4h_pct'].to_numpy() / 100
+
+    return {
+        'index': points,
+        'direction': direction,
+        'entry': close,
+        'stop': close * (1 - direction * RULE_STOP_VOLATILITY * volatility),
+        'target': close * (1 + direction * RULE_TARGET_VOLATILITY * volatility),
+        'position_pct': np.where(direction != 0, RULE_POSITION_PCT, np.nan)
+    }
+
+def pipeline_decisions(symbol, series, points, backend, quiet=True, candles=None):
+    """🎼 Her karar noktasında GPT → Claude → Final zincirini çalıştır"""
+
+    from gpt_analysis import gpt_first_analysis
+    from claude_analysis import claude_detailed_analysis
+    from final_comparison import final_comparison_analysis
+    from decision_schema import parse_final
+    from timeframes import MultiTimeframe
+
+    # Zaman dilimi barları karar noktaları arasında artımlı ilerletilir
+    frames = MultiTimeframe(symbol) if candles is not None else None
+    fed = 0
+
+    directions, entries, stops, targets, positions = [], [], [], [], []
+    for index in points:
+        indicators = indicators_at(series, index)
+        if frames is not None:
+            frames.update_from_frame(candles.iloc[fed:index + 1])
+            fed = index + 1
+            indicators['timeframes'] = frames.snapshot()
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            gpt_result = gpt_first_analysis(symbol, indicators['close'], indicators['change_pct'],
+                                            indicators['volume'], backend=backend, indicators=indicators)
+            claude_result = gpt_result and claude_detailed_analysis(symbol, gpt_result, backend=backend,
+                                                                    indicators=indicators)
+            final_result = claude_result and final_comparison_analysis(symbol, gpt_result, claude_result,
+                                                                       backend=backend)
+
+        decision = parse_final(symbol, final_result) if final_result else None
+        direction = DIRECTIONS.get(decision.action, 0) if decision else 0
+        directions.append(direction)
+        entries.append(decision.entry if direction and decision.entry else indicators['close'])
+        stops.append(decision.stop if direction and decision.stop else np.nan)
+        targets.append(decision.take_profit if direction and decision.take_profit else np.nan)
+        positions.append(decision.position_pct if direction and decision.position_pct else np.nan)
+
+    return {
+        'index': points,
+        'direction': np.array(directions, dtype=int),
+        'entry': np.array(entries, dtype=float),
+        'stop': np.array(stops, dtype=float),
+        'target': np.array(targets, dtype=float),
+        'position_pct': np.array(positions, dtype=float)
+    }
+
+
+def simulate(candles, decisions, horizon=DEFAULT_HORIZON_MINUTES):
+    """💹 Kararları tek açık pozisyon kuralıyla simüle et; işlem listesi döndür"""
+
+    high = candles['high'].to_numpy()
+    low = candles['low'].to_numpy()
+    close = candles['close'].to_numpy()
+    last = len(close) - 1
+
+    trades = []
+    busy_until = -1
+    for i, index in enumerate(decisions['index']):
+        direction = decisions['direction'][i]
+        if not direction or index <= busy_until or index >= last:
+            continue
+
+        entry, stop, target = decisions['entry'][i], decisions['stop'][i], decisions['target'][i]
+        end = min(index + horizon, last)
+        window = slice(index + 1, end + 1)
+
+        # Giriş: tetik fiyatı zaten geçilmişse karar barının kapanışından, değilse ilk temas
+        if (direction > 0 and close[index] >= entry) or (direction < 0 and close[index] <= entry):
+            fill, entry = index, close[index]
+        else:
+            touched = high[window] >= entry if direction > 0 else low[window] <= entry
+            if not touched.any():
+                continue
+            fill = index + 1 + int(touched.argmax())
+
+        # Çıkış: aynı barda stop ve hedef varsa temkinli tarafta stop kabul edilir
+        after = slice(fill + 1, end + 1)
+        stop_hit = (low[after] <= stop) if direction > 0 else (high[after] >= stop)
+        target_hit = (high[after] >= target) if direction > 0 else (low[after] <= target)
+        stop_at = int(stop_hit.argmax()) if not np.isnan(stop) and stop_hit.any() else None
+        target_at = int(target_hit.argmax()) if not np.isnan(target) and target_hit.any() else None
+
+        if stop_at is not None and (target_at is None or stop_at <= target_at):
+            exit_index, exit_price, reason = fill + 1 + stop_at, stop, 'stop'
+        elif target_at is not None:
+            exit_index, exit_price, reason = fill + 1 + target_at, target, 'target'
+        else:
+            exit_index, exit_price, reason = end, close[end], 'timeout'
+
+        trades.append({
+            'decision_index': int(index),
+            'entry_index': int(fill),
+            'exit_index': int(exit_index),
+            'direction': int(direction),
+            'entry': float(entry),
+            'exit': float(exit_price),
+            'reason': reason,
+            'return_pct': float((exit_price / entry - 1) * 100 * direction),
+            'position_pct': float(decisions['position_pct'][i]) if not np.isnan(decisions['position_pct'][i]) else None
+        })
+        busy_until = exit_index
+
+    return trades
+
+def summarize(decisions, trades, elapsed, meter=None):
+    """📊 PnL, isabet oranı, hız ve maliyet özeti"""
+
+    directions = decisions['direction']
+    returns = np.array([trade['return_pct'] for trade in trades])
+    weighted = np.array([trade['return_pct'] * (trade['position_pct'] or 0) / 100 for trade in trades])
+    equity = np.cumsum(returns) if len(returns) else np.zeros(1)
+    decisions_count = len(directions)
+
+    report = {
+        'decisions': decisions_count,
+        'actions': {'AL': int((directions > 0).sum()), 'SAT': int((directions < 0).sum()),
+                    'BEKLE': int((directions == 0).sum())},
+        'trades': len(trades),
+        'hit_rate_pct': float((returns > 0).mean() * 100) if len(returns) else 0.0,
+        'pnl_pct': float(returns.sum()),
+        'weighted_pnl_pct': float(weighted.sum()),
+        'avg_trade_pct': float(returns.mean()) if len(returns) else 0.0,
+        'max_drawdown_pct': float((np.maximum.accumulate(np.maximum(equity, 0)) - equity).max()),
+        'exits': {reason: sum(1 for trade in trades if trade['reason'] == reason)
+                  for reason in ('target', 'stop', 'timeout')},
+        'elapsed_seconds': elapsed,
+        'decisions_per_second': decisions_count / elapsed if elapsed else None,
+        'llm_calls': 0,
+        'calls_per_second': None,
+        'cost_usd': 0.0,
+        'cost_per_decision_usd': 0.0
+    }
+
+    if meter is not None:
+        cost = meter.cost()
+        report.update({
+            'llm_calls': meter.calls,
+            'calls_per_second': meter.calls / elapsed if elapsed else None,
+            'cost_usd': cost,
+            'cost_per_decision_usd': cost / decisions_count if decisions_count else 0.0,
+            'tokens': meter.tokens
+        })
+    return report
+
+def run_backtest(path, symbol, engine='mock', step=DEFAULT_STEP_MINUTES, horizon=DEFAULT_HORIZON_MINUTES,
+                 backend=None, start=None, end=None, quiet=True):
+    """⏪ Dosyayı yükle, kararları üret, simüle et ve rapor döndür"""
+
+    candles = load_candles(path, symbol)
+    if start or end:
+        candles = candles.loc[start:end]
+
+    started = time.perf_counter()
+    series = compute_indicator_series(candles)
+    points = decision_points(series, step)
+
+    meter = None
+    if engine == 'rules':
+        decisions = rule_decisions(series, points)
+    else:
+        meter = UsageMeter(backend)
+        decisions = pipeline_decisions(symbol, series, points, meter, quiet, candles)
+
+    trades = simulate(candles, decisions, horizon)
+    report = summarize(decisions, trades, time.perf_counter() - started, meter)
+    report.update({'symbol': symbol, 'engine': engine, 'bars': len(candles),
+                   'start': str(candles.index[0]), 'end': str(candles.index[-1])})
+    return report, trades
+
+def _backend(args):
+    from llm_backend import MockBackend, RecordedBackend, RecordingBackend, LiveBackend
+
+    if args.engine == 'recorded':
+        if not args.recordings:
+            raise SystemExit('--engine recorded için --recordings gerekli')
+        backend = RecordedBackend(args.recordings, fallback=MockBackend() if args.fallback_mock else None)
+    elif args.engine == 'live':
+        backend = LiveBackend()
+    else:
+        backend = MockBackend()
+
+    if args.record:
+        backend = RecordingBackend(backend, args.record)
+    return backend
+
+def main():
+    """⏪ Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Offline Backtest / Replay')
+    parser.add_argument('--data-file', required=True, help='Dakikalık OHLCV CSV/Parquet dosyası')
+    parser.add_argument('--symbol', required=True, help='Trading sembolü')
+    parser.add_argument('--engine', choices=['mock', 'recorded', 'rules', 'live'], default='mock',
+                        help='Karar kaynağı: mock LLM, kayıtlı yanıtlar, vektörel kural motoru veya canlı API')
+    parser.add_argument('--recordings', help='Kayıtlı yanıt JSONL dosyası (--engine recorded)')
+    parser.add_argument('--fallback-mock', action='store_true', help='Kaydı olmayan çağrılarda mock yanıt kullan')
+    parser.add_argument('--record', help='Yanıtları bu JSONL dosyasına kaydet (sonra --engine recorded ile oynat)')
+    parser.add_argument('--step', type=int, default=DEFAULT_STEP_MINUTES, help='Karar noktaları arası dakika')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON_MINUTES, help='İşlem en uzun süresi (dakika)')
+    parser.add_argument('--start', help='Başlangıç tarihi (ISO)')
+    parser.add_argument('--end', help='Bitiş tarihi (ISO)')
+    parser.add_argument('--results-db', default=DEFAULT_RESULTS_DB,
+                        help='Aşama sonuçlarının yazılacağı SQLite (canlı depo kirlenmesin diye ayrı)')
+    parser.add_argument('--trades-file', help='İşlem listesini JSON olarak yaz')
+    parser.add_argument('--report-file', help='Özeti JSON olarak yaz')
+    parser.add_argument('--verbose', action='store_true', help='Aşama çıktılarını da yazdır')
+
+    args = parser.parse_args()
+    os.environ['LATU_RESULTS_DB'] = args.results_db
+    # Kayıt anahtarları max_tokens içerir; replay'de bütçe sabit kalmalı
+    os.environ.setdefault('LATU_ADAPTIVE_TOKENS', 'off')
+
+    backend = None if args.engine == 'rules' else _backend(args)
+
+    print("⏪ LATU Backtest Başlatıldı")
+    print(f"📊 {args.symbol} | motor: {args.engine} | adım: {args.step}dk | ufuk: {args.horizon}dk")
+
+    try:
+        report, trades = run_backtest(args.data_file, args.symbol, args.engine, args.step, args.horizon,
+                                      backend, args.start, args.end, quiet=not args.verbose)
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit(1)
+
+    print(f"📈 {report['bars']} mum: {report['start']} - {report['end']}")
+    print(f"🎯 Karar: {report['decisions']} (AL {report['actions']['AL']} / SAT {report['actions']['SAT']} / "
+          f"BEKLE {report['actions']['BEKLE']})")
+    print(f"💹 İşlem: {report['trades']} | isabet: %{report['hit_rate_pct']:.1f} | PnL: %{report['pnl_pct']:.2f} "
+          f"(pozisyon ağırlıklı %{report['weighted_pnl_pct']:.4f}) | max DD: %{report['max_drawdown_pct']:.2f}")
+    print(f"🚪 Çıkışlar: hedef {report['exits']['target']} / stop {report['exits']['stop']} / "
+          f"süre {report['exits']['timeout']}")
+    speed = f"{report['decisions_per_second']:.1f} karar/s" if report['decisions_per_second'] else '-'
+    if report['calls_per_second']:
+        speed += f", {report['calls_per_second']:.1f} LLM çağrısı/s"
+    print(f"⏱️ Süre: {report['elapsed_seconds']:.2f}s ({speed})")
+    print(f"💵 Maliyet: ${report['cost_usd']:.4f} (karar başına ${report['cost_per_decision_usd']:.5f})")
+
+    if args.trades_file:
+        with open(args.trades_file, 'w', encoding='utf-8') as f:
+            json.dump(trades, f, ensure_ascii=False, indent=2)
+    if args.report_file:
+        with open(args.report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌙 Gece Taraması Batch-API Modu
+LATU Trading System - Batch API Pipeline
+
+Acil olmayan gün sonu watchlist taramaları için her sembolde üç senkron,
+tam fiyatlı çağrı yerine sağlayıcıların batch iş API'leri kullanılır:
+tüm GPT prompt'ları tek bir OpenAI Batch JSONL dosyasına yazılır, iş
+tamamlanana kadar yoklanır, sonuçlardan Claude istekleri Anthropic
+Message Batches işi olarak gönderilir. Final karar varsayılan olarak
+yerel motorla hesaplanır (`--narrative` ile üçüncü bir OpenAI batch'i).
+Gecikme yerine verim ve daha düşük maliyet (batch fiyatı ~%50) alınır.
+
+Her iş results/batches/<iş>/ altında JSONL girdi/çıktı dosyaları ve
+state.json tutar; aynı klasörle yeniden çalıştırmak gönderilmiş işleri
+tekrar göndermeden yoklamaya devam eder. Başarısızlıklar sembol ve aşama
+bazında izlenir. `--client local` istekleri bir LLM backend'i (mock)
+üzerinden işleyen yerel yerine geçen istemciyi kullanır; benchmarks
+stub sunucusu batch uç noktalarını da taklit eder.
+
+    python scripts/batch_api.py --watchlist watchlist.csv
+    python scripts/batch_api.py --watchlist watchlist.csv --client local --backend mock
+    python scripts/batch_api.py --watchlist watchlist.csv --job-dir results/batches/20250614-2200
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+import metrics
+from metrics import log, model_cost
+from llm_backend import get_backend, prompt_cache_enabled
+from result_store import get_store
+from decision_schema import compact_for_prompt
+from generation import DEFAULT_MAX_TOKENS, max_tokens_for
+from prompts import GPT_SYSTEM_PROMPT, CLAUDE_SYSTEM_PROMPT, FINAL_SYSTEM_PROMPT, gpt_prompt, claude_prompt, final_prompt
+
+DEFAULT_BATCH_DIR = 'results/batches'
+DEFAULT_POLL_INTERVAL = 30.0
+# Batch işlerinin tamamlanma penceresi (sağlayıcı sınırı)
+COMPLETION_WINDOW = '24h'
+# Batch fiyatı senkron fiyatın yarısı
+BATCH_DISCOUNT = 0.5
+ANTHROPIC_VERSION = '2023-06-01'
+# Anthropic Message Batches custom_id kuralı: ^[a-zA-Z0-9_-]{1,64}$
+CUSTOM_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+
+# Aşama → (provider, model, varsayılan max_tokens, temperature); senkron aşamalarla aynı
+STAGE_MODELS = {
+    'gpt': ('openai', 'gpt-4', DEFAULT_MAX_TOKENS['gpt'], 0.7),
+    'claude': ('anthropic', 'claude-3-sonnet-20240229', DEFAULT_MAX_TOKENS['claude'], None),
+    'final': ('openai', 'gpt-4', DEFAULT_MAX_TOKENS['final'], 0.8)
+}
+
+STAGE_SYSTEMS = {
+    'gpt': GPT_SYSTEM_PROMPT,
+    'claude': CLAUDE_SYSTEM_PROMPT,
+    'final': FINAL_SYSTEM_PROMPT
+}
+
+
+class BatchError(Exception):
+    """🌙 Batch işi oluşturulamadı ya da sağlayıcı tarafında başarısız oldu"""
+
+
+def batch_request(stage, custom_id, prompt):
+    """📝 Sağlayıcıdan bağımsız tek batch isteği"""
+
+    if not CUSTOM_ID_PATTERN.match(custom_id):
+        raise BatchError(f"Geçersiz batch custom_id: {custom_id!r}")
+    provider, model, _, temperature = STAGE_MODELS[stage]
+    # Senkron aşamalarla aynı öğrenilen bütçe
+    max_tokens = max_tokens_for(stage)
+    return {'custom_id': custom_id, 'stage': stage, 'provider': provider, 'model': model, 'system': STAGE_SYSTEMS[stage],
+            'prompt': prompt, 'max_tokens': max_tokens, 'temperature': temperature}
+
+def openai_line(request):
+    """📝 OpenAI Batch JSONL satırı (/v1/chat/completions gövdesi)"""
+
+    body = {'model': request['model'], 'max_tokens': request['max_tokens'],
+            'messages': [{'role': 'system', 'content': request['system']},
+                         {'role': 'user', 'content': request['prompt']}]}
+    if request['temperature'] is not None:
+        body['temperature'] = request['temperature']
+    return {'custom_id': request['custom_id'], 'method': 'POST', 'url': '/v1/chat/completions', 'body': body}
+
+def anthropic_line(request):
+    """📝 Anthropic Message Batches isteği (custom_id + params)"""
+
+    params = {'model': request['model'], 'max_tokens': request['max_tokens'],
+              'messages': [{'role': 'user', 'content': request['prompt']}]}
+    if prompt_cache_enabled():
+        # Batch içindeki tüm istekler aynı statik system önekini paylaşır
+        params['system'] = [{'type': 'text', 'text': request['system'], 'cache_control': {'type': 'ephemeral'}}]
+    else:
+        params['system'] = request['system']
+    if request['temperature'] is not None:
+        params['temperature'] = request['temperature']
+    return {'custom_id': request['custom_id'], 'params': params}
+
+def write_jsonl(path, items):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _parse_jsonl(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class OpenAIBatchClient:
+    """🌐 OpenAI Batch API (/v1/files + /v1/batches)"""
+
+    provider = 'openai'
+
+    def __init__(self, base_url=None, api_key=None):
+        self.base_url = (base_url or os.environ.get('OPENAI_API_BASE', 'https://api.openai.com/v1')).rstrip('/')
+        self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+
+    def _request(self, method, path, **kwargs):
+        from transport import get_session
+
+        response = get_session().request(method, f"{self.base_url}{path}", timeout=(5, 120),
+                                         headers={'Authorization': f'Bearer {self.api_key}'}, **kwargs)
+        if response.status_code >= 400:
+            raise BatchError(f"OpenAI batch {method} {path}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def write(self, requests, path):
+        write_jsonl(path, [openai_line(request) for request in requests])
+
+    def submit(self, path):
+        """📤 JSONL dosyasını yükle ve batch işini başlat"""
+
+        with open(path, 'rb') as f:
+            upload = self._request('POST', '/files', data={'purpose': 'batch'},
+                                   files={'file': (os.path.basename(path), f, 'application/jsonl')}).json()
+        batch = self._request('POST', '/batches', json={'input_file_id': upload['id'],
+                                                        'endpoint': '/v1/chat/completions',
+                                                        'completion_window': COMPLETION_WINDOW}).json()
+        return batch['id']
+
+    def poll(self, batch_id):
+        """🔎 İş durumu: 'pending', 'completed' ya da 'failed'"""
+
+        status = self._request('GET', f"/batches/{batch_id}").json()['status']
+        if status == 'completed':
+            return 'completed'
+        if status in ('failed', 'expired', 'cancelled'):
+            return 'failed'
+        return 'pending'
+
+    def results(self, batch_id):
+        """📥 custom_id → {'text', 'model', 'usage'} ya da {'error'}"""
+
+        batch = self._request('GET', f"/batches/{batch_id}").json()
+        results = {}
+        for file_id in (batch.get('output_file_id'), batch.get('error_file_id')):
+            if not file_id:
+                continue
+            for line in _parse_jsonl(self._request('GET', f"/files/{file_id}/content").text):
+                response = line.get('response') or {}
+                if line.get('error') or response.get('status_code') != 200:
+                    error = line.get('error') or (response.get('body') or {}).get('error') or {}
+                    results[line['custom_id']] = {'error': error.get('message') or str(error)}
+                    continue
+                body = response['body']
+                details = body['usage'].get('prompt_tokens_details') or {}
+                results[line['custom_id']] = {
+                    'text': body['choices'][0]['message']['content'],
+                    'model': body.get('model'),
+                    'usage': {'input_tokens': body['usage'].get('prompt_tokens'),
+                              'output_tokens': body['usage'].get('completion_tokens'),
+                              'cached_input_tokens': details.get('cached_tokens')}
+                }
+        return results
+
+
+class AnthropicBatchClient:
+    """🌐 Anthropic Message Batches API (/v1/messages/batches)"""
+
+    provider = 'anthropic'
+
+    def __init__(self, base_url=None, api_key=None):
+        self.base_url = (base_url or os.environ.get('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')).rstrip('/')
+        self.api_key = api_key or os.environ.get('ANTHROPIC_API_KEY')
+
+    def _request(self, method, path, **kwargs):
+        from transport import get_session
+
+        headers = {'x-api-key': self.api_key or '', 'anthropic-version': ANTHROPIC_VERSION}
+        response = get_session().request(method, f"{self.base_url}{path}", timeout=(5, 120), headers=headers,
+                                         **kwargs)
+        if response.status_code >= 400:
+            raise BatchError(f"Anthropic batch {method} {path}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def write(self, requests, path):
+        write_jsonl(path, [anthropic_line(request) for request in requests])
+
+    def submit(self, path):
+        """📤 JSONL dosyasındaki istekleri tek batch işi olarak gönder"""
+        return self._request('POST', '/v1/messages/batches', json={'requests': read_jsonl(path)}).json()['id']
+
+    def poll(self, batch_id):
+        """🔎 İş durumu: 'pending' ya da 'completed' (Anthropic'te hatalar satır bazında)"""
+
+        status = self._request('GET', f"/v1/messages/batches/{batch_id}").json()['processing_status']
+        return 'completed' if status == 'ended' else 'pending'
+
+    def results(self, batch_id):
+        """📥 custom_id → {'text', 'model', 'usage'} ya da {'error'}"""
+
+        batch = self._request('GET', f"/v1/messages/batches/{batch_id}").json()
+        results = {}
+        for line in _parse_jsonl(self._request('GET', batch['results_url'].replace(self.base_url, '')).text):
+            result = line['result']
+            if result['type'] != 'succeeded':
+                error = result.get('error') or {}
+                results[line['custom_id']] = {'error': error.get('message') or result['type']}
+                continue
+            message = result['message']
+            results[line['custom_id']] = {
+                'text': ''.join(block.get('text', '') for block in message['content']),
+                'model': message.get('model'),
+                'usage': {'input_tokens': message['usage'].get('input_tokens'),
+                          'output_tokens': message['usage'].get('output_tokens'),
+                          'cached_input_tokens': message['usage'].get('cache_read_input_tokens')}
+            }
+        return results
+
+
+class LocalBatchClient:
+    """🧪 İstekleri bir LLM backend'i (mock) ile işleyen yerel batch yerine geçeni"""
+
+    def __init__(self, provider, backend=None):
+        self.provider = provider
+        self.backend = backend or get_backend('mock')
+        self._batches = {}
+
+    def write(self, requests, path):
+        # Sağlayıcı formatındaki dosya yine yazılır (denetim / yeniden oynatma için)
+        line = openai_line if self.provider == 'openai' else anthropic_line
+        write_jsonl(path + '.requests', requests)
+        write_jsonl(path, [line(request) for request in requests])
+
+    def submit(self, path):
+        results = {}
+        for request in read_jsonl(path + '.requests'):
+            try:
+                text = self.backend.complete(request['stage'], request['provider'], request['model'], request['system'],
+                                             request['prompt'], request['max_tokens'], request['temperature'])
+            except Exception as e:
+                results[request['custom_id']] = {'error': f'{type(e).__name__}: {e}'}
+                continue
+            results[request['custom_id']] = {'text': str(text), 'model': getattr(text, 'model', None),
+                                              'usage': getattr(text, 'usage', None)}
+        batch_id = f"local_{uuid.uuid4().hex[:16]}"
+        self._batches[batch_id] = results
+        return batch_id
+
+    def poll(self, batch_id):
+        return 'completed' if batch_id in self._batches else 'failed'
+
+    def results(self, batch_id):
+        return self._batches[batch_id]
+
+
+class BatchJob:
+    """🌙 Watchlist için GPT → Claude → Final batch zinciri"""
+
+    def __init__(self, watchlist, clients, job_dir, poll_interval=DEFAULT_POLL_INTERVAL, narrative=False,
+                 timeout=None):
+        self.watchlist = {item['symbol'].upper(): item for item in watchlist}
+        self.clients = clients
+        self.job_dir = job_dir
+        self.poll_interval = poll_interval
+        self.narrative = narrative
+        self.timeout = timeout
+        self.job_id = os.path.basename(os.path.normpath(job_dir))
+        os.makedirs(job_dir, exist_ok=True)
+
+        self.state_path = os.path.join(job_dir, 'state.json')
+        self.state = {'job_id': self.job_id, 'stages': {}, 'symbols': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                self.state = json.load(f)
+        # custom_id'ler sağlayıcı kuralına uyan sıra numaralarıdır (sembol adı '/' ya da ':' içerebilir);
+        # numara → sembol eşlemesi state.json'da tutulur, böylece yeniden çalıştırmada da aynı kalır
+        ids = self.state.setdefault('ids', {})
+        self._ids = {symbol: index for index, symbol in ids.items()}
+        for symbol in self.watchlist:
+            self.state['symbols'].setdefault(symbol, {'status': 'pending', 'stages': {}, 'error': None})
+            if symbol not in self._ids:
+                index = str(len(ids))
+                ids[index] = symbol
+                self._ids[symbol] = index
+
+    def custom_id(self, symbol, stage):
+        """🏷️ Sembol ve aşama için batch custom_id'si (ör. '3-gpt')"""
+        return f"{self._ids[symbol]}-{stage}"
+
+    def _save(self):
+        temporary = self.state_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.state_path)
+
+    def _fail(self, symbol, stage, error):
+        entry = self.state['symbols'][symbol]
+        entry['stages'][stage] = 'failed'
+        entry.update(status='failed', error=f"{stage}: {error}")
+        log(f"❌ {symbol} {stage} batch isteği başarısız: {error}", event='batch_item_failed', symbol=symbol,
+            stage=stage, error=str(error))
+
+    def _run_stage(self, stage, requests):
+        """🌙 Aşama batch'ini yaz, gönder (daha önce gönderilmediyse), yokla ve sonuçları döndür"""
+
+        output_path = os.path.join(self.job_dir, f"{stage}.output.jsonl")
+        if os.path.exists(output_path):
+            return {line['custom_id']: line['result'] for line in read_jsonl(output_path)}
+        if not requests:
+            return {}
+
+        provider = STAGE_MODELS[stage][0]
+        client = self.clients[provider]
+        stage_state = self.state['stages'].setdefault(stage, {})
+
+        if not stage_state.get('batch_id'):
+            input_path = os.path.join(self.job_dir, f"{stage}.input.jsonl")
+            client.write(requests, input_path)
+            stage_state.update(batch_id=client.submit(input_path), provider=provider, requests=len(requests),
+                               submitted_at=time.time(), status='pending')
+            self._save()
+            log(f"📤 {stage} batch'i gönderildi: {stage_state['batch_id']} ({len(requests)} istek)",
+                event='batch_submitted', stage=stage, batch_id=stage_state['batch_id'], requests=len(requests))
+
+        started = time.monotonic()
+        while True:
+            status = client.poll(stage_state['batch_id'])
+            if status != 'pending':
+                break
+            if self.timeout and time.monotonic() - started > self.timeout:
+                raise BatchError(f"{stage} batch'i {self.timeout:g}s içinde tamamlanmadı "
+                                 f"({stage_state['batch_id']}); aynı --job-dir ile yeniden çalıştırın")
+            time.sleep(self.poll_interval)
+
+        stage_state.update(status=status, completed_at=time.time())
+        if status == 'failed':
+            self._save()
+            raise BatchError(f"{stage} batch'i sağlayıcı tarafında başarısız: {stage_state['batch_id']}")
+
+        results = client.results(stage_state['batch_id'])
+        write_jsonl(output_path, [{'custom_id': custom_id, 'result': result} for custom_id, result in results.items()])
+        stage_state['failed'] = sum(1 for result in results.values() if 'error' in result)
+        self._save()
+        log(f"📥 {stage} batch'i tamamlandı: {len(results) - stage_state['failed']}/{len(requests)} başarılı",
+            event='batch_completed', stage=stage, batch_id=stage_state['batch_id'], failed=stage_state['failed'])
+        return results
+
+    def _collect(self, stage, symbols, results):
+        """💾 Aşama sonuçlarını kaydet; başarılı sembol → metin"""
+
+        texts = {}
+        provider, default_model, _, _ = STAGE_MODELS[stage]
+        for symbol in symbols:
+            result = results.get(self.custom_id(symbol, stage))
+            entry = self.state['symbols'][symbol]
+            if result is None:
+                self._fail(symbol, stage, 'batch sonucunda yok')
+                continue
+            if 'error' in result:
+                self._fail(symbol, stage, result['error'])
+                continue
+
+            text = result['text'].strip()
+            model = result.get('model') or default_model
+            usage = result.get('usage') or {}
+            if entry['stages'].get(stage) != 'completed':
+                get_store().record(symbol, stage, model, text, usage=usage, run_id=self.job_id)
+                self._account(stage, model, usage)
+                entry['stages'][stage] = 'completed'
+            texts[symbol] = text
+        self._save()
+        return texts
+
+    def _account(self, stage, model, usage):
+        """💵 Token ve (batch indirimli) maliyet metrikleri"""
+
+        metrics.registry.inc('latu_llm_calls_total', stage=stage, model=model)
+        for direction, key in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                               ('cached', 'cached_input_tokens')):
+            if usage.get(key):
+                metrics.registry.inc('latu_llm_tokens_total', usage[key], stage=stage, model=model,
+                                     direction=direction)
+        cost = model_cost(model, usage.get('input_tokens'), usage.get('output_tokens')) * BATCH_DISCOUNT
+        if cost:
+            metrics.registry.inc('latu_llm_cost_usd_total', cost, stage=stage, model=model)
+
+    def run(self):
+        """🌙 Üç aşamayı sırayla batch olarak çalıştır; sembol bazında durum döndür"""
+
+        # Yerel motorun final kayıtları da iş kimliğiyle bağlanır
+        with metrics.run_context(run_id=self.job_id):
+            return self._run()
+
+    def _run(self):
+        from gpt_analysis import build_market_section
+        from claude_analysis import build_indicator_fields
+
+        symbols = [symbol for symbol, entry in self.state['symbols'].items() if entry['status'] != 'failed']
+
+        # 1. GPT: tüm watchlist tek OpenAI batch'inde
+        requests = [batch_request('gpt', self.custom_id(symbol, 'gpt'), gpt_prompt(build_market_section(
+            symbol, item['price'], item['change'], item['volume'], indicators=item.get('indicators'))))
+            for symbol, item in self.watchlist.items() if symbol in symbols]
+        gpt = self._collect('gpt', symbols, self._run_stage('gpt', requests))
+
+        # 2. Claude: GPT'si başarılı semboller, kompakt GPT kaydıyla
+        requests = [batch_request('claude', self.custom_id(symbol, 'claude'), claude_prompt(
+            symbol, compact_for_prompt('gpt', symbol, text),
+            build_indicator_fields(self.watchlist[symbol].get('indicators'))))
+            for symbol, text in gpt.items()]
+        claude = self._collect('claude', list(gpt), self._run_stage('claude', requests))
+
+        # 3. Final: yerel motor (varsayılan) ya da anlatı için üçüncü batch
+        pairs = {symbol: (gpt[symbol], text) for symbol, text in claude.items()}
+        finals = self._finalize(pairs)
+
+        for symbol in finals:
+            self.state['symbols'][symbol]['status'] = 'completed'
+        self._save()
+        return self.summary(finals)
+
+    def _finalize(self, pairs):
+        from final_comparison import engine_comparison
+
+        finals = {}
+        narrative = {}
+        for symbol, (gpt_text, claude_text) in pairs.items():
+            if self.state['symbols'][symbol]['stages'].get('final') == 'completed':
+                finals[symbol] = get_store().latest('final', [symbol])[0]['raw_text']
+                continue
+            if not self.narrative:
+                final = engine_comparison(symbol, gpt_text, claude_text)
+                if final:
+                    finals[symbol] = final
+                    self.state['symbols'][symbol]['stages']['final'] = 'completed'
+                    continue
+            narrative[symbol] = (gpt_text, claude_text)
+
+        if narrative:
+            requests = [batch_request('final', self.custom_id(symbol, 'final'), final_prompt(
+                symbol, compact_for_prompt('gpt', symbol, gpt_text), compact_for_prompt('claude', symbol, claude_text),
+                STAGE_MODELS['final'][1])) for symbol, (gpt_text, claude_text) in narrative.items()]
+            finals.update(self._collect('final', list(narrative), self._run_stage('final', requests)))
+        return finals
+
+    def summary(self, finals):
+        """📊 Sembol bazında sonuç"""
+
+        results = []
+        for symbol, entry in self.state['symbols'].items():
+            results.append({'symbol': symbol, 'status': entry['status'], 'error': entry['error'],
+                            'final': finals.get(symbol)})
+        return results
+
+
+def default_job_dir():
+    return os.path.join(DEFAULT_BATCH_DIR, datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+def build_clients(kind, backend=None):
+    """🔌 'live' (sağlayıcı batch API'leri) ya da 'local' (backend ile yerel işlem) istemcileri"""
+
+    if kind == 'local':
+        backend = backend or get_backend('mock')
+        return {'openai': LocalBatchClient('openai', backend), 'anthropic': LocalBatchClient('anthropic', backend)}
+    return {'openai': OpenAIBatchClient(), 'anthropic': AnthropicBatchClient()}
+
+
+def main():
+    """🌙 Ana fonksiyon"""
+
+    from batch_runner import load_watchlist, attach_indicators, timeframe_book
+    from final_comparison import send_final_result_to_dashboard
+
+    parser = argparse.ArgumentParser(description='LATU Gece Taraması Batch-API Modu')
+    parser.add_argument('--watchlist', required=True, help='symbol,price,change,volume CSV dosyası')
+    parser.add_argument('--job-dir', help='İş klasörü (varsayılan: results/batches/<zaman>; varsa kaldığı yerden)')
+    parser.add_argument('--client', choices=['live', 'local'], default='live',
+                        help='live: sağlayıcı batch API\'leri, local: istekleri backend ile yerelde işle')
+    parser.add_argument('--backend', choices=['live', 'mock'], help='local istemcinin LLM backend\'i')
+    parser.add_argument('--data-dir', help='Sembol başına OHLCV dosyalarının klasörü (<SYMBOL>.csv/.parquet)')
+    parser.add_argument('--state-dir', help='Zaman dilimi önbelleğinin klasörü (--data-dir ile; sadece yeni barlar işlenir)')
+    parser.add_argument('--poll-interval', type=float,
+                        default=float(os.environ.get('LATU_BATCH_POLL', DEFAULT_POLL_INTERVAL)),
+                        help='Batch durum yoklama aralığı (saniye)')
+    parser.add_argument('--timeout', type=float, help='Aşama başına bekleme sınırı (saniye; varsayılan: sınırsız)')
+    parser.add_argument('--narrative', action='store_true', help='Final kararı yerel motor yerine LLM batch\'i ile')
+    parser.add_argument('--webhook-url', help='Final kararları dashboard\'a gönder')
+    parser.add_argument('--metrics-file', help='Metriklerin JSONL dosyası (varsayılan: LATU_METRICS_FILE)')
+
+    args = parser.parse_args()
+    metrics.configure(None, args.metrics_file)
+
+    watchlist = load_watchlist(args.watchlist)
+    if args.data_dir:
+        attach_indicators(watchlist, args.data_dir, timeframe_book(args.state_dir))
+
+    job_dir = args.job_dir or default_job_dir()
+    print("🌙 LATU Batch-API Taraması Başlatıldı")
+    print(f"📊 Sembol sayısı: {len(watchlist)}")
+    print(f"📁 İş klasörü: {job_dir}")
+
+    backend = get_backend(args.backend) if args.backend else None
+    job = BatchJob(watchlist, build_clients(args.client, backend), job_dir, args.poll_interval, args.narrative,
+                   args.timeout)
+    started = time.perf_counter()
+    try:
+        results = job.run()
+    except BatchError as e:
+        print(f"❌ {e}")
+        exit(1)
+    elapsed = time.perf_counter() - started
+
+    if args.webhook_url:
+        for result in results:
+            if result['final']:
+                send_final_result_to_dashboard(result['symbol'], result['final'], args.webhook_url)
+
+    completed = [result for result in results if result['status'] == 'completed']
+    print(f"✅ Tamamlanan: {len(completed)}/{len(results)} ({elapsed:.1f}s)")
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"⚠️ {result['symbol']}: {result['error']}")
+    print(metrics.summary())
+
+    if not completed:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 Çoklu Sembol Asenkron Batch Motoru
+LATU Trading System - Batch Analysis Pipeline
+
+Bir watchlist'teki tüm semboller için GPT → Claude → Final zincirini aynı
+anda çalıştırır. OpenAI ve Anthropic için ayrı eşzamanlılık (semaphore) ve
+token-bucket hız limitleri tutulur; her sembol kendi zincirinde ilerlediği
+için bir sembolün Claude aşaması diğerinin GPT aşamasıyla örtüşür.
+Spekülatif modda (`--speculative` veya watchlist `mode` sütunu) aynı
+sembolün GPT ve Claude aşamaları da paralel koşar.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from llm_backend import get_backend, MockBackend
+from response_cache import cache_from_env
+from router import find_router, format_route_stats
+from prefilter import PreFilter, DEFAULT_STATE_DIR as PREFILTER_DIR
+from gpt_analysis import gpt_first_analysis, send_result_to_dashboard, build_market_section
+from claude_analysis import claude_detailed_analysis
+from final_comparison import final_comparison_analysis, send_final_result_to_dashboard, narrative_enabled
+
+# Aşama → provider eşlemesi
+STAGE_PROVIDERS = {
+    'gpt': 'openai',
+    'claude': 'anthropic',
+    'final': 'openai'
+}
+
+# Varsayılan provider limitleri
+DEFAULT_LIMITS = {
+    'openai': {'concurrency': 8, 'rate': 5.0, 'burst': 8},
+    'anthropic': {'concurrency': 4, 'rate': 2.0, 'burst': 4}
+}
+
+# Watchlist 'mode' sütunu: GPT → Claude sıralı ya da paralel (spekülatif)
+MODE_SERIAL = 'serial'
+MODE_SPECULATIVE = 'speculative'
+
+
+class TokenBucket:
+    """🪣 Asenkron token-bucket hız sınırlayıcı (istek/saniye)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """🪣 Bir token al, gerekiyorsa bekle"""
+
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class ProviderLimiter:
+    """🚦 Provider başına semaphore + token bucket"""
+
+    def __init__(self, concurrency, rate, burst):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+class BatchRunner:
+    """🌐 Watchlist'i pipeline'lı şekilde analiz eden motor"""
+
+    def __init__(self, backend=None, limits=None, webhook_url=None, prefilter=None, narrative=None,
+                 speculative=False):
+        self.backend = backend or get_backend()
+        self.webhook_url = webhook_url
+        self.prefilter = prefilter
+        self.narrative = narrative_enabled(narrative)
+        # Watchlist satırındaki 'mode' sütunu sembol bazında ezer
+        self.speculative = speculative
+        self.limits = {provider: dict(values) for provider, values in DEFAULT_LIMITS.items()}
+        for provider, values in (limits or {}).items():
+            self.limits.setdefault(provider, {}).update(values)
+
+    @staticmethod
+    async def _in_thread(loop, executor, func, *args, **kwargs):
+        """🧵 Thread'de çalıştır; run_id bağlamı (contextvars) thread'e taşınır"""
+
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(executor, lambda: context.run(func, *args, **kwargs))
+
+    async def _call(self, loop, executor, limiters, stage, func, *args, **kwargs):
+        """🚦 Aşamayı provider limitleri altında thread'de çalıştır"""
+
+        async with limiters[STAGE_PROVIDERS[stage]]:
+            return await self._in_thread(loop, executor, func, *args, backend=self.backend, **kwargs)
+
+    async def _notify(self, loop, executor, func, *args):
+        if self.webhook_url:
+            await self._in_thread(loop, executor, func, *args)
+
+    async def _analyze_symbol(self, loop, executor, limiters, item):
+        """📊 Tek sembolün run'ı (aşama kayıtları aynı run_id'yi taşır)"""
+
+        with metrics.run_context(item['symbol']):
+            return await self._analyze_chain(loop, executor, limiters, item)
+
+    async def _analyze_chain(self, loop, executor, limiters, item):
+        """📊 Tek sembolün üç aşamalı zinciri"""
+
+        symbol = item['symbol']
+        indicators = item.get('indicators')
+        result = {'symbol': symbol, 'gpt': None, 'claude': None, 'final': None, 'status': 'failed'}
+        started = time.perf_counter()
+
+        # Ön filtre: piyasa değişmediyse önceki sonuçları kullan
+        if self.prefilter:
+            should_run, _, previous = self.prefilter.check(symbol, item['price'], item['change'], item['volume'],
+                                                           indicators, required=('gpt', 'claude', 'final'))
+            if not should_run:
+                result.update(previous['results'])
+                result['status'] = 'skipped'
+                result['duration'] = time.perf_counter() - started
+                return result
+
+        if item.get('speculative', self.speculative):
+            gpt_result, claude_result = await self._speculative_pair(loop, executor, limiters, item, result)
+        else:
+            gpt_result, claude_result = await self._serial_pair(loop, executor, limiters, item, result)
+
+        if gpt_result and claude_result:
+            if self.narrative:
+                final_result = await self._call(loop, executor, limiters, 'final', final_comparison_analysis,
+                                                symbol, gpt_result, claude_result, narrative=True)
+            else:
+                # Yerel motor ağ çağrısı yapmaz, provider limitine girmez
+                final_result = await self._in_thread(loop, executor, final_comparison_analysis, symbol,
+                                                     gpt_result, claude_result, backend=self.backend,
+                                                     narrative=False)
+            if final_result:
+                result['final'] = final_result
+                result['status'] = 'completed'
+                if self.prefilter:
+                    self.prefilter.record(symbol, item['price'], item['change'], item['volume'], result, indicators)
+                await self._notify(loop, executor, send_final_result_to_dashboard, symbol, final_result, self.webhook_url)
+
+        result['duration'] = time.perf_counter() - started
+        return result
+
+    async def _serial_pair(self, loop, executor, limiters, item, result):
+        """🔗 GPT → Claude (Claude prompt'u GPT karar kaydını içerir)"""
+
+        symbol = item['symbol']
+        gpt_result = await self._call(loop, executor, limiters, 'gpt', gpt_first_analysis,
+                                      symbol, item['price'], item['change'], item['volume'],
+                                      indicators=item.get('indicators'))
+        if not gpt_result:
+            return None, None
+        result['gpt'] = gpt_result
+        await self._notify(loop, executor, send_result_to_dashboard, symbol, 'gpt-completed', gpt_result, self.webhook_url)
+
+        claude_result = await self._call(loop, executor, limiters, 'claude', claude_detailed_analysis,
+                                         symbol, gpt_result, indicators=item.get('indicators'))
+        if claude_result:
+            result['claude'] = claude_result
+            await self._notify(loop, executor, send_result_to_dashboard, symbol, 'claude-completed', claude_result, self.webhook_url)
+        return gpt_result, claude_result
+
+    async def _speculative_pair(self, loop, executor, limiters, item, result):
+        """⚡ GPT ve Claude aynı piyasa görüntüsüyle paralel; uzlaştırma final aşamasında"""
+
+        symbol = item['symbol']
+        indicators = item.get('indicators')
+        market_section = build_market_section(symbol, item['price'], item['change'], item['volume'],
+                                              indicators=indicators)
+
+        async def stage(name, call):
+            value = await call
+            if value:
+                result[name] = value
+                await self._notify(loop, executor, send_result_to_dashboard, symbol, f'{name}-completed', value,
+                                   self.webhook_url)
+            return value
+
+        return await asyncio.gather(
+            stage('gpt', self._call(loop, executor, limiters, 'gpt', gpt_first_analysis,
+                                    symbol, item['price'], item['change'], item['volume'], indicators=indicators)),
+            stage('claude', self._call(loop, executor, limiters, 'claude', claude_detailed_analysis,
+                                       symbol, None, indicators=indicators, market_section=market_section))
+        )
+
+    async def run_async(self, watchlist):
+        """🌐 Tüm watchlist'i eşzamanlı çalıştır"""
+
+        loop = asyncio.get_running_loop()
+        limiters = {
+            provider: ProviderLimiter(values['concurrency'], values['rate'], values['burst'])
+            for provider, values in self.limits.items()
+        }
+
+        # Thread havuzu toplam provider eşzamanlılığı kadar
+        workers = sum(values['concurrency'] for values in self.limits.values()) + 2
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return await asyncio.gather(*[
+                self._analyze_symbol(loop, executor, limiters, item) for item in watchlist
+            ])
+
+    def run(self, watchlist):
+        """🌐 Senkron giriş noktası"""
+        return asyncio.run(self.run_async(watchlist))
+
+
+def load_watchlist(path):
+    """📄 symbol,price,change,volume[,mode] başlıklı CSV watchlist'i oku (mode: serial/speculative)"""
+
+    watchlist = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            item = {
+                'symbol': row['symbol'].strip(),
+                'price': float(row['price']),
+                'change': float(row['change']),
+                'volume': float(row['volume'])
+            }
+            if (row.get('mode') or '').strip():
+                item['speculative'] = row['mode'].strip().lower() == MODE_SPECULATIVE
+            watchlist.append(item)
+    return watchlist
+
+def attach_indicators(watchlist, data_dir, timeframes=None):
+    """
+    📈 Her sembol için <data_dir>/<SYMBOL>.csv|.parquet dosyasından göstergeleri hesapla.
+    timeframes (TimeframeBook) verilirse zaman dilimi barları sıfırdan değil, kayıtlı
+    durumun son dakikasından itibaren artımlı güncellenir.
+    """
+
+    from market_data import load_indicators, load_candles, last_window, compute_indicators
+
+    for item in watchlist:
+        for extension in ('.parquet', '.csv'):
+            path = os.path.join(data_dir, f"{item['symbol']}{extension}")
+            if not os.path.exists(path):
+                continue
+            try:
+                if timeframes is None:
+                    _, item['indicators'] = load_indicators(path, item['symbol'])
+                    break
+                candles = load_candles(path, item['symbol'])
+            except ValueError as e:
+                print(f"⚠️ {e}, göstergesiz devam")
+                break
+            item['indicators'] = compute_indicators(last_window(candles))
+            timeframes.update_from_frame(item['symbol'], candles)
+            item['indicators']['timeframes'] = timeframes.snapshot(item['symbol'])
+            break
+        else:
+            print(f"⚠️ {item['symbol']} için OHLCV dosyası yok, göstergesiz devam")
+    if timeframes is not None:
+        timeframes.save()
+    return watchlist
+
+def timeframe_book(state_dir):
+    """📚 state_dir verilirse tüm watchlist'in paylaştığı TimeframeBook"""
+
+    if not state_dir:
+        return None
+    from timeframes import TimeframeBook
+    return TimeframeBook(state_dir)
+
+def main():
+    """🌐 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Çoklu Sembol Batch Analizi')
+    parser.add_argument('--watchlist', required=True, help='symbol,price,change,volume CSV dosyası')
+    parser.add_argument('--webhook-url', help='Dashboard webhook URL')
+    parser.add_argument('--data-dir', help='Sembol başına OHLCV dosyalarının klasörü (<SYMBOL>.csv/.parquet)')
+    parser.add_argument('--state-dir', help='Zaman dilimi önbelleğinin klasörü (--data-dir ile; sadece yeni barlar işlenir)')
+    parser.add_argument('--backend', choices=['live', 'mock'], help='LLM backend (varsayılan: LATU_LLM_BACKEND)')
+    parser.add_argument('--mock-latency', type=float, default=0.0, help='Mock backend çağrı gecikmesi (saniye)')
+    parser.add_argument('--prefilter', action='store_true', help='Piyasa değişmediyse LLM çağrılarını atla')
+    parser.add_argument('--prefilter-dir', default=PREFILTER_DIR, help='Ön filtre görüntülerinin klasörü')
+    parser.add_argument('--narrative', action='store_true', default=None,
+                        help='Final aşamasında yerel motor yerine LLM anlatılı karşılaştırma')
+    parser.add_argument('--openai-concurrency', type=int, default=DEFAULT_LIMITS['openai']['concurrency'])
+    parser.add_argument('--openai-rate', type=float, default=DEFAULT_LIMITS['openai']['rate'], help='OpenAI istek/saniye')
+    parser.add_argument('--anthropic-concurrency', type=int, default=DEFAULT_LIMITS['anthropic']['concurrency'])
+    parser.add_argument('--anthropic-rate', type=float, default=DEFAULT_LIMITS['anthropic']['rate'], help='Anthropic istek/saniye')
+
+    parser.add_argument('--speculative', action='store_true',
+                        help='Claude\'u GPT\'yi beklemeden paralel başlat (watchlist mode sütunu sembol bazında ezer)')
+    parser.add_argument('--metrics-port', type=int, help='Prometheus /metrics portu (varsayılan: LATU_METRICS_PORT)')
+    parser.add_argument('--metrics-file', help='Aşama metriklerinin JSONL dosyası (varsayılan: LATU_METRICS_FILE)')
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics_port, args.metrics_file)
+
+    if args.backend == 'mock':
+        backend = cache_from_env(MockBackend(latency=args.mock_latency))
+    else:
+        backend = get_backend(args.backend)
+
+    limits = {
+        'openai': {'concurrency': args.openai_concurrency, 'rate': args.openai_rate, 'burst': args.openai_concurrency},
+        'anthropic': {'concurrency': args.anthropic_concurrency, 'rate': args.anthropic_rate, 'burst': args.anthropic_concurrency}
+    }
+
+    watchlist = load_watchlist(args.watchlist)
+    if args.data_dir:
+        started = time.perf_counter()
+        attach_indicators(watchlist, args.data_dir, timeframe_book(args.state_dir))
+        print(f"📈 Göstergeler hesaplandı: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    print("🌐 LATU Batch Analysis Pipeline Başlatıldı")
+    print(f"📊 Sembol sayısı: {len(watchlist)}")
+
+    started = time.perf_counter()
+    prefilter = PreFilter(args.prefilter_dir) if args.prefilter else None
+    results = BatchRunner(backend=backend, limits=limits, webhook_url=args.webhook_url, prefilter=prefilter,
+                          narrative=args.narrative, speculative=args.speculative).run(watchlist)
+    elapsed = time.perf_counter() - started
+
+    completed = sum(1 for result in results if result['status'] in ('completed', 'skipped'))
+    print(f"✅ Tamamlanan: {completed}/{len(results)}")
+
+    if prefilter:
+        counts = prefilter.summary()
+        print(f"🚦 Ön filtre: {counts['run']} çalıştırıldı, {counts['skip']} atlandı")
+    print(f"⏱️ Toplam süre: {elapsed:.2f}s ({len(results) / elapsed * 60:.1f} sembol/dk)")
+
+    if hasattr(backend, 'stats'):
+        stats = backend.stats()
+        print(f"🗄️ Cache hit: {stats['hits']}, miss: {stats['misses']}, eviction: {stats['evictions']}")
+    router = find_router(backend)
+    if router:
+        print(format_route_stats(router))
+    print(metrics.summary())
+
+    if completed < len(results):
+        failed = ', '.join(result['symbol'] for result in results if result['status'] == 'failed')
+        print(f"⚠️ Başarısız semboller: {failed}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
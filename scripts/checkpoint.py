@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📌 Aşama Checkpoint'leri
+LATU Trading System - Checkpoint Pipeline
+
+Her run için (run_id, sembol, aşama çıktıları, durum) tek bir JSON kaydı
+tutulur ve her aşamadan sonra atomik olarak yazılır (geçici dosya +
+os.replace). Final aşaması ya da tetikleme başarısız olursa zincir
+baştan çalıştırılmaz: giriş noktaları `--resume <run-id>` ile tamamlanan
+aşamaları checkpoint'ten alır ve sadece eksik olanları çalıştırır. TTL'i
+geçen checkpoint'ler otomatik (saatte en fazla bir kez) ya da
+`python scripts/checkpoint.py gc` ile silinir.
+
+    python scripts/orchestrator.py --resume 3f2a9c1d0b7e4a55
+    python scripts/final_comparison.py --resume 3f2a9c1d0b7e4a55 --webhook-url ...
+    python scripts/checkpoint.py list --status failed
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from metrics import log
+
+DEFAULT_CHECKPOINT_DIR = 'results/checkpoints'
+# Bu süredir güncellenmeyen checkpoint'ler bayattır
+DEFAULT_TTL = 7 * 86400
+# Otomatik temizlik en fazla bu aralıkla çalışır
+GC_INTERVAL = 3600
+
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+STAGES = ('gpt', 'claude', 'final')
+
+_RUN_ID = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+class CheckpointNotFound(Exception):
+    """📌 Verilen run_id için checkpoint yok (silinmiş ya da hiç yazılmamış)"""
+
+
+class Checkpoint:
+    """📌 Tek run'ın aşama çıktıları ve durumu"""
+
+    def __init__(self, store, record):
+        self.store = store
+        self.record = record
+        # Spekülatif modda GPT ve Claude aynı anda tamamlanabilir
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self):
+        return self.record['run_id']
+
+    @property
+    def symbol(self):
+        return self.record['symbol']
+
+    @property
+    def inputs(self):
+        return self.record['inputs']
+
+    @property
+    def status(self):
+        return self.record['status']
+
+    def output(self, stage):
+        """📄 Tamamlanmış aşamanın çıktısı (yoksa None)"""
+        entry = self.record['stages'].get(stage)
+        return entry['output'] if entry else None
+
+    def completed_stages(self):
+        return [stage for stage in STAGES if stage in self.record['stages']]
+
+    def complete(self, stage, output):
+        """✅ Aşama çıktısını kaydet"""
+
+        with self._lock:
+            self.record['stages'][stage] = {'output': output, 'completed_at': time.time()}
+            self.record.update(status=STATUS_RUNNING, error=None)
+            self.store.save(self.record)
+
+    def finish(self, error=None):
+        """🏁 Run'ı tamamlandı (error yoksa) ya da başarısız olarak işaretle"""
+
+        with self._lock:
+            self.record.update(status=STATUS_FAILED if error else STATUS_COMPLETED, error=error)
+            self.store.save(self.record)
+
+    def close(self, results):
+        """🏁 Pipeline sonuç sözlüğüne göre durumu yaz (ilk eksik aşama hata olur)"""
+
+        if results.get('final'):
+            self.finish()
+            return
+        missing = next((stage for stage in STAGES if not results.get(stage)), 'final')
+        self.finish(f"{missing} aşaması başarısız")
+
+    def run(self, stage, func, *args, **kwargs):
+        """📌 Aşama checkpoint'te tamamlanmışsa çıktısını döndür, değilse çalıştır ve kaydet"""
+
+        output = self.output(stage)
+        if output:
+            log(f"📌 {stage} aşaması checkpoint'ten alındı (run {self.run_id})", event='stage_resumed',
+                stage=stage, run_id=self.run_id)
+            return output
+
+        output = func(*args, **kwargs)
+        if output:
+            self.complete(stage, output)
+        return output
+
+
+class CheckpointStore:
+    """🗂️ Run başına bir JSON dosyası tutan checkpoint klasörü"""
+
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, run_id):
+        if not _RUN_ID.match(run_id or ''):
+            raise ValueError(f"Geçersiz run_id: {run_id!r}")
+        return os.path.join(self.directory, f"{run_id}.json")
+
+    def save(self, record):
+        """💾 Atomik yazım: yarım kalan yazım eski kaydı bozmaz"""
+
+        record['updated_at'] = time.time()
+        path = self.path(record['run_id'])
+        temporary = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def load(self, run_id):
+        """📂 Var olan checkpoint'i yükle"""
+
+        try:
+            with open(self.path(run_id), encoding='utf-8') as f:
+                return Checkpoint(self, json.load(f))
+        except FileNotFoundError:
+            raise CheckpointNotFound(f"Checkpoint bulunamadı: {run_id}") from None
+
+    def open(self, run_id, symbol, inputs=None):
+        """📌 run_id'nin checkpoint'ini aç (varsa devam, yoksa yeni kayıt)"""
+
+        try:
+            return self.load(run_id)
+        except CheckpointNotFound:
+            pass
+
+        self.maybe_gc()
+        now = time.time()
+        record = {'run_id': run_id, 'symbol': symbol.upper(), 'inputs': inputs or {}, 'status': STATUS_RUNNING,
+                  'error': None, 'stages': {}, 'created_at': now, 'updated_at': now}
+        self.save(record)
+        return Checkpoint(self, record)
+
+    def list(self, status=None):
+        """📋 Checkpoint kayıtları (yeniden eskiye)"""
+
+        records = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if status is None or record['status'] == status:
+                records.append(record)
+        return sorted(records, key=lambda record: record['updated_at'], reverse=True)
+
+    def gc(self, ttl=None):
+        """🧹 TTL'i geçen checkpoint'leri ve yarım kalmış geçici dosyaları sil"""
+
+        ttl = self.ttl if ttl is None else ttl
+        expired = time.time() - ttl
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not (name.endswith('.json') or name.endswith('.tmp')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                # Checkpoint her kayıtta yeniden yazılır: mtime = son güncelleme
+                if os.path.getmtime(path) < expired:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            log(f"🧹 {removed} bayat checkpoint silindi", event='checkpoint_gc', removed=removed)
+        return removed
+
+    def maybe_gc(self):
+        """🧹 Son temizlikten GC_INTERVAL geçtiyse gc()"""
+
+        marker = os.path.join(self.directory, '.gc')
+        try:
+            if time.time() - os.path.getmtime(marker) < GC_INTERVAL:
+                return 0
+        except FileNotFoundError:
+            pass
+        with open(marker, 'w'):
+            pass
+        return self.gc()
+
+
+def checkpoints_from_env():
+    """📌 LATU_CHECKPOINT (varsayılan: açık), LATU_CHECKPOINT_DIR ve LATU_CHECKPOINT_TTL ile store"""
+
+    if os.environ.get('LATU_CHECKPOINT', 'on').lower() in ('0', 'off', 'false', 'no'):
+        return None
+    return CheckpointStore(os.environ.get('LATU_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR),
+                           float(os.environ.get('LATU_CHECKPOINT_TTL', DEFAULT_TTL)))
+
+def open_checkpoint(run_id, symbol, inputs=None):
+    """📌 Checkpoint'ler açıksa run'ın kaydı (kapalıysa None)"""
+
+    store = checkpoints_from_env()
+    return store.open(run_id, symbol, inputs) if store else None
+
+def resume_checkpoint(run_id):
+    """📂 --resume için var olan checkpoint (LATU_CHECKPOINT kapalı olsa da okunur)"""
+    return CheckpointStore(os.environ.get('LATU_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR)).load(run_id)
+
+def run_stage(checkpoint, stage, func, *args, **kwargs):
+    """📌 Checkpoint varsa Checkpoint.run, yoksa doğrudan çalıştır"""
+
+    if checkpoint is None:
+        return func(*args, **kwargs)
+    return checkpoint.run(stage, func, *args, **kwargs)
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+def main():
+    """📌 Checkpoint listeleme, görüntüleme ve temizlik"""
+
+    parser = argparse.ArgumentParser(description='LATU Aşama Checkpoint\'leri')
+    parser.add_argument('--dir', default=os.environ.get('LATU_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR),
+                        help='Checkpoint klasörü')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='Checkpoint\'leri listele')
+    list_parser.add_argument('--status', choices=[STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED])
+
+    show_parser = commands.add_parser('show', help='Bir run\'ın checkpoint\'ini göster')
+    show_parser.add_argument('run_id')
+
+    gc_parser = commands.add_parser('gc', help='Bayat checkpoint\'leri sil')
+    gc_parser.add_argument('--ttl', type=float, help='Saniye (varsayılan: LATU_CHECKPOINT_TTL ya da 7 gün)')
+
+    args = parser.parse_args()
+    store = CheckpointStore(args.dir, float(os.environ.get('LATU_CHECKPOINT_TTL', DEFAULT_TTL)))
+
+    if args.command == 'list':
+        records = store.list(args.status)
+        for record in records:
+            stages = ','.join(stage for stage in STAGES if stage in record['stages']) or '-'
+            error = f" ({record['error']})" if record.get('error') else ''
+            print(f"📌 {record['run_id']} {record['symbol']} {record['status']} [{stages}] "
+                  f"{_format_time(record['updated_at'])}{error}")
+        print(f"📊 Toplam: {len(records)}")
+    elif args.command == 'show':
+        try:
+            print(json.dumps(store.load(args.run_id).record, ensure_ascii=False, indent=2))
+        except CheckpointNotFound as e:
+            print(f"❌ {e}")
+            exit(1)
+    else:
+        print(f"🧹 Silinen checkpoint: {store.gc(args.ttl)}")
+
+if __name__ == "__main__":
+    main()
@@ -7,190 +7,265 @@ LATU Trading System - Claude Analysis Pipeline
 
 import os
 import argparse
-import json
-import requests
+import time
+import logging
 from datetime import datetime
-import anthropic
+from result_store import get_store, live_result_path
+from llm_backend import get_backend
+from transport import deliver, defer_delivery, idempotency_key
+from stream_relay import StreamRelay
+from generation import max_tokens_for, finish_sections
+from handoff import attach_results, load_ref, HandoffError
+from checkpoint import open_checkpoint, resume_checkpoint, run_stage, CheckpointNotFound
+from metrics import instrument, instrument_stage, phase, log, run_context
+from decision_schema import compact_for_prompt
+from prompts import CLAUDE_SYSTEM_PROMPT, claude_prompt, claude_speculative_prompt, count_tokens
 
-def claude_detailed_analysis(symbol, gpt_result):
-    """🤖 Claude detaylı teknik analiz fonksiyonu"""
+def build_indicator_fields(indicators=None):
+    """📐 Gösterge satırları: gerçek değerler varsa onları, yoksa LLM talimatını kullan"""
     
-    # Anthropic API ayarları
-    client = anthropic.Anthropic(api_key=os.environ['ANTHROPIC_API_KEY'])
+    if not indicators:
+        return {
+            'section': '',
+            'rsi': '[30-70 arası bir değer hesapla ve yorumla]',
+            'macd': '[Pozitif/Negatif momentum belirle]',
+            'volume': '[Yüksek/Normal/Düşük volume analiz et]',
+            'bollinger': '[Genişlik/daralma durumu]'
+        }
     
-    # Claude'a gönderilecek prompt
-    prompt = f"""
-GPT'nin ilk hızlı analizi şu şekilde:
-
-{gpt_result}
-
-Sen Claude olarak, bu GPT analizini temel alarak çok daha detaylı ve profesyonel bir teknik analiz yap. 
-
-MUTLAKA şu formatı kullan (başka format kullanma):
-
-🤖 Claude Teknik Analiz - {symbol.upper()}
-
-📊 **GPT İlk Değerlendirmesi Alındı**
-- GPT Kararı: [GPT'nin kararını buraya yaz]
-- İlk momentum: [GPT'nin bahsettiği değişim %'sini yaz]
-
-🧠 **Claude Derinlemesine Analiz:**
-
-**Teknik Göstergeler:**
-- RSI: [30-70 arası bir değer hesapla ve yorumla]
-- MACD: [Pozitif/Negatif momentum belirle]
-- Volume Profil: [Yüksek/Normal/Düşük volume analiz et]
-- Bollinger Bands: [Genişlik/daralma durumu]
-
-**Fiyat Seviyeleri:**
-- Destek: $[hesapla ve yakın seviye belirle]
-- Direnç: $[hesapla ve yakın seviye belirle]  
-- Entry: $[optimal giriş noktası belirle]
-- Stop Loss: $[risk yönetimi için stop seviyesi]
-
-**Claude Risk Değerlendirmesi:**
-- Risk Seviyesi: [Yüksek/Orta/Düşük - detaylı gerekçe ile]
-- R/R Oranı: [1:1.5 ile 1:3 arası gerçekçi oran]
-- Güvenilirlik Oranı: [%60-90 arası]
-- Position Size Önerisi: [%0.5-2 arası]
-
-**Market Psychology & Sentiment:**
-- Piyasa Duygusu: [Fear/Greed/Neutral analizi]
-- Volume-Price İlişkisi: [Divergence/Convergence]
-- Trend Gücü: [Güçlü/Orta/Zayıf]
-
-**Claude Kararı:** [KOŞULLU AL/KOŞULLU SAT/BEKLE]
+    from indicator_params import format_indicator_lines
+    
+    timeframes = ''
+    if indicators.get('timeframes'):
+        from timeframes import format_timeframe_lines
+        timeframes = f"""
+🕰️ **Zaman Dilimi Trendleri (multiple timeframe perspektifi için gerçek barlar):**
+{format_timeframe_lines(indicators['timeframes'])}
+"""
+    
+    macd_state = 'Pozitif' if indicators['macd_hist'] > 0 else 'Negatif'
+    return {
+        'section': f"""
+📐 **Hesaplanmış Göstergeler (gerçek OHLCV verisinden - bu değerleri kullan, yeniden uydurma):**
+{format_indicator_lines(indicators)}
+{timeframes}""",
+        'rsi': f"{indicators['rsi']:.1f} [bu değeri yorumla]",
+        'macd': f"{macd_state} (histogram {indicators['macd_hist']:.4f}) [yorumla]",
+        'volume': f"24s toplam {indicators['volume']:,.0f} [Yüksek/Normal/Düşük yorumla]",
+        'bollinger': f"Genişlik %{indicators['bollinger_width_pct']:.2f} [genişleme/daralma yorumla]"
+    }
 
-**Stratejik Notlar:**
-- [Önemli seviyeler ve dikkat edilmesi gerekenler]
-- [Risk faktörleri]
-- [Alternatif senaryolar]
+@instrument_stage('claude')
+def claude_detailed_analysis(symbol, gpt_result, backend=None, indicators=None, relay=None, market_section=None):
+    """🤖 Claude detaylı teknik analiz fonksiyonu (gpt_result None ise spekülatif mod)"""
+    
+    if gpt_result is None and market_section is None:
+        raise ValueError('Spekülatif Claude analizi için market_section gerekli')
+    
+    # LLM backend (canlı API veya mock)
+    backend = instrument(backend or get_backend())
+    
+    # Göstergeler (OHLCV verilmişse gerçek değerler)
+    fields = build_indicator_fields(indicators)
+    
+    if gpt_result is None:
+        # Spekülatif mod: GPT beklenmeden aynı piyasa görüntüsünden bağımsız analiz,
+        # iki karar final aşamasında uzlaştırılır
+        prompt = claude_speculative_prompt(symbol, market_section, fields)
+    else:
+        # GPT çıktısının tamamı yerine yapılandırılmış karar kaydı aktarılır
+        gpt_record = compact_for_prompt('gpt', symbol, gpt_result)
 
-Bu analizi yaparken:
-1. GPT'den daha temkinli ve konservatif ol
-2. Risk yönetimini her zaman ön planda tut
-3. Teknik detaylara derinlemesine odaklan
-4. Gerçekçi ve uygulanabilir hedefler koy
-5. Multiple timeframe perspektifi kullan
-    """
+        # Statik format system prompt'ta (cache_control); kayıt bütçeye sığdırılır
+        prompt = claude_prompt(symbol, gpt_record, fields)
     
     try:
-        print(f"🤖 Claude detaylı analizi başlatılıyor: {symbol}")
+        log(f"🤖 Claude detaylı analizi başlatılıyor: {symbol}", event='stage_started',
+            prompt_tokens=count_tokens(prompt))
+        
+        # Geçmiş çıktı uzunluklarından öğrenilen bütçe
+        max_tokens = max_tokens_for('claude')
         
-        # Anthropic API çağrısı
-        response = client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1500,
-            messages=[
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ]
+        # Anthropic API çağrısı (backend üzerinden; relay varsa streaming)
+        started = time.perf_counter()
+        call = backend.stream if relay is not None else backend.complete
+        response_text = call(
+            'claude', 'anthropic', "claude-3-sonnet-20240229",
+            CLAUDE_SYSTEM_PROMPT,
+            prompt,
+            max_tokens=max_tokens
         )
         
-        claude_result = response.content[0].text.strip()
+        if relay is not None:
+            # Parçalar geldikçe dosyaya ve dashboard'a aktarılır
+            response_text = relay.consume(response_text, live_result_path('claude', symbol))
+        
+        # Kesilmiş / eksik yanıtta sadece eksik bölümler istenir
+        response_text = finish_sections(backend, 'claude', 'anthropic', "claude-3-sonnet-20240229",
+                                        CLAUDE_SYSTEM_PROMPT, prompt, max_tokens, None,
+                                        response_text, relay)
         
-        # Sonucu results klasörüne kaydet
-        os.makedirs('results', exist_ok=True)
-        result_file = f'results/claude_{symbol}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
+        latency = time.perf_counter() - started
+        model = getattr(response_text, 'model', None) or "claude-3-sonnet-20240229"
+        claude_result = response_text.strip()
         
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(claude_result)
+        # Sonucu result store'a kaydet (yönlendirici fallback modeli seçmiş olabilir)
+        with phase('store'):
+            record_id = get_store().record(symbol, 'claude', model, claude_result, latency=latency,
+                                           usage=getattr(response_text, 'usage', None))
         
-        print(f"✅ Claude analizi tamamlandı ve kaydedildi: {result_file}")
+        log(f"✅ Claude analizi tamamlandı ve kaydedildi: #{record_id} ({latency:.2f}s)", event='stage_completed',
+            record_id=record_id, latency=round(latency, 6))
         return claude_result
         
     except Exception as e:
-        print(f"❌ Claude API hatası: {e}")
+        log(f"❌ Claude API hatası: {e}", event='stage_failed', level=logging.ERROR, error=str(e))
         return None
 
-def trigger_final_stage(symbol, gpt_result, claude_result, webhook_url):
-    """🔄 Final karşılaştırma aşamasını tetikle"""
+def trigger_final_stage(symbol, gpt_result, claude_result, webhook_url, run_id=None, defer=False):
+    """🔄 Final karşılaştırma aşamasını tetikle (run_id checkpoint'i bağlar; defer: outbox'a al)"""
     
-    try:
-        # GitHub'a final aşama için webhook gönder
-        github_payload = {
-            'event_type': 'analysis-request',
-            'client_payload': {
-                'symbol': symbol,
-                'stage': 'final-comparison',
-                'gpt_result': gpt_result,
-                'claude_result': claude_result,
-                'webhook_url': webhook_url,
-                'timestamp': datetime.now().isoformat()
-            }
-        }
-        
-        headers = {
-            'Authorization': f'token {os.environ["GITHUB_TOKEN"]}',
-            'Accept': 'application/vnd.github.v3+json',
-            'Content-Type': 'application/json'
+    # GitHub'a final aşama için webhook gönder
+    timestamp = datetime.now().isoformat()
+    github_payload = {
+        'event_type': 'analysis-request',
+        'client_payload': {
+            'symbol': symbol,
+            'stage': 'final-comparison',
+            'webhook_url': webhook_url,
+            'timestamp': timestamp
         }
-        
-        # GitHub repo bilgileri
-        repo_info = os.environ.get('GITHUB_REPOSITORY', 'user/G-C-G-simulation-pipline')
-        github_url = f'https://api.github.com/repos/{repo_info}/dispatches'
-        
-        response = requests.post(github_url, json=github_payload, headers=headers)
-        
-        if response.status_code == 204:
-            print("✅ Final karşılaştırma aşaması tetiklendi")
-        else:
-            print(f"⚠️ Final tetikleme hatası: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Final tetikleme hatası: {e}")
+    }
+    # Tam metinler yerine handoff referansları (dispatch ve argv boyut sınırları)
+    attach_results(github_payload['client_payload'], gpt_result=gpt_result, claude_result=claude_result)
+    if run_id:
+        github_payload['client_payload']['run_id'] = run_id
+    
+    headers = {
+        'Accept': 'application/vnd.github.v3+json',
+        'Content-Type': 'application/json'
+    }
+    
+    # GitHub repo bilgileri
+    repo_info = os.environ.get('GITHUB_REPOSITORY', 'user/G-C-G-simulation-pipline')
+    api_url = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+    github_url = f'{api_url}/repos/{repo_info}/dispatches'
+    
+    key = idempotency_key(symbol, 'final-comparison', timestamp)
+    if defer:
+        # Handoff artifact'ı yüklenmeden sonraki job başlamasın: dispatch outbox'ta bekler
+        defer_delivery(github_url, github_payload, headers, auth_env='GITHUB_TOKEN', key=key, expected=(204,))
+        return
+    
+    ok, status = deliver(github_url, github_payload, headers, auth_env='GITHUB_TOKEN', key=key, expected=(204,))
+    
+    if ok:
+        log("✅ Final karşılaştırma aşaması tetiklendi", event='dispatch_sent', target='final-comparison')
+    else:
+        log(f"⚠️ Final tetikleme hatası: {status}", event='dispatch_failed', level=logging.WARNING,
+            target='final-comparison', status=status)
 
 def send_result_to_dashboard(symbol, stage, result, webhook_url):
     """📤 Dashboard'a sonuç gönder"""
     
-    try:
-        payload = {
-            'symbol': symbol,
-            'stage': stage,
-            'result': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ Dashboard'a Claude sonucu gönderildi")
-        else:
-            print(f"⚠️ Dashboard gönderim hatası: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Dashboard gönderim hatası: {e}")
+    timestamp = datetime.now().isoformat()
+    payload = {
+        'symbol': symbol,
+        'stage': stage,
+        'result': result,
+        'timestamp': timestamp
+    }
+    
+    ok, status = deliver(webhook_url, payload, key=idempotency_key(symbol, stage, timestamp))
+    
+    if ok:
+        log("✅ Dashboard'a Claude sonucu gönderildi", event='webhook_sent', stage=stage)
+    else:
+        log(f"⚠️ Dashboard gönderim hatası: {status}", event='webhook_failed', level=logging.WARNING,
+            stage=stage, status=status)
 
 def main():
     """🤖 Ana fonksiyon"""
     
     parser = argparse.ArgumentParser(description='Claude Detaylı Analiz Script')
-    parser.add_argument('--symbol', required=True, help='Trading sembolü')
-    parser.add_argument('--gpt-result', required=True, help='GPT analiz sonucu')
+    parser.add_argument('--symbol', help='Trading sembolü')
+    parser.add_argument('--gpt-result', help='GPT analiz sonucu')
+    parser.add_argument('--gpt-result-ref', help='GPT sonucunun handoff referansı (--gpt-result yoksa okunur)')
     parser.add_argument('--webhook-url', required=True, help='Dashboard webhook URL')
+    parser.add_argument('--run-id', help='Zincirin run kimliği (dispatch payload\'undan; checkpoint\'i bağlar)')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help='GPT (ve varsa Claude) çıktısını checkpoint\'ten al, sadece eksik aşamayı çalıştır')
+    parser.add_argument('--stream', action='store_true', help='Çıktıyı streaming ile dashboard ve dosyaya aktar')
+    parser.add_argument('--no-trigger', action='store_true',
+                        help='Final dispatch\'ini gönderme, outbox\'a al (transport.py --replay ile gönderilir)')
+    parser.add_argument('--data-file', help='Dakikalık OHLCV CSV/Parquet dosyası (göstergeler için)')
     
     args = parser.parse_args()
     
-    print("🤖 LATU Claude Analysis Pipeline Başlatıldı")
-    print(f"📊 Analiz edilen sembol: {args.symbol}")
-    print(f"📄 GPT sonucu alındı: {len(args.gpt_result)} karakter")
+    checkpoint = None
+    if args.resume:
+        try:
+            checkpoint = resume_checkpoint(args.resume)
+        except CheckpointNotFound as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+        args.symbol = args.symbol or checkpoint.symbol
+        args.gpt_result = args.gpt_result or checkpoint.output('gpt')
+    
+    # Referans sadece metin başka yoldan gelmediyse okunur
+    if not args.gpt_result and args.gpt_result_ref:
+        try:
+            args.gpt_result = load_ref(args.gpt_result_ref)
+        except HandoffError as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+    
+    if not (args.symbol and args.gpt_result):
+        parser.error('--symbol ve --gpt-result / --gpt-result-ref gerekli '
+                     '(ya da GPT çıktısı olan bir --resume checkpoint\'i)')
     
-    # Claude detaylı analizini yap
-    claude_result = claude_detailed_analysis(args.symbol, args.gpt_result)
+    log(f"🤖 LATU Claude Analysis Pipeline Başlatıldı: {args.symbol} (GPT sonucu {len(args.gpt_result)} karakter)",
+        event='run_started', stage='claude', symbol=args.symbol, gpt_chars=len(args.gpt_result))
+    
+    # OHLCV verisi verildiyse göstergeleri hesapla
+    indicators = None
+    if args.data_file:
+        from market_data import load_indicators
+        try:
+            _, indicators = load_indicators(args.data_file, args.symbol)
+        except ValueError as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+    
+    with run_context(args.symbol, args.resume or args.run_id or None) as run_id:
+        # Checkpoint: final tetiklemesi ya da final runner'ı başarısız olursa Claude yeniden çağrılmaz
+        if checkpoint is None:
+            checkpoint = open_checkpoint(run_id, args.symbol)
+        if checkpoint is not None and not checkpoint.output('gpt'):
+            checkpoint.complete('gpt', args.gpt_result)
+        
+        # Claude detaylı analizini yap
+        relay = StreamRelay(args.symbol, 'claude', args.webhook_url) if args.stream else None
+        claude_result = run_stage(checkpoint, 'claude', claude_detailed_analysis, args.symbol, args.gpt_result,
+                                  indicators=indicators, relay=relay)
+        if relay is not None:
+            relay.close()
     
     if claude_result:
         # Dashboard'a Claude sonucunu gönder
         send_result_to_dashboard(args.symbol, 'claude-completed', claude_result, args.webhook_url)
         
         # Final karşılaştırma aşamasını tetikle
-        trigger_final_stage(args.symbol, args.gpt_result, claude_result, args.webhook_url)
+        trigger_final_stage(args.symbol, args.gpt_result, claude_result, args.webhook_url, run_id,
+                            defer=args.no_trigger)
         
-        print("🎯 Claude aşaması başarıyla tamamlandı!")
+        log(f"📌 Run: {run_id}", event='run_id', run=run_id)
+        log("🎯 Claude aşaması başarıyla tamamlandı!", event='run_completed', stage='claude')
         
     else:
-        print("❌ Claude analizi başarısız!")
+        if checkpoint is not None:
+            checkpoint.finish('claude aşaması başarısız')
+        log("❌ Claude analizi başarısız!", event='run_failed', level=logging.ERROR, stage='claude')
         exit(1)
 
 if __name__ == "__main__":
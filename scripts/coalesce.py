@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔗 İstek Birleştirme (Single-Flight) Katmanı
+LATU Trading System - Coalesce Pipeline
+
+Hızlı piyasa hareketlerinde dashboard aynı sembol için saniyeler içinde
+birden fazla analiz isteği gönderir. Bu katman aşama giriş noktalarının
+önünde durur: aynı sembol için çalışan bir analiz varsa yeni istek ikinci
+bir zincir başlatmaz, çalışan analizin sonucuna bağlanır (single-flight).
+İsteğe bağlı debounce penceresi boyunca gelen istekler yalnızca piyasa
+görüntüsünü günceller; pencere bitince en taze fiyatla tek analiz yapılır.
+Bellek içi (tek süreç / worker) ve SQLite (aynı makinedeki süreçler
+arası) backend'i vardır.
+
+    LATU_COALESCE=sqlite LATU_COALESCE_WINDOW=2 python scripts/gpt_analysis.py ...
+    python scripts/coalesce.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import metrics
+from metrics import log
+
+DEFAULT_SQLITE_PATH = 'results/coalesce.sqlite'
+# Takipçinin lider sonucunu bekleme sınırı; aynı zamanda bayat uçuş eşiği
+DEFAULT_TIMEOUT = 600.0
+# Tamamlanan uçuş kayıtlarının saklanma süresi
+RETENTION_SECONDS = 86400
+POLL_INTERVAL = 0.1
+
+# Tek istek işleyen CLI süreçlerinde bellek içi uçuş tablosu hiçbir şeyi birleştiremez
+ONE_SHOT_KINDS = ('off', 'sqlite')
+
+KIND_PIPELINE = 'pipeline'
+KIND_GPT = 'gpt'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'debouncing',
+    snapshot TEXT NOT NULL,
+    result TEXT,
+    followers INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_flights_key ON flights (key, state);
+"""
+
+
+def flight_key(symbol, kind=KIND_PIPELINE):
+    """🔑 Sembol + istek türü (pipeline / gpt) anahtarı"""
+    return f"{kind}:{symbol.upper()}"
+
+
+class _Flight:
+    __slots__ = ('id', 'snapshot', 'state', 'result', 'followers', 'started_at', 'finished_at', 'done')
+
+    def __init__(self, flight_id, snapshot):
+        self.id = flight_id
+        self.snapshot = snapshot
+        self.state = 'debouncing'
+        self.result = None
+        self.followers = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+
+
+class MemoryFlights:
+    """🧠 Süreç içi uçuş tablosu (orchestrator / worker thread'leri)"""
+
+    def __init__(self, retention=DEFAULT_TIMEOUT):
+        self.retention = retention
+        self._flights = {}
+        self._by_id = {}
+        self._next_id = 1
+        self._executed = 0
+        self._coalesced = 0
+        self._lock = threading.Lock()
+
+    def join(self, key, snapshot):
+        """✈️ Çalışan uçuşa katıl ya da yenisini başlat ((id, lider mi))"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self._coalesced += 1
+                if flight.state == 'debouncing':
+                    flight.snapshot = snapshot
+                return flight.id, False
+
+            # Geç kalan takipçiler için biten uçuşlar bir süre tutulur
+            expired = time.time() - self.retention
+            for flight_id in [i for i, (_, f) in self._by_id.items() if f.done.is_set() and f.finished_at < expired]:
+                del self._by_id[flight_id]
+
+            flight = _Flight(self._next_id, snapshot)
+            self._next_id += 1
+            self._flights[key] = flight
+            self._by_id[flight.id] = (key, flight)
+            return flight.id, True
+
+    def begin(self, flight_id):
+        """🛫 Debounce bitti: en taze görüntüyü döndür, yeni görüntü kabul etme"""
+        with self._lock:
+            flight = self._by_id[flight_id][1]
+            flight.state = 'running'
+            self._executed += 1
+            return flight.snapshot
+
+    def finish(self, flight_id, result):
+        with self._lock:
+            key, flight = self._by_id[flight_id]
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.state = 'done'
+            flight.result = result
+            flight.finished_at = time.time()
+        flight.done.set()
+
+    def wait(self, flight_id, timeout=DEFAULT_TIMEOUT):
+        """⏳ Lider bitene kadar bekle ve sonucunu döndür (timeout'ta None)"""
+        with self._lock:
+            entry = self._by_id.get(flight_id)
+        if entry is None:
+            return None
+        flight = entry[1]
+        if not flight.done.wait(timeout):
+            return None
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            return {'executed': self._executed, 'coalesced': self._coalesced, 'in_flight': len(self._flights)}
+
+
+class SqliteFlights:
+    """💽 Aynı makinedeki süreçler arası paylaşılan uçuş tablosu"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, stale_after=DEFAULT_TIMEOUT):
+        self.path = path
+        self.stale_after = stale_after
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def join(self, key, snapshot):
+        """✈️ Çalışan uçuşa katıl ya da yenisini başlat ((id, lider mi))"""
+
+        now = time.time()
+        encoded = json.dumps(snapshot, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute("SELECT id, state, started_at FROM flights WHERE key = ? AND state != 'done' "
+                                         "ORDER BY id DESC LIMIT 1", (key,)).fetchone()
+                if row and row[2] >= now - self.stale_after:
+                    if row[1] == 'debouncing':
+                        self._conn.execute('UPDATE flights SET followers = followers + 1, snapshot = ? WHERE id = ?',
+                                           (encoded, row[0]))
+                    else:
+                        self._conn.execute('UPDATE flights SET followers = followers + 1 WHERE id = ?', (row[0],))
+                    self._conn.execute('COMMIT')
+                    return row[0], False
+
+                # Çökmüş liderden kalan bayat uçuşlar kapatılır, eski kayıtlar temizlenir
+                self._conn.execute("UPDATE flights SET state = 'done', finished_at = ? "
+                                   "WHERE key = ? AND state != 'done'", (now, key))
+                self._conn.execute("DELETE FROM flights WHERE state = 'done' AND finished_at < ?",
+                                   (now - RETENTION_SECONDS,))
+                cursor = self._conn.execute('INSERT INTO flights (key, snapshot, started_at) VALUES (?, ?, ?)',
+                                            (key, encoded, now))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return cursor.lastrowid, True
+
+    def begin(self, flight_id):
+        """🛫 Debounce bitti: en taze görüntüyü döndür, yeni görüntü kabul etme"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute("UPDATE flights SET state = 'running' WHERE id = ?", (flight_id,))
+            snapshot = self._conn.execute('SELECT snapshot FROM flights WHERE id = ?', (flight_id,)).fetchone()[0]
+            self._conn.execute('COMMIT')
+        return json.loads(snapshot)
+
+    def finish(self, flight_id, result):
+        encoded = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute("UPDATE flights SET state = 'done', result = ?, finished_at = ? WHERE id = ?",
+                               (encoded, time.time(), flight_id))
+
+    def wait(self, flight_id, timeout=DEFAULT_TIMEOUT):
+        """⏳ Lider bitene kadar yokla ve sonucunu döndür (timeout'ta None)"""
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                row = self._conn.execute('SELECT state, result FROM flights WHERE id = ?', (flight_id,)).fetchone()
+            if row is None:
+                return None
+            if row[0] == 'done':
+                return json.loads(row[1]) if row[1] else None
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def stats(self):
+        with self._lock:
+            executed, coalesced = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(followers), 0) FROM flights WHERE state != 'debouncing'").fetchone()
+            in_flight = self._conn.execute("SELECT COUNT(*) FROM flights WHERE state != 'done'").fetchone()[0]
+        return {'executed': executed, 'coalesced': coalesced, 'in_flight': in_flight}
+
+
+class Coalescer:
+    """🔗 Aynı anahtarlı istekleri tek çalıştırmada birleştiren kapı"""
+
+    def __init__(self, flights=None, window=0.0, timeout=DEFAULT_TIMEOUT):
+        self.flights = flights if flights is not None else MemoryFlights()
+        self.window = window
+        self.timeout = timeout
+
+    def run(self, key, snapshot, fn):
+        """
+        🔗 Lider ise (debounce sonrası en taze görüntüyle) fn(snapshot) çalıştırır,
+        takipçi ise liderin sonucunu bekler. (sonuç, birleştirildi mi) döndürür.
+        """
+
+        flight_id, leader = self.flights.join(key, snapshot)
+        if not leader:
+            metrics.registry.inc('latu_coalesce_total', outcome='coalesced')
+            log(f"🔗 {key} için çalışan analize bağlanıldı (uçuş #{flight_id})", event='request_coalesced',
+                key=key, flight_id=flight_id)
+            result = self.flights.wait(flight_id, self.timeout)
+            if result is None:
+                log(f"⚠️ {key} uçuş #{flight_id} sonuç vermedi", event='coalesce_empty', level=logging.WARNING,
+                    key=key, flight_id=flight_id)
+            return result, True
+
+        if self.window > 0:
+            time.sleep(self.window)
+        fresh = self.flights.begin(flight_id)
+        metrics.registry.inc('latu_coalesce_total', outcome='executed')
+        if fresh != snapshot:
+            log(f"⏱️ {key}: debounce penceresinde daha taze görüntü geldi", event='request_debounced', key=key,
+                flight_id=flight_id)
+
+        result = None
+        try:
+            result = fn(fresh)
+        finally:
+            self.flights.finish(flight_id, result)
+        return result, False
+
+    def stats(self):
+        """📊 Çalıştırılan / birleştirilen istek sayıları"""
+        return self.flights.stats()
+
+
+def coalescer_from_env(kind=None, window=None, one_shot=False):
+    """🔗 LATU_COALESCE (memory / sqlite / off) ve LATU_COALESCE_WINDOW ile Coalescer (one_shot: tek istekli CLI)"""
+
+    kind = (kind or os.environ.get('LATU_COALESCE', '')).lower()
+    if not kind or kind == 'off':
+        return None
+    if one_shot and kind not in ONE_SHOT_KINDS:
+        log(f"⚠️ LATU_COALESCE={kind} tek istekli süreçte birleştirme yapamaz, kapalı (sqlite kullanın)",
+            event='coalesce_unsupported', level=logging.WARNING, kind=kind)
+        return None
+
+    if window is None:
+        window = float(os.environ.get('LATU_COALESCE_WINDOW', 0))
+    timeout = float(os.environ.get('LATU_COALESCE_TIMEOUT', DEFAULT_TIMEOUT))
+
+    if kind == 'memory':
+        flights = MemoryFlights()
+    elif kind == 'sqlite':
+        flights = SqliteFlights(os.environ.get('LATU_COALESCE_PATH', DEFAULT_SQLITE_PATH), stale_after=timeout)
+    else:
+        raise ValueError(f"Bilinmeyen coalesce türü: {kind}")
+
+    return Coalescer(flights, window, timeout)
+
+
+def main():
+    """📊 SQLite uçuş tablosu istatistikleri"""
+
+    parser = argparse.ArgumentParser(description='LATU İstek Birleştirme İstatistikleri')
+    parser.add_argument('--path', default=os.environ.get('LATU_COALESCE_PATH', DEFAULT_SQLITE_PATH),
+                        help='Uçuş tablosu SQLite dosyası')
+
+    args = parser.parse_args()
+    stats = SqliteFlights(args.path).stats()
+    print(f"🔗 Çalıştırılan: {stats['executed']}, birleştirilen: {stats['coalesced']}, "
+          f"çalışan: {stats['in_flight']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧾 Yapılandırılmış Karar Kayıtları
+LATU Trading System - Decision Schema Pipeline
+
+Aşama çıktılarındaki karar alanlarını (aksiyon, tetik, stop, hedef,
+pozisyon %, olasılık, kritik seviyeler) tipli kayıtlara çıkarır. Bir
+sonraki aşamaya serbest metnin tamamı yerine sadece bu kompakt kayıt
+aktarılır; böylece Claude ve final prompt'ları upstream çıktı kadar
+büyümez. Model JSON döndürdüyse JSON, aksi halde zorunlu markdown
+formatı ayrıştırılır.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+ACTIONS = ('AL', 'SAT', 'BEKLE', 'ÇIKIŞ')
+
+_NUMBER = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+_ACTION_WORD = re.compile(r'(?<![\wÇĞİÖŞÜçğıöşü])(AL|SAT|BEKLE|ÇIKIŞ)(?![\wÇĞİÖŞÜçğıöşü])')
+_TABLE_ROW = re.compile(r'^\|\s*[^|*]*\*\*(AL|SAT|BEKLE|ÇIKIŞ)\*\*\s*\|(.*)\|\s*$', re.M)
+
+
+def parse_number(text):
+    """🔢 '65,325.00', '$65325', '%0.5' gibi metinden ilk sayıyı al"""
+
+    if text is None:
+        return None
+    match = _NUMBER.search(str(text))
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(',', ''))
+    except ValueError:
+        return None
+
+def normalize_action(text):
+    """🎯 Serbest metinden AL / SAT / BEKLE / ÇIKIŞ çıkar"""
+
+    if not text:
+        return None
+    match = _ACTION_WORD.search(str(text).upper())
+    return match.group(1) if match else None
+
+def _field(text, label):
+    """📌 '**Etiket:** değer' veya '- Etiket: değer' satırının değeri"""
+
+    match = re.search(r'(?:\*\*)?' + label + r'(?:\*\*)?\s*:\s*(?:\*\*)?\s*([^\n]+)', text)
+    return match.group(1).strip().strip('*').strip() if match else None
+
+def _compact(values):
+    """📦 Boş alanları ve sembolü atıp tek satır JSON üret"""
+
+    def prune(value):
+        if isinstance(value, dict):
+            return {k: prune(v) for k, v in value.items() if v is not None and k != 'symbol'}
+        if isinstance(value, list):
+            return [prune(item) for item in value]
+        return value
+
+    return json.dumps(prune(values), ensure_ascii=False, separators=(',', ':'))
+
+def _extract_json(text):
+    """🧩 Metin (veya kod bloğu) JSON ise sözlük olarak döndür"""
+
+    stripped = text.strip()
+    block = re.search(r'```(?:json)?\s*(\{.*\})\s*```', stripped, re.S)
+    candidate = block.group(1) if block else stripped
+    if not candidate.startswith('{'):
+        return None
+    try:
+        data = json.loads(candidate)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@dataclass
+class ActionRow:
+    """📋 Karar tablosunun tek satırı"""
+
+    __slots__ = ('action', 'trigger', 'stop', 'target', 'position_pct', 'probability_pct')
+
+    action: str
+    trigger: Optional[float]
+    stop: Optional[float]
+    target: Optional[float]
+    position_pct: Optional[float]
+    probability_pct: Optional[float]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass
+class GPTDecision:
+    """🚀 GPT karar tablosu + kritik seviyeler"""
+
+    __slots__ = ('symbol', 'primary_action', 'best', 'actions', 'resistance', 'support', 'invalidation', 'last_price',
+                 'horizon')
+
+    symbol: str
+    primary_action: Optional[str]
+    best: Optional[str]
+    actions: List[ActionRow]
+    resistance: Optional[float]
+    support: Optional[float]
+    invalidation: Optional[float]
+    last_price: Optional[float]
+    horizon: Optional[str]
+
+    def action(self, name):
+        """📋 İsimle tablo satırı (yoksa None)"""
+        return next((row for row in self.actions if row.action == name), None)
+
+    def is_complete(self):
+        return bool(self.actions) and self.primary_action is not None
+
+    def to_dict(self):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values['actions'] = [row.to_dict() for row in self.actions]
+        return values
+
+    def to_prompt(self):
+        """📦 Sonraki aşamaya aktarılacak kompakt JSON"""
+        return _compact(self.to_dict())
+
+
+@dataclass
+class ClaudeDecision:
+    """🤖 Claude kararı ve risk parametreleri"""
+
+    __slots__ = ('symbol', 'decision', 'action', 'conditional', 'entry', 'stop', 'support', 'resistance',
+                 'rr_ratio', 'confidence_pct', 'position_pct', 'risk_level')
+
+    symbol: str
+    decision: Optional[str]
+    action: Optional[str]
+    conditional: bool
+    entry: Optional[float]
+    stop: Optional[float]
+    support: Optional[float]
+    resistance: Optional[float]
+    rr_ratio: Optional[float]
+    confidence_pct: Optional[float]
+    position_pct: Optional[float]
+    risk_level: Optional[str]
+
+    def is_complete(self):
+        return self.action is not None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_prompt(self):
+        """📦 Sonraki aşamaya aktarılacak kompakt JSON"""
+        return _compact(self.to_dict())
+
+
+@dataclass
+class FinalDecision:
+    """🏆 Final karar bloğu"""
+
+    __slots__ = ('symbol', 'action', 'confidence_pct', 'position_pct', 'entry', 'stop', 'take_profit', 'quick_action')
+
+    symbol: str
+    action: Optional[str]
+    confidence_pct: Optional[float]
+    position_pct: Optional[float]
+    entry: Optional[float]
+    stop: Optional[float]
+    take_profit: Optional[float]
+    quick_action: Optional[str]
+
+    def is_complete(self):
+        return self.action is not None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _rr_ratio(text):
+    """⚖️ '1:2' → 2.0 (risk başına ödül)"""
+
+    if not text:
+        return None
+    match = re.search(r'(\d+(?:\.\d+)?)\s*:\s*(\d+(?:\.\d+)?)', text)
+    if match and float(match.group(1)):
+        return float(match.group(2)) / float(match.group(1))
+    return parse_number(text)
+
+def parse_gpt(symbol, text):
+    """🚀 GPT çıktısını GPTDecision'a çevir"""
+
+    data = _extract_json(text)
+    if data is not None:
+        rows = [
+            ActionRow(normalize_action(row.get('action') or row.get('aksiyon')),
+                      parse_number(row.get('trigger') or row.get('tetik')),
+                      parse_number(row.get('stop') or row.get('stop_loss')),
+                      parse_number(row.get('target') or row.get('hedef')),
+                      parse_number(row.get('position_pct') or row.get('pozisyon')),
+                      parse_number(row.get('probability_pct') or row.get('olasilik')))
+            for row in data.get('actions') or data.get('aksiyonlar') or []
+        ]
+        best = data.get('best') or data.get('en_iyi')
+        primary = normalize_action(data.get('primary_action') or best)
+        return GPTDecision(symbol, primary or _most_probable(rows), best, [row for row in rows if row.action],
+                           parse_number(data.get('resistance')), parse_number(data.get('support')),
+                           parse_number(data.get('invalidation')), parse_number(data.get('last_price')),
+                           data.get('horizon'))
+
+    rows = []
+    for action, cells in _TABLE_ROW.findall(text):
+        values = [cell.strip() for cell in cells.split('|')]
+        values += [''] * (5 - len(values))
+        rows.append(ActionRow(action, parse_number(values[0]), parse_number(values[1]), parse_number(values[2]),
+                              parse_number(values[3]), parse_number(values[4])))
+
+    best = _field(text, r'EN İYİ')
+    primary = normalize_action(best) or _most_probable(rows)
+
+    return GPTDecision(symbol, primary, best, rows,
+                       parse_number(_field(text, r'Üst Direnç')),
+                       parse_number(_field(text, r'Alt Destek')),
+                       parse_number(_field(text, r'Geçersizlik')),
+                       parse_number(_field(text, r'Son Fiyat')),
+                       _field(text, r'Zaman'))
+
+def _most_probable(rows):
+    candidates = [row for row in rows if row.probability_pct is not None and row.action != 'ÇIKIŞ']
+    if not candidates:
+        return None
+    return max(candidates, key=lambda row: row.probability_pct).action
+
+def parse_claude(symbol, text):
+    """🤖 Claude çıktısını ClaudeDecision'a çevir"""
+
+    data = _extract_json(text)
+    get = (lambda key, label: data.get(key)) if data is not None else (lambda key, label: _field(text, label))
+
+    decision = get('decision', r'Claude Kararı')
+    return ClaudeDecision(
+        symbol,
+        decision,
+        normalize_action(decision),
+        bool(decision and 'KOŞULLU' in decision.upper()),
+        parse_number(get('entry', r'Entry')),
+        parse_number(get('stop', r'Stop Loss')),
+        parse_number(get('support', r'Destek')),
+        parse_number(get('resistance', r'Direnç')),
+        _rr_ratio(str(get('rr_ratio', r'R/R Oranı') or '')),
+        parse_number(get('confidence_pct', r'Güvenilirlik Oranı')),
+        parse_number(get('position_pct', r'Position Size Önerisi')),
+        (get('risk_level', r'Risk Seviyesi') or None)
+    )
+
+def parse_final(symbol, text):
+    """🏆 Final çıktısını FinalDecision'a çevir"""
+
+    data = _extract_json(text)
+    get = (lambda key, label: data.get(key)) if data is not None else (lambda key, label: _field(text, label))
+
+    return FinalDecision(
+        symbol,
+        normalize_action(get('action', r'Önerilen Strateji')),
+        parse_number(get('confidence_pct', r'Güvenilirlik')),
+        parse_number(get('position_pct', r'Pozisyon Büyüklüğü')),
+        parse_number(get('entry', r'\*\*Entry')),
+        parse_number(get('stop', r'\*\*Stop Loss')),
+        parse_number(get('take_profit', r'Take Profit')),
+        get('quick_action', r'HIZLI AKSİYON')
+    )
+
+PARSERS = {
+    'gpt': parse_gpt,
+    'claude': parse_claude,
+    'final': parse_final
+}
+
+def parse_record(stage, symbol, text):
+    """🧾 Aşamaya göre uygun kaydı üret"""
+    return PARSERS[stage](symbol, text)
+
+def compact_for_prompt(stage, symbol, text):
+    """📦 Tam kayıt çıkarılabiliyorsa kompakt JSON, yoksa ham metin"""
+
+    record = parse_record(stage, symbol, text)
+    if record.is_complete():
+        return record.to_prompt()
+    return text
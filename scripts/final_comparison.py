@@ -7,206 +7,212 @@ LATU Trading System - Final Comparison Pipeline
 
 import os
 import argparse
-import json
-import requests
+import time
+import logging
 from datetime import datetime
-import openai
+from result_store import get_store, live_result_path
+from llm_backend import get_backend
+from transport import deliver, idempotency_key
+from stream_relay import StreamRelay
+from generation import max_tokens_for, finish_sections
+from decision_schema import compact_for_prompt
+from final_engine import run_engine, ENGINE_MODEL
+from handoff import load_ref, HandoffError
+from checkpoint import open_checkpoint, resume_checkpoint, run_stage, CheckpointNotFound
+from metrics import instrument, instrument_stage, phase, log, run_context
+from prompts import FINAL_SYSTEM_PROMPT, final_prompt, count_tokens
+
+def narrative_enabled(narrative=None):
+    """📝 LLM anlatı modu açık mı (parametre yoksa LATU_FINAL_NARRATIVE)"""
+
+    if narrative is not None:
+        return narrative
+    return os.environ.get('LATU_FINAL_NARRATIVE', '').lower() in ('1', 'true', 'yes', 'on')
+
+def engine_comparison(symbol, gpt_result, claude_result, relay=None):
+    """⚖️ Ağ çağrısı olmadan yerel motorla final karar (kayıt çıkarılamazsa None)"""
+
+    started = time.perf_counter()
+    output = run_engine(symbol, gpt_result, claude_result)
+    if output is None:
+        return None
+
+    comparison, final_result = output
+    if relay is not None:
+        relay.consume([final_result], live_result_path('final', symbol))
+    latency = time.perf_counter() - started
+
+    with phase('store'):
+        record_id = get_store().record(symbol, 'final', ENGINE_MODEL, final_result, latency=latency)
+    log(f"✅ Final karar yerel motorla hesaplandı: #{record_id} ({latency * 1000:.2f}ms, {comparison.action})",
+        event='stage_completed', record_id=record_id, latency=round(latency, 6), model=ENGINE_MODEL,
+        action=comparison.action)
+    return final_result
 
-def final_comparison_analysis(symbol, gpt_result, claude_result):
+@instrument_stage('final')
+def final_comparison_analysis(symbol, gpt_result, claude_result, backend=None, relay=None, narrative=None):
     """📋 GPT-Claude karşılaştırma ve final karar"""
     
-    # OpenAI API ayarları
-    openai.api_key = os.environ['OPENAI_API_KEY']
+    # Varsayılan: yerel deterministik motor; LLM sadece anlatı için opt-in
+    if not narrative_enabled(narrative):
+        final_result = engine_comparison(symbol, gpt_result, claude_result, relay)
+        if final_result:
+            return final_result
+        log("⚠️ Karar kayıtları çıkarılamadı, LLM karşılaştırmasına geçiliyor", event='engine_fallback',
+            level=logging.WARNING)
     
-    # Final karşılaştırma prompt
-    prompt = f"""
-Sen bir baş analist olarak GPT ve Claude'un {symbol} analizlerini karşılaştır ve final bir karar ver.
-
-🚀 GPT ANALİZİ:
-{gpt_result}
-
-🤖 CLAUDE ANALİZİ:
-{claude_result}
-
-Şu formatla bir karşılaştırma tablosu ve final karar hazırla:
-
-📊 **GPT-CLAUDE KARŞILAŞTIRMA TABLOSU - {symbol.upper()}**
-
-| **KRİTER** | **GPT ANALİZİ** | **CLAUDE ANALİZİ** | **FARK/YORUM** |
-|------------|-----------------|-------------------|----------------|
-| **Karar** | [GPT kararı] | [Claude kararı] | [Hangi daha iyi] |
-| **Risk Yaklaşımı** | [GPT risk] | [Claude risk] | [Karşılaştırma] |
-| **Entry Seviyesi** | [GPT entry] | [Claude entry] | [Fark analizi] |
-| **Stop Loss** | [GPT stop] | [Claude stop] | [Hangisi daha güvenli] |
-| **Hedef Seviye** | [GPT hedef] | [Claude hedef] | [Gerçekçilik] |
-| **Zaman Horizonu** | [GPT zaman] | [Claude zaman] | [Hangisi daha uygun] |
-| **Güvenilirlik** | [GPT %] | [Claude %] | [Karşılaştırma] |
-
-**🧠 ANALİZ FARKLILIKARI:**
-- **Hız vs Detay**: [GPT hızlı, Claude detaylı karşılaştırması]
-- **Risk Yönetimi**: [Hangisi daha konservatif]
-- **Teknik Analiz**: [Derinlik karşılaştırması]
-- **Pratiklik**: [Hangisi daha uygulanabilir]
-
-**⚖️ GÜÇLÜ VE ZAYIF YANLAR:**
-
-**GPT'nin Güçlü Yanları:**
-- [Hızlı karar verme]
-- [Net pozisyon alma]
-- [Momentum yakalama]
-
-**GPT'nin Zayıf Yanları:**
-- [Risk yönetimi eksikliği]
-- [Detay eksikliği]
-
-**Claude'un Güçlü Yanları:**
-- [Detaylı teknik analiz]
-- [Risk yönetimi]
-- [Çoklu senaryo]
-
-**Claude'un Zayıf Yanları:**
-- [Aşırı temkinli]
-- [Karmaşık strateji]
-
-**🏆 FİNAL KARAR:**
-
-**Önerilen Strateji:** [AL/SAT/BEKLE]
-**Güvenilirlik:** [%X]
-**Pozisyon Büyüklüğü:** [%X]
-**Entry:** $[X]
-**Stop Loss:** $[X]  
-**Take Profit:** $[X]
-
-**📋 UYGULAMA PLANI:**
-1. [Adım 1]
-2. [Adım 2]
-3. [Adım 3]
-
-**⚡ HIZLI AKSİYON:**
-[Tek cümlelik actionable öneri]
-
-**💡 SONUÇ:**
-[GPT ve Claude'un en iyi yanlarını birleştiren final değerlendirme]
+    # LLM backend (canlı API veya mock)
+    backend = instrument(backend or get_backend())
+    
+    # Aşama çıktılarının tamamı yerine yapılandırılmış karar kayıtları aktarılır
+    gpt_record = compact_for_prompt('gpt', symbol, gpt_result)
+    claude_record = compact_for_prompt('claude', symbol, claude_result)
 
-Bu karşılaştırmada:
-1. Her iki analizin güçlü yanlarını değerlendir
-2. Risk-return dengesini optimize et
-3. Pratik ve uygulanabilir bir strateji sun
-4. Net bir karar ver, belirsizlik bırakma
-    """
+    # Statik format system prompt'ta (cache'lenebilir önek); kayıtlar bütçeye sığdırılır
+    prompt = final_prompt(symbol, gpt_record, claude_record, "gpt-4")
     
     try:
-        print(f"📋 Final karşılaştırma analizi başlatılıyor: {symbol}")
+        log(f"📋 Final karşılaştırma analizi başlatılıyor: {symbol}", event='stage_started',
+            prompt_tokens=count_tokens(prompt, "gpt-4"))
+        
+        # Geçmiş çıktı uzunluklarından öğrenilen bütçe
+        max_tokens = max_tokens_for('final')
         
-        # OpenAI API çağrısı
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Sen bir baş trading analistisin. Farklı analiz kaynaklarını karşılaştırıp en optimal stratejiyi belirlersin. Tablolar, karşılaştırmalar ve net kararlar verirsin."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            max_tokens=1200,
+        # OpenAI API çağrısı (backend üzerinden; relay varsa streaming)
+        started = time.perf_counter()
+        call = backend.stream if relay is not None else backend.complete
+        response_text = call(
+            'final', 'openai', "gpt-4",
+            FINAL_SYSTEM_PROMPT,
+            prompt,
+            max_tokens=max_tokens,
             temperature=0.8
         )
         
-        final_result = response.choices[0].message.content.strip()
+        if relay is not None:
+            # Parçalar geldikçe dosyaya ve dashboard'a aktarılır
+            response_text = relay.consume(response_text, live_result_path('final', symbol))
         
-        # Sonucu results klasörüne kaydet
-        os.makedirs('results', exist_ok=True)
-        result_file = f'results/final_{symbol}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
+        # Kesilmiş / eksik yanıtta sadece eksik bölümler istenir
+        response_text = finish_sections(backend, 'final', 'openai', "gpt-4",
+                                        FINAL_SYSTEM_PROMPT, prompt, max_tokens, 0.8,
+                                        response_text, relay)
         
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(final_result)
+        latency = time.perf_counter() - started
+        model = getattr(response_text, 'model', None) or "gpt-4"
+        final_result = response_text.strip()
         
-        # Tüm analizi birleştir
-        complete_analysis = f"""
-=== LATU TRADING SYSTEM - COMPLETE ANALYSIS ===
-Sembol: {symbol}
-Tarih: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
-
-{gpt_result}
-
----
-
-{claude_result}
-
----
-
-{final_result}
-
-=== PIPELINE TAMAMLANDI ===
-        """
+        # Sonucu result store'a kaydet (yönlendirici fallback modeli seçmiş olabilir)
+        with phase('store'):
+            record_id = get_store().record(symbol, 'final', model, final_result, latency=latency,
+                                           usage=getattr(response_text, 'usage', None))
         
-        complete_file = f'results/complete_{symbol}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
-        with open(complete_file, 'w', encoding='utf-8') as f:
-            f.write(complete_analysis)
-        
-        print(f"✅ Final analiz tamamlandı: {result_file}")
-        print(f"✅ Komplet analiz kaydedildi: {complete_file}")
+        log(f"✅ Final analiz tamamlandı ve kaydedildi: #{record_id} ({latency:.2f}s)", event='stage_completed',
+            record_id=record_id, latency=round(latency, 6))
         
         return final_result
         
     except Exception as e:
-        print(f"❌ Final analiz hatası: {e}")
+        log(f"❌ Final analiz hatası: {e}", event='stage_failed', level=logging.ERROR, error=str(e))
         return None
 
 def send_final_result_to_dashboard(symbol, final_result, webhook_url):
     """📤 Dashboard'a final sonuç gönder"""
     
-    try:
-        payload = {
-            'symbol': symbol,
-            'stage': 'final-completed',
-            'result': final_result,
-            'timestamp': datetime.now().isoformat(),
-            'pipeline_status': 'completed'
-        }
-        
-        response = requests.post(webhook_url, json=payload, timeout=15)
-        
-        if response.status_code == 200:
-            print("✅ Dashboard'a final sonuç gönderildi")
-        else:
-            print(f"⚠️ Dashboard gönderim hatası: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Dashboard gönderim hatası: {e}")
+    timestamp = datetime.now().isoformat()
+    payload = {
+        'symbol': symbol,
+        'stage': 'final-completed',
+        'result': final_result,
+        'timestamp': timestamp,
+        'pipeline_status': 'completed'
+    }
+    
+    ok, status = deliver(webhook_url, payload, key=idempotency_key(symbol, 'final-completed', timestamp),
+                         timeout=(3.05, 15))
+    
+    if ok:
+        log("✅ Dashboard'a final sonuç gönderildi", event='webhook_sent', stage='final-completed')
+    else:
+        log(f"⚠️ Dashboard gönderim hatası: {status}", event='webhook_failed', level=logging.WARNING,
+            stage='final-completed', status=status)
 
 def main():
     """📋 Ana fonksiyon"""
     
     parser = argparse.ArgumentParser(description='GPT-Claude Final Karşılaştırma Script')
-    parser.add_argument('--symbol', required=True, help='Trading sembolü')
-    parser.add_argument('--gpt-result', required=True, help='GPT analiz sonucu')
-    parser.add_argument('--claude-result', required=True, help='Claude analiz sonucu')
+    parser.add_argument('--symbol', help='Trading sembolü')
+    parser.add_argument('--gpt-result', help='GPT analiz sonucu')
+    parser.add_argument('--claude-result', help='Claude analiz sonucu')
+    parser.add_argument('--gpt-result-ref', help='GPT sonucunun handoff referansı (--gpt-result yoksa okunur)')
+    parser.add_argument('--claude-result-ref',
+                        help='Claude sonucunun handoff referansı (--claude-result yoksa okunur)')
     parser.add_argument('--webhook-url', required=True, help='Dashboard webhook URL')
+    parser.add_argument('--run-id', help='Zincirin run kimliği (dispatch payload\'undan; checkpoint\'i bağlar)')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help='GPT ve Claude çıktılarını checkpoint\'ten al (LLM aşamaları yeniden çağrılmaz)')
+    parser.add_argument('--stream', action='store_true', help='Çıktıyı streaming ile dashboard ve dosyaya aktar')
+    parser.add_argument('--narrative', action='store_true', default=None,
+                        help='Yerel motor yerine LLM anlatılı karşılaştırma (varsayılan: LATU_FINAL_NARRATIVE)')
     
     args = parser.parse_args()
     
-    print("📋 LATU Final Comparison Pipeline Başlatıldı")
-    print(f"📊 Analiz edilen sembol: {args.symbol}")
-    print(f"📄 GPT sonucu: {len(args.gpt_result)} karakter")
-    print(f"📄 Claude sonucu: {len(args.claude_result)} karakter")
+    checkpoint = None
+    if args.resume:
+        try:
+            checkpoint = resume_checkpoint(args.resume)
+        except CheckpointNotFound as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+        args.symbol = args.symbol or checkpoint.symbol
+        args.gpt_result = args.gpt_result or checkpoint.output('gpt')
+        args.claude_result = args.claude_result or checkpoint.output('claude')
+    
+    # Referanslar sadece metin başka yoldan gelmediyse okunur
+    try:
+        if not args.gpt_result and args.gpt_result_ref:
+            args.gpt_result = load_ref(args.gpt_result_ref)
+        if not args.claude_result and args.claude_result_ref:
+            args.claude_result = load_ref(args.claude_result_ref)
+    except HandoffError as e:
+        log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+        exit(1)
+    
+    if not (args.symbol and args.gpt_result and args.claude_result):
+        parser.error('--symbol, --gpt-result / --gpt-result-ref ve --claude-result / --claude-result-ref gerekli '
+                     '(ya da GPT ve Claude çıktıları olan bir --resume checkpoint\'i)')
+    
+    log(f"📋 LATU Final Comparison Pipeline Başlatıldı: {args.symbol} (GPT sonucu {len(args.gpt_result)}, "
+        f"Claude sonucu {len(args.claude_result)} karakter)", event='run_started', stage='final', symbol=args.symbol,
+        gpt_chars=len(args.gpt_result), claude_chars=len(args.claude_result))
+    
+    with run_context(args.symbol, args.resume or args.run_id or None) as run_id:
+        if checkpoint is None:
+            checkpoint = open_checkpoint(run_id, args.symbol)
+        if checkpoint is not None:
+            for stage, output in (('gpt', args.gpt_result), ('claude', args.claude_result)):
+                if not checkpoint.output(stage):
+                    checkpoint.complete(stage, output)
+        
+        # Final karşılaştırma analizini yap
+        relay = StreamRelay(args.symbol, 'final', args.webhook_url) if args.stream else None
+        final_result = run_stage(checkpoint, 'final', final_comparison_analysis, args.symbol, args.gpt_result,
+                                 args.claude_result, relay=relay, narrative=args.narrative)
+        if relay is not None:
+            relay.close()
     
-    # Final karşılaştırma analizini yap
-    final_result = final_comparison_analysis(args.symbol, args.gpt_result, args.claude_result)
+    if checkpoint is not None:
+        checkpoint.finish(None if final_result else 'final aşaması başarısız')
     
     if final_result:
         # Dashboard'a final sonucu gönder
         send_final_result_to_dashboard(args.symbol, final_result, args.webhook_url)
         
-        print("🎯 PIPELINE BAŞARIYLA TAMAMLANDI!")
-        print("📊 Tüm analizler Dashboard'a gönderildi")
-        print("✅ GPT → Claude → Final karşılaştırması hazır")
+        log("🎯 PIPELINE BAŞARIYLA TAMAMLANDI! GPT → Claude → Final karşılaştırması Dashboard'a gönderildi",
+            event='run_completed', stage='final')
         
     else:
-        print("❌ Final analiz başarısız!")
+        log("❌ Final analiz başarısız!", event='run_failed', level=logging.ERROR, stage='final')
         exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚖️ Yerel Final Karşılaştırma Motoru
+LATU Trading System - Final Engine Pipeline
+
+GPT ve Claude karar kayıtlarını ağ çağrısı yapmadan karşılaştırır:
+uyum, stop mesafesi, R/R ve güvenilirlik ağırlıklı harman karar
+hesaplanır; LLM final aşamasıyla aynı Markdown tablosu ve "FİNAL KARAR"
+bloğu üretilir. LLM karşılaştırması sadece anlatı metni için opt-in.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+from decision_schema import parse_gpt, parse_claude
+
+# Aksiyon yönleri (harman skor için)
+DIRECTIONS = {'AL': 1, 'SAT': -1, 'BEKLE': 0, 'ÇIKIŞ': 0}
+
+# |harman skor| bu eşiğin altındaysa yön verilmez (BEKLE)
+DECISION_THRESHOLD = 0.4
+
+# Güvenilirlik yoksa kullanılan ağırlık (%)
+DEFAULT_CONFIDENCE = 50.0
+
+ENGINE_MODEL = 'final-engine'
+
+
+@dataclass
+class FinalComparison:
+    """🏆 Motorun hesapladığı final karar"""
+
+    __slots__ = ('symbol', 'action', 'agreement', 'blended_score', 'confidence_pct', 'position_pct',
+                 'entry', 'stop', 'take_profit', 'stop_distance_pct', 'rr_ratio')
+
+    symbol: str
+    action: str
+    agreement: bool
+    blended_score: float
+    confidence_pct: float
+    position_pct: Optional[float]
+    entry: Optional[float]
+    stop: Optional[float]
+    take_profit: Optional[float]
+    stop_distance_pct: Optional[float]
+    rr_ratio: Optional[float]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _pick(values, direction, conservative):
+    """🛡️ Yöne göre en temkinli değeri seç (AL: yüksek stop / düşük hedef)"""
+
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    if direction > 0:
+        return max(values) if conservative == 'stop' else min(values)
+    return min(values) if conservative == 'stop' else max(values)
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+def compare(gpt, claude):
+    """⚖️ GPTDecision + ClaudeDecision → FinalComparison"""
+
+    gpt_action = gpt.primary_action or 'BEKLE'
+    claude_action = claude.action or 'BEKLE'
+    gpt_row = gpt.action(gpt_action)
+
+    gpt_confidence = (gpt_row.probability_pct if gpt_row else None) or DEFAULT_CONFIDENCE
+    claude_confidence = claude.confidence_pct or DEFAULT_CONFIDENCE
+
+    # Güvenilirlik ağırlıklı yön skoru: +1 tam AL, -1 tam SAT
+    blended = ((DIRECTIONS[gpt_action] * gpt_confidence + DIRECTIONS[claude_action] * claude_confidence)
+               / (gpt_confidence + claude_confidence))
+    direction = 0 if abs(blended) < DECISION_THRESHOLD else (1 if blended > 0 else -1)
+    action = {1: 'AL', -1: 'SAT', 0: 'BEKLE'}[direction]
+    agreement = gpt_action == claude_action
+
+    mean_confidence = (gpt_confidence + claude_confidence) / 2
+    confidence = mean_confidence * (abs(blended) if direction else 1 - abs(blended))
+
+    entry = stop = take_profit = position = stop_distance = rr_ratio = None
+    if direction:
+        # Sadece karar yönüyle uyumlu kaynakların seviyeleri kullanılır
+        gpt_side = DIRECTIONS[gpt_action] == direction and gpt_row is not None
+        claude_side = DIRECTIONS[claude_action] == direction
+        claude_target = claude.resistance if direction > 0 else claude.support
+
+        entry = _mean([gpt_row.trigger if gpt_side else None, claude.entry if claude_side else None])
+        stop = _pick([gpt_row.stop if gpt_side else None, claude.stop if claude_side else None], direction, 'stop')
+        take_profit = _pick([gpt_row.target if gpt_side else None, claude_target if claude_side else None],
+                            direction, 'target')
+        positions = [gpt_row.position_pct if gpt_side else None, claude.position_pct if claude_side else None]
+        position = min([value for value in positions if value is not None], default=None)
+
+        if entry and stop is not None:
+            risk = abs(entry - stop)
+            stop_distance = risk / entry * 100
+            if take_profit is not None and risk:
+                rr_ratio = abs(take_profit - entry) / risk
+
+    return FinalComparison(gpt.symbol or claude.symbol, action, agreement, round(blended, 3), round(confidence, 1),
+                           position, entry, stop, take_profit, stop_distance, rr_ratio)
+
+
+def _fmt(value, prefix=''):
+    return f"{prefix}{value:.2f}" if value is not None else '-'
+
+def _pct(value):
+    return f"%{value:g}" if value is not None else '-'
+
+def _diff(gpt_value, claude_value):
+    """📏 İki seviye arasındaki yüzde fark"""
+
+    if gpt_value is None or claude_value is None:
+        return 'Karşılaştırılamaz'
+    if not gpt_value:
+        return '-'
+    delta = (claude_value - gpt_value) / gpt_value * 100
+    return 'Aynı' if abs(delta) < 0.01 else f"%{delta:+.2f}"
+
+def _safer_stop(gpt_stop, claude_stop, entry):
+    if gpt_stop is None or claude_stop is None or entry is None:
+        return '-'
+    if abs(gpt_stop - claude_stop) < 1e-9:
+        return 'Aynı'
+    return 'GPT daha sıkı' if abs(entry - gpt_stop) < abs(entry - claude_stop) else 'Claude daha sıkı'
+
+def render(comparison, gpt, claude):
+    """📋 LLM final aşamasıyla aynı tablo ve FİNAL KARAR bloğu"""
+
+    symbol = comparison.symbol.upper()
+    gpt_row = gpt.action(gpt.primary_action) if gpt.primary_action else None
+    gpt_entry = gpt_row.trigger if gpt_row else None
+    gpt_stop = gpt_row.stop if gpt_row else None
+    gpt_target = gpt_row.target if gpt_row else None
+    gpt_confidence = gpt_row.probability_pct if gpt_row else None
+    gpt_position = gpt_row.position_pct if gpt_row else None
+    claude_target = claude.resistance if claude.action != 'SAT' else claude.support
+    claude_decision = claude.decision or claude.action or '-'
+
+    if comparison.agreement:
+        decision_note = 'Uyumlu'
+    elif comparison.action == 'BEKLE':
+        decision_note = 'Çelişkili, yön yok'
+    else:
+        decision_note = f"Ağırlıklı skor {comparison.blended_score:+.2f}"
+
+    lines = [
+        f"📊 **GPT-CLAUDE KARŞILAŞTIRMA TABLOSU - {symbol}**",
+        "",
+        "| **KRİTER** | **GPT ANALİZİ** | **CLAUDE ANALİZİ** | **FARK/YORUM** |",
+        "|------------|-----------------|-------------------|----------------|",
+        f"| **Karar** | {gpt.primary_action or '-'} | {claude_decision} | {decision_note} |",
+        f"| **Risk Yaklaşımı** | Pozisyon {_pct(gpt_position)} | {claude.risk_level or '-'} "
+        f"(Pozisyon {_pct(claude.position_pct)}) | "
+        f"{'Claude daha temkinli' if claude.conditional else 'Benzer'} |",
+        f"| **Entry Seviyesi** | {_fmt(gpt_entry)} | {_fmt(claude.entry)} | {_diff(gpt_entry, claude.entry)} |",
+        f"| **Stop Loss** | {_fmt(gpt_stop)} | {_fmt(claude.stop)} | "
+        f"{_safer_stop(gpt_stop, claude.stop, comparison.entry)} |",
+        f"| **Hedef Seviye** | {_fmt(gpt_target)} | {_fmt(claude_target)} | {_diff(gpt_target, claude_target)} |",
+        f"| **Zaman Horizonu** | {gpt.horizon or '-'} | - | - |",
+        f"| **Güvenilirlik** | {_pct(gpt_confidence)} | {_pct(claude.confidence_pct)} | "
+        f"Harman {_pct(comparison.confidence_pct)} |",
+        "",
+        "**📐 RİSK METRİKLERİ:**",
+        f"- **Stop Mesafesi**: {_pct(round(comparison.stop_distance_pct, 2)) if comparison.stop_distance_pct is not None else '-'}",
+        f"- **R/R Oranı**: {f'1:{comparison.rr_ratio:.2f}' if comparison.rr_ratio is not None else '-'}",
+        f"- **Harman Skor**: {comparison.blended_score:+.2f} (GPT {gpt.primary_action or '-'} / Claude {claude.action or '-'})",
+        "",
+        "**🏆 FİNAL KARAR:**",
+        "",
+        f"**Önerilen Strateji:** {comparison.action}",
+        f"**Güvenilirlik:** {_pct(comparison.confidence_pct)}",
+        f"**Pozisyon Büyüklüğü:** {_pct(comparison.position_pct)}",
+        f"**Entry:** {_fmt(comparison.entry, '$')}",
+        f"**Stop Loss:** {_fmt(comparison.stop, '$')}",
+        f"**Take Profit:** {_fmt(comparison.take_profit, '$')}",
+        ""
+    ]
+
+    if comparison.action == 'BEKLE':
+        plan = ['Pozisyon açma', 'GPT ve Claude kararları uyumlanana kadar izle',
+                f"Destek {_fmt(gpt.support)} / direnç {_fmt(gpt.resistance)} kırılımını bekle"]
+        quick = f"{symbol} için net yön yok, BEKLE"
+    else:
+        plan = [f"{_fmt(comparison.entry)} seviyesinde {comparison.action} emri",
+                f"Stop {_fmt(comparison.stop)} seviyesine koy",
+                f"Kâr al {_fmt(comparison.take_profit)} seviyesinde"]
+        quick = f"{_fmt(comparison.entry)} seviyesinde {_pct(comparison.position_pct)} pozisyonla {comparison.action}"
+
+    lines.append("**📋 UYGULAMA PLANI:**")
+    lines.extend(f"{index}. {step}" for index, step in enumerate(plan, 1))
+    lines.extend([
+        "",
+        "**⚡ HIZLI AKSİYON:**",
+        quick,
+        "",
+        "**💡 SONUÇ:**",
+        ("GPT ve Claude aynı yönde; seviyeler temkinli tarafından birleştirildi"
+         if comparison.agreement else
+         "GPT ve Claude ayrıştı; karar güvenilirlik ağırlıklı harman skorla verildi")
+    ])
+    return '\n'.join(lines)
+
+def run_engine(symbol, gpt_result, claude_result):
+    """⚖️ Ham aşama metinlerinden (FinalComparison, markdown) üret; kayıt çıkarılamazsa None"""
+
+    gpt = parse_gpt(symbol, gpt_result)
+    claude = parse_claude(symbol, claude_result)
+    if not gpt.is_complete() or not claude.is_complete():
+        return None
+
+    comparison = compare(gpt, claude)
+    return comparison, render(comparison, gpt, claude)
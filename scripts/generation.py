@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+✂️ Uyarlanabilir Üretim Kontrolü
+LATU Trading System - Generation Pipeline
+
+Aşamalar sabit max_tokens (GPT 600, Claude 1500, final 1200) yerine
+result store'daki geçmiş çıktı uzunluklarından öğrenilen bütçeyle çağrılır:
+aşama başına son çıktıların p95'i + pay, 100 token'lık adımlara yuvarlanır
+(yanıt cache anahtarları sık değişmesin) ve taban / tavan arasında tutulur.
+Geçmiş yetersizse varsayılan bütçe kullanılır.
+
+Streaming çağrılarda akış izlenir; zorunlu formatın son bölümü ("ÖNCELİK
+SIRASI", "Claude Kararı" + notlar, "SONUÇ") tamamlanınca üretim kesilir ve
+modelin format sonrası ek metni için ödeme yapılmaz (LATU_EARLY_STOP:
+`stream` varsayılan, `all` tam yanıt çağrılarını da akışla yapar, `off`).
+Çıktı token sınırında kesildiyse ya da zorunlu bir bölüm eksikse tüm çağrı
+tekrarlanmaz: sadece eksik bölümler kısa bir devam çağrısıyla istenir ve
+yanıta eklenir.
+
+    python scripts/generation.py              # aşama başına öğrenilen bütçeler
+"""
+
+import argparse
+import math
+import os
+import re
+import threading
+import time
+from metrics import log, registry
+from prompts import PromptTemplate, count_tokens
+
+# Geçmiş yokken kullanılan bütçeler (eski sabitler: kayıtlı replay ve cache anahtarları geçerli kalır)
+DEFAULT_MAX_TOKENS = {'gpt': 600, 'claude': 1500, 'final': 1200}
+MIN_MAX_TOKENS = {'gpt': 400, 'claude': 700, 'final': 600}
+MAX_MAX_TOKENS = {'gpt': 1200, 'claude': 2000, 'final': 1600}
+
+BUDGET_PERCENTILE = 95
+BUDGET_HEADROOM = 1.25
+BUDGET_QUANTUM = 100
+MIN_SAMPLES = 20
+HISTORY_LIMIT = 200
+# Öğrenilen bütçe en fazla bu aralıkla yeniden hesaplanır
+REFRESH_SECONDS = 300
+
+# Çıktı bütçenin bu oranına ulaştıysa token sınırında kesilmiş sayılır
+TRUNCATION_RATIO = 0.95
+MIN_CONTINUATION_TOKENS = 200
+
+EARLY_STOP_OFF = 'off'
+EARLY_STOP_STREAM = 'stream'
+EARLY_STOP_ALL = 'all'
+
+# Aşama başına zorunlu bölümler (başlık kalıbıyla, format sırasıyla)
+REQUIRED_SECTIONS = {
+    'gpt': [
+        ('TRADING DECISION TABLE', re.compile(r'TRADING DECISION TABLE')),
+        ('KRİTİK SEVİYELER', re.compile(r'KRİTİK SEVİYELER')),
+        ('ACİL UYARILAR', re.compile(r'ACİL UYARILAR')),
+        ('ÖNCELİK SIRASI', re.compile(r'ÖNCELİK SIRASI'))
+    ],
+    'claude': [
+        ('Fiyat Seviyeleri', re.compile(r'\*\*Fiyat Seviyeleri:\*\*')),
+        ('Claude Risk Değerlendirmesi', re.compile(r'\*\*Claude Risk Değerlendirmesi:\*\*')),
+        ('Claude Kararı', re.compile(r'\*\*Claude Kararı:\*\*'))
+    ],
+    'final': [
+        ('KARŞILAŞTIRMA TABLOSU', re.compile(r'KARŞILAŞTIRMA TABLOSU')),
+        ('FİNAL KARAR', re.compile(r'FİNAL KARAR')),
+        ('SONUÇ', re.compile(r'SONUÇ:\*\*'))
+    ]
+}
+
+# Formatın son bölümü tamamlandı: sonrası modelin ek metnidir (tamamlanmış satır üzerinde)
+DONE_PATTERNS = {
+    'gpt': re.compile(r'ÖNCELİK SIRASI[^\n]*\n(?:[^\n]*\n)*?\s*3\.[^\n]*\S[^\n]*\n'),
+    'claude': re.compile(r'\*\*Claude Kararı:\*\*[^\n]*\S[^\n]*\n(?:[^\n]*\n)*?\*\*Stratejik Notlar:\*\*[^\n]*\n'
+                         r'(?:\s*-[^\n]*\S[^\n]*\n){3}'),
+    'final': re.compile(r'SONUÇ:\*\*[^\n]*\n\s*\S[^\n]*\n')
+}
+
+CONTINUATION_USER = PromptTemplate('continuation', """{prompt}
+
+## YARIM KALAN YANIT:
+{partial}
+
+Yanıt token sınırında kesildi ya da eksik kaldı. Yukarıdaki bölümleri tekrar yazma; sadece şu bölümleri zorunlu formatta yaz: {sections}""")
+
+
+def early_stop_mode():
+    """✂️ LATU_EARLY_STOP: stream (varsayılan), all ya da off"""
+
+    mode = os.environ.get('LATU_EARLY_STOP', EARLY_STOP_STREAM).lower()
+    if mode in ('0', 'off', 'false', 'no'):
+        return EARLY_STOP_OFF
+    return EARLY_STOP_ALL if mode == EARLY_STOP_ALL else EARLY_STOP_STREAM
+
+
+class CompletionWatcher:
+    """👀 Akış parçalarını biriktirip formatın son bölümü tamamlandı mı diye bakar"""
+
+    def __init__(self, stage):
+        self.pattern = DONE_PATTERNS.get(stage)
+        self.chunks = []
+
+    def feed(self, chunk):
+        """➕ Parçayı ekle; format tamamlandıysa True"""
+
+        self.chunks.append(chunk)
+        # Kalıplar tamamlanmış satıra bakar: satır sonu gelmeden aramaya gerek yok
+        if self.pattern is None or '\n' not in chunk:
+            return False
+        return self.pattern.search(''.join(self.chunks)) is not None
+
+def watch(stage, chunks):
+    """✂️ Format tamamlanınca akışı kes (kaynak generator kapatılır, sağlayıcı üretimi durur)"""
+
+    watcher = CompletionWatcher(stage)
+    for chunk in chunks:
+        yield chunk
+        if watcher.feed(chunk):
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+            registry.inc('latu_generation_events_total', stage=stage, event='early_stop')
+            log(f"✂️ {stage} çıktısı format tamamlanınca kesildi", event='generation_early_stop', stage=stage)
+            return
+
+
+def _looks_structured(text):
+    """JSON yanıtlar bölüm başlıklarıyla denetlenmez"""
+    stripped = text.lstrip()
+    return stripped.startswith(('{', '[', '```'))
+
+def missing_sections(stage, text, truncated=False):
+    """
+    🔎 Eksik zorunlu bölümler ve metnin korunacak uzunluğu.
+    Kesilmiş yanıtta format bitmemişse yarım kalan son bölüm de eksik sayılır ve atılır.
+    """
+
+    sections = REQUIRED_SECTIONS.get(stage)
+    if not sections or _looks_structured(text):
+        return [], len(text)
+
+    positions = {}
+    for title, pattern in sections:
+        match = pattern.search(text)
+        if match:
+            positions[title] = match.start()
+    # Hiçbir başlık yoksa model formatı hiç izlememiş: bölüm tamamlamak anlamsız
+    if not positions:
+        return [], len(text)
+
+    missing = [title for title, _ in sections if title not in positions]
+    if truncated and not DONE_PATTERNS[stage].search(text):
+        last = max(positions, key=positions.get)
+        missing.append(last)
+
+    present = [positions[title] for title in missing if title in positions]
+    keep = min(present) if present else len(text)
+    if present:
+        # Başlık satırının ('## ' gibi) başından kes
+        keep = text.rfind('\n', 0, keep) + 1
+    order = [title for title, _ in sections]
+    return sorted(set(missing), key=order.index), keep
+
+
+def _merge_usage(first, second):
+    if not first or not second:
+        return None
+    return {key: (first.get(key) or 0) + (second.get(key) or 0)
+            for key in ('input_tokens', 'output_tokens', 'cached_input_tokens')}
+
+def finish_sections(backend, stage, provider, model, system, prompt, max_tokens, temperature, text, relay=None):
+    """
+    🧩 Kesilmiş / eksik yanıtta sadece eksik bölümleri iste ve yanıta ekle
+    (gerek yoksa metni olduğu gibi döndürür).
+    """
+
+    from llm_backend import LLMText
+
+    usage = getattr(text, 'usage', None)
+    output_tokens = (usage or {}).get('output_tokens') or count_tokens(text, model)
+    truncated = output_tokens >= max_tokens * TRUNCATION_RATIO
+    missing, keep = missing_sections(stage, text, truncated)
+    if not missing:
+        return text
+
+    sections = REQUIRED_SECTIONS[stage]
+    budget = max(MIN_CONTINUATION_TOKENS, math.ceil(max_tokens * len(missing) / len(sections) * BUDGET_HEADROOM))
+    partial = text[:keep].rstrip()
+    continuation_prompt = CONTINUATION_USER.render(prompt=prompt, partial=partial, sections=', '.join(missing))
+
+    registry.inc('latu_generation_events_total', stage=stage, event='continuation')
+    log(f"🧩 {stage} çıktısında eksik bölümler isteniyor: {', '.join(missing)}", event='generation_continued',
+        stage=stage, missing=missing, truncated=truncated, output_tokens=output_tokens, max_tokens=budget)
+
+    if relay is not None:
+        from result_store import live_result_path
+
+        # Dashboard ve canlı dosya, kaydedilen metinle aynı olsun: yarım bölüm geri sarılır,
+        # devam parçaları aynı akışa eklenir
+        result_file = live_result_path(stage, relay.symbol)
+        relay.truncate(len(partial), result_file)
+        chunks = []
+
+        def collect():
+            leading = True
+            if partial:
+                yield '\n\n'
+            for chunk in backend.stream(stage, provider, model, system, continuation_prompt, budget, temperature):
+                chunks.append(chunk)
+                if leading:
+                    chunk = chunk.lstrip()
+                    leading = not chunk
+                if chunk:
+                    yield chunk
+
+        relay.consume(collect(), result_file, append=True)
+        continuation = ''.join(chunks)
+    else:
+        continuation = backend.complete(stage, provider, model, system, continuation_prompt, budget, temperature)
+
+    merged = f"{partial}\n\n{continuation.strip()}" if partial else continuation.strip()
+    return LLMText(merged, getattr(text, 'model', None) or model,
+                   _merge_usage(usage, getattr(continuation, 'usage', None)))
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(len(ordered) * percentile / 100) - 1))
+    return ordered[index]
+
+class TokenBudget:
+    """📏 Aşama başına geçmiş çıktı uzunluklarından öğrenilen max_tokens"""
+
+    def __init__(self, store=None, refresh=REFRESH_SECONDS):
+        self.store = store
+        self.refresh = refresh
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def _learn(self, stage):
+        from final_engine import ENGINE_MODEL
+        from result_store import get_store
+
+        store = self.store or get_store()
+        # Yerel final motorunun çıktıları LLM üretimi değildir
+        lengths = store.output_lengths(stage, HISTORY_LIMIT, exclude_models=(ENGINE_MODEL,))
+        default = DEFAULT_MAX_TOKENS.get(stage, 1000)
+        if len(lengths) < MIN_SAMPLES:
+            return default, len(lengths)
+
+        learned = _percentile(lengths, BUDGET_PERCENTILE) * BUDGET_HEADROOM
+        learned = math.ceil(learned / BUDGET_QUANTUM) * BUDGET_QUANTUM
+        return min(max(learned, MIN_MAX_TOKENS.get(stage, 0)), MAX_MAX_TOKENS.get(stage, learned)), len(lengths)
+
+    def max_tokens(self, stage):
+        """📏 Aşamanın bu istekteki max_tokens değeri"""
+
+        with self._lock:
+            cached = self._budgets.get(stage)
+            if cached and time.monotonic() - cached[1] < self.refresh:
+                return cached[0]
+
+            previous = cached[0] if cached else None
+            try:
+                value, samples = self._learn(stage)
+            except Exception as e:
+                # Depo okunamazsa son (ya da varsayılan) bütçeyle devam
+                log(f"⚠️ Token bütçesi öğrenilemedi: {e}", event='token_budget_failed', stage=stage)
+                value, samples = previous or DEFAULT_MAX_TOKENS.get(stage, 1000), 0
+            self._budgets[stage] = (value, time.monotonic())
+
+        if value != previous:
+            log(f"📏 {stage} max_tokens: {value} ({samples} örnek)", event='token_budget', stage=stage,
+                max_tokens=value, samples=samples)
+        return value
+
+_budget = None
+_budget_lock = threading.Lock()
+
+def max_tokens_for(stage):
+    """📏 LATU_ADAPTIVE_TOKENS açıksa (varsayılan) öğrenilen, değilse varsayılan bütçe"""
+
+    global _budget
+    if os.environ.get('LATU_ADAPTIVE_TOKENS', 'on').lower() in ('0', 'off', 'false', 'no'):
+        return DEFAULT_MAX_TOKENS[stage]
+    with _budget_lock:
+        if _budget is None:
+            _budget = TokenBudget()
+    return _budget.max_tokens(stage)
+
+
+def main():
+    """📏 Aşama başına öğrenilen bütçeleri göster"""
+
+    parser = argparse.ArgumentParser(description='LATU Uyarlanabilir Token Bütçeleri')
+    parser.add_argument('--db', help='Sonuç veritabanı (varsayılan: LATU_RESULTS_DB)')
+    args = parser.parse_args()
+
+    from result_store import get_store
+    budget = TokenBudget(get_store(args.db))
+    for stage in DEFAULT_MAX_TOKENS:
+        value, samples = budget._learn(stage)
+        print(f"📏 {stage:<7} max_tokens {value:>5} (varsayılan {DEFAULT_MAX_TOKENS[stage]}, {samples} örnek)")
+
+if __name__ == "__main__":
+    main()
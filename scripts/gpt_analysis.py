@@ -7,242 +7,322 @@ LATU Trading System - GPT Analysis Pipeline
 
 import os
 import argparse
-import json
-import requests
+import time
+import logging
 from datetime import datetime
-import openai
+from result_store import get_store, live_result_path
+from llm_backend import get_backend
+from transport import deliver, defer_delivery, idempotency_key
+from stream_relay import StreamRelay
+from generation import max_tokens_for, finish_sections
+from coalesce import coalescer_from_env, flight_key, KIND_GPT, ONE_SHOT_KINDS
+from handoff import attach_results
+from checkpoint import open_checkpoint, resume_checkpoint, run_stage, CheckpointNotFound
+from metrics import instrument, instrument_stage, phase, log, run_context
+from prompts import GPT_SYSTEM_PROMPT, gpt_prompt, count_tokens
 
-def gpt_first_analysis(symbol, price, change, volume):
-    """🚀 GPT ilk hızlı analiz fonksiyonu"""
+def build_market_section(symbol, price, change, volume, data=None, indicators=None):
+    """📊 Prompt'un piyasa verisi bölümünü oluştur"""
     
-    # OpenAI API ayarları
-    openai.api_key = os.environ['OPENAI_API_KEY']
+    if data is None and indicators is None:
+        return f"""## MEVCUT PIYASA VERİSİ:
+- Sembol: {symbol.upper()}
+- Son fiyat: ${price:,.2f}
+- 24 saatlik değişim: %{change:.2f}
+- 24 saatlik volume: {volume:,.0f}"""
     
-    # GPT'ye gönderilecek prompt
-    prompt = f"""
-# GELIŞMIŞ TEKNİK ANALİZ SİSTEMİ
-Sen profesyonel bir trader'sın ve kullanıcı için yatırım kararları veriyorsun. Sadece tek kullanıcı için analiz yaptığın için net alım/satım tavsiyeleri verebilirsin.
-
-## MEVCUT PIYASA VERİSİ:
-- Veri seti: {len(data)} dakikalık Bitcoin fiyat verileri
-- Zaman aralığı: {data.index[0]} - {data.index[-1]}
-- Son fiyat: ${data['close'].iloc[-1]:,.2f}
-- 24 saatlik değişim: %{((data['close'].iloc[-1] / data['close'].iloc[0]) - 1) * 100:.2f}
-
-## PHASE 1: MARKET CONTEXT ASSESSMENT
-🔍 **Piyasa Durumu Kontrolü:**
-1. **Fiyat Pozisyonu**: Günlük aralığın neresinde (erken/orta/geç hareket)
-2. **EMA Mesafesi**: 
-   - 🟢 Normal: <$3000 (Güvenli)
-   - 🟡 Dikkat: $3000-5000 (Temkinli)
-   - 🔴 Tehlike: >$5000 (Overextended)
-3. **Seans Riski**: Asian (düşük likidite), US kapanış (kar satışı)
-4. **Volatilite**: Son 4 saatte >%5 hareket = 🚨 Aşırı genişleme uyarısı
-
-## PHASE 2: TECHNICAL STRUCTURE
-📊 **Teknik Yapı:**
-1. Destek/Direnç seviyeleri (kesin sayılar)
-2. Pattern recognition (pinbar, formasyon)
-3. **YENİ**: Overextension check - EMA'dan >$5000 uzaklık = 🔴 YÜKSEK RİSK
-4. **YENİ**: Multi-timeframe teyit (1m, 5m, 15m uyum)
-
-## PHASE 3: PROBABILITY CALIBRATION
-⚖️ **Olasılık Hesaplama:**
-Base olasılıkları hesapla, sonra ayarla:
-- Overextended (>$5000 EMA): Devam olasılığı -%25
-- Multiple red (seviyede çoklu red): Dönüş olasılığı +%20
-- Geç seans (19:00+): Tüm olasılıklar -%15
-- Yüksek volatilite (>%6 günlük): "Whipsaw riski" ekle
-
-## PHASE 4: STRATEGY OPTIMIZATION
-🎯 **Timing Kalite Skoru:**
-- **A+** (0.5-1% pozisyon): Mükemmel setup, EMA confluence
-- **B** (0.3-0.5%): İyi setup, küçük timing sorunu
-- **C** (0.2-0.3%): Geç ama uygulanabilir, küçük boyut
-- **D-F** (KAÇIN): Kötü timing, overextended
-
-🏦 **Pozisyon Boyutu:**
-- Optimal setup'lar: 0.5-1%
-- Geç girişler: Max 0.3%
-- Trend karşıtı: Max 0.25%
-- Overextended piyasalar: Max 0.2%
-
-## PHASE 5: DECISION FRAMEWORK
-📋 **Karar Çerçevesi:**
-Her analizde şunları ver:
-1. **BİRİNCİL** strateji (en yüksek olasılık)
-2. **ALTERNATİF** strateji (birincil başarısız olursa)
-3. **KAÇINILACAKLAR** listesi
-4. Zaman bazlı çıkış kuralları
-5. Piyasa geçersizlik seviyeleri
-
-## PHASE 6: REALITY CHECK
-🤔 **Gerçeklik Kontrolü:**
-Final tavsiye öncesi sor:
-- "Son hareketlerden $X kazançla bu işlemi alır mıydım?"
-- "Bu optimal risk/ödül mü yoksa kovalamaca mı?"
-- "Önümüzdeki 2-4 saatte ne yanlış gidebilir?"
-
-## ZORUNLU FINAL OUTPUT FORMAT:
-### 🎯 TRADING DECISION TABLE
-| Aksiyon | Tetik Seviye | Stop Loss | Hedef | Pozisyon | Olasılık |
-|---------|--------------|-----------|-------|----------|----------|
-| 🟢 **AL** | X.XXX geçerse | X.XXX | X.XXX | %X | %XX |
-| 🔴 **SAT** | X.XXX altına düşerse | X.XXX | X.XXX | %X | %XX |
-| 🟡 **BEKLE** | X.XXX - X.XXX arası | - | - | - | %XX |
-| 🚪 **ÇIKIŞ** | Elinde varsa | X.XXX | - | Tümü | %XX |
-
-### 🚨 KRİTİK SEVİYELER
-- 🔴 **Üst Direnç**: X.XXX (Red beklenir)
-- 🟢 **Alt Destek**: X.XXX (Alım fırsatı)
-- ⚠️ **Geçersizlik**: X.XXX (Strateji iptal)
+    from indicator_params import format_indicator_lines
+    
+    if indicators is None:
+        from market_data import compute_indicators
+        indicators = compute_indicators(data)
+    
+    return f"""## MEVCUT PIYASA VERİSİ:
+- Veri seti: {indicators['bars']} dakikalık {symbol.upper()} fiyat verileri
+- Zaman aralığı: {indicators['start']} - {indicators['end']}
+- Son fiyat: ${indicators['close']:,.2f}
+- 24 saatlik değişim: %{indicators['change_pct']:.2f}
+- 24 saatlik volume: {indicators['volume']:,.0f}
 
-### ⚡ ACİL UYARILAR
-- 🚨 **Risk**: [Yüksek risk faktörleri]
-- ⏰ **Zaman**: [Zaman kısıtları]
-- 🎯 **Fırsat**: [Optimal giriş koşulları]
+## HESAPLANMIŞ GÖSTERGELER (gerçek veriden):
+{format_indicator_lines(indicators)}{format_timeframe_section(indicators)}"""
 
-### 📊 ÖNCELİK SIRASI
-1. 🥇 **EN İYİ**: [Açık tavsiye]
-2. 🥈 **İKİNCİ**: [Alternatif plan]
-3. 🥉 **ÜÇÜNCÜ**: [Yedek seçenek]
+def format_timeframe_section(indicators):
+    """🕰️ Çoklu zaman dilimi bölümü (indicators'da 'timeframes' yoksa boş)"""
+    
+    if not indicators or not indicators.get('timeframes'):
+        return ''
+    
+    from timeframes import format_timeframe_lines
+    
+    return f"""
 
-## ÖZEL TALİMATLAR:
-- ❌ "Yatırım tavsiyesi değildir" yazma - SEN TAVSİYE VERİYORSUN
-- ✅ Net AL/SAT/BEKLE kararları ver
-- ✅ Kesin sayısal seviyeler belirt
-- ✅ Risk seviyelerini emoji ile göster
-- ✅ Timing kalitesini değerlendir
-- ✅ Overextension durumunda agresif uyar
+## ÇOKLU ZAMAN DİLİMİ (1m/5m/15m teyidi için gerçek barlar):
+{format_timeframe_lines(indicators['timeframes'])}"""
 
-Bu framework ile analizi yap ve yukarıdaki formatta sun. Analizi JSON formatında döndür.
-    """
+@instrument_stage('gpt')
+def gpt_first_analysis(symbol, price, change, volume, backend=None, data=None, indicators=None, relay=None):
+    """🚀 GPT ilk hızlı analiz fonksiyonu"""
+    
+    # LLM backend (canlı API veya mock)
+    backend = instrument(backend or get_backend())
+    
+    # Piyasa verisi (OHLCV verilmişse gerçek göstergelerle)
+    market_section = build_market_section(symbol, price, change, volume, data, indicators)
+    
+    # Statik framework system prompt'ta (cache'lenebilir önek); burada sadece piyasa verisi
+    prompt = gpt_prompt(market_section)
     
     try:
-        print(f"🚀 GPT analizi başlatılıyor: {symbol}")
+        log(f"🚀 GPT analizi başlatılıyor: {symbol}", event='stage_started',
+            prompt_tokens=count_tokens(prompt, "gpt-4"))
+        
+        # Geçmiş çıktı uzunluklarından öğrenilen bütçe
+        max_tokens = max_tokens_for('gpt')
         
-        # OpenAI API çağrısı
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Sen profesyonel bir trading analistisin. Kısa, net ve actionable analizler yaparsın. Sadece istenen formatla cevap verirsin."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            max_tokens=600,
+        # OpenAI API çağrısı (backend üzerinden; relay varsa streaming)
+        started = time.perf_counter()
+        call = backend.stream if relay is not None else backend.complete
+        response_text = call(
+            'gpt', 'openai', "gpt-4",
+            GPT_SYSTEM_PROMPT,
+            prompt,
+            max_tokens=max_tokens,
             temperature=0.7
         )
         
-        gpt_result = response.choices[0].message.content.strip()
+        if relay is not None:
+            # Parçalar geldikçe dosyaya ve dashboard'a aktarılır
+            response_text = relay.consume(response_text, live_result_path('gpt', symbol))
         
-        # Sonucu results klasörüne kaydet
-        os.makedirs('results', exist_ok=True)
-        result_file = f'results/gpt_{symbol}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
+        # Kesilmiş / eksik yanıtta sadece eksik bölümler istenir
+        response_text = finish_sections(backend, 'gpt', 'openai', "gpt-4",
+                                        GPT_SYSTEM_PROMPT, prompt, max_tokens, 0.7,
+                                        response_text, relay)
         
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(gpt_result)
+        latency = time.perf_counter() - started
+        model = getattr(response_text, 'model', None) or "gpt-4"
+        gpt_result = response_text.strip()
         
-        print(f"✅ GPT analizi tamamlandı ve kaydedildi: {result_file}")
+        # Sonucu result store'a kaydet (yönlendirici fallback modeli seçmiş olabilir)
+        with phase('store'):
+            record_id = get_store().record(symbol, 'gpt', model, gpt_result, latency=latency,
+                                           usage=getattr(response_text, 'usage', None))
+        
+        log(f"✅ GPT analizi tamamlandı ve kaydedildi: #{record_id} ({latency:.2f}s)", event='stage_completed',
+            record_id=record_id, latency=round(latency, 6))
         return gpt_result
         
     except Exception as e:
-        print(f"❌ GPT API hatası: {e}")
+        log(f"❌ GPT API hatası: {e}", event='stage_failed', level=logging.ERROR, error=str(e))
         return None
 
-def trigger_claude_stage(symbol, gpt_result, webhook_url):
-    """🔄 Claude aşamasını tetikle"""
+def trigger_claude_stage(symbol, gpt_result, webhook_url, run_id=None, defer=False):
+    """🔄 Claude aşamasını tetikle (run_id sonraki aşamaların checkpoint'ini bağlar; defer: outbox'a al)"""
     
-    try:
-        # GitHub'a Claude aşaması için webhook gönder
-        github_payload = {
-            'event_type': 'analysis-request',
-            'client_payload': {
-                'symbol': symbol,
-                'stage': 'claude-detailed',
-                'gpt_result': gpt_result,
-                'webhook_url': webhook_url,
-                'timestamp': datetime.now().isoformat()
-            }
-        }
-        
-        headers = {
-            'Authorization': f'token {os.environ["GITHUB_TOKEN"]}',
-            'Accept': 'application/vnd.github.v3+json',
-            'Content-Type': 'application/json'
+    # GitHub'a Claude aşaması için webhook gönder
+    timestamp = datetime.now().isoformat()
+    github_payload = {
+        'event_type': 'analysis-request',
+        'client_payload': {
+            'symbol': symbol,
+            'stage': 'claude-detailed',
+            'webhook_url': webhook_url,
+            'timestamp': timestamp
         }
-        
-        # GitHub repo bilgileri (environment'dan al)
-        repo_info = os.environ.get('GITHUB_REPOSITORY', 'user/G-C-G-simulation-pipline')
-        github_url = f'https://api.github.com/repos/{repo_info}/dispatches'
-        
-        response = requests.post(github_url, json=github_payload, headers=headers)
-        
-        if response.status_code == 204:
-            print("✅ Claude aşaması tetiklendi")
-        else:
-            print(f"⚠️ Claude tetikleme hatası: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Claude tetikleme hatası: {e}")
+    }
+    # Tam metin yerine handoff referansı (dispatch ve argv boyut sınırları)
+    attach_results(github_payload['client_payload'], gpt_result=gpt_result)
+    if run_id:
+        github_payload['client_payload']['run_id'] = run_id
+    
+    headers = {
+        'Accept': 'application/vnd.github.v3+json',
+        'Content-Type': 'application/json'
+    }
+    
+    # GitHub repo bilgileri (environment'dan al)
+    repo_info = os.environ.get('GITHUB_REPOSITORY', 'user/G-C-G-simulation-pipline')
+    api_url = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+    github_url = f'{api_url}/repos/{repo_info}/dispatches'
+    
+    key = idempotency_key(symbol, 'claude-detailed', timestamp)
+    if defer:
+        # Handoff artifact'ı yüklenmeden sonraki job başlamasın: dispatch outbox'ta bekler
+        defer_delivery(github_url, github_payload, headers, auth_env='GITHUB_TOKEN', key=key, expected=(204,))
+        return
+    
+    ok, status = deliver(github_url, github_payload, headers, auth_env='GITHUB_TOKEN', key=key, expected=(204,))
+    
+    if ok:
+        log("✅ Claude aşaması tetiklendi", event='dispatch_sent', target='claude-detailed')
+    else:
+        log(f"⚠️ Claude tetikleme hatası: {status}", event='dispatch_failed', level=logging.WARNING,
+            target='claude-detailed', status=status)
 
 def send_result_to_dashboard(symbol, stage, result, webhook_url):
     """📤 Dashboard'a sonuç gönder"""
     
-    try:
-        payload = {
-            'symbol': symbol,
-            'stage': stage,
-            'result': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ Dashboard'a sonuç gönderildi")
-        else:
-            print(f"⚠️ Dashboard gönderim hatası: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Dashboard gönderim hatası: {e}")
+    timestamp = datetime.now().isoformat()
+    payload = {
+        'symbol': symbol,
+        'stage': stage,
+        'result': result,
+        'timestamp': timestamp
+    }
+    
+    ok, status = deliver(webhook_url, payload, key=idempotency_key(symbol, stage, timestamp))
+    
+    if ok:
+        log("✅ Dashboard'a sonuç gönderildi", event='webhook_sent', stage=stage)
+    else:
+        log(f"⚠️ Dashboard gönderim hatası: {status}", event='webhook_failed', level=logging.WARNING,
+            stage=stage, status=status)
 
 def main():
     """🚀 Ana fonksiyon"""
     
     parser = argparse.ArgumentParser(description='GPT İlk Analiz Script')
-    parser.add_argument('--symbol', required=True, help='Trading sembolü')
-    parser.add_argument('--price', required=True, type=float, help='Güncel fiyat')
-    parser.add_argument('--change', required=True, type=float, help='Değişim yüzdesi')
-    parser.add_argument('--volume', required=True, type=float, help='Volume')
+    parser.add_argument('--symbol', help='Trading sembolü')
+    parser.add_argument('--price', type=float, help='Güncel fiyat')
+    parser.add_argument('--change', type=float, help='Değişim yüzdesi')
+    parser.add_argument('--volume', type=float, help='Volume')
     parser.add_argument('--webhook-url', required=True, help='Dashboard webhook URL')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help='GPT çıktısı checkpoint\'te varsa yeniden çağırmadan Claude\'u tetikle')
+    parser.add_argument('--stream', action='store_true', help='Çıktıyı streaming ile dashboard ve dosyaya aktar')
+    parser.add_argument('--no-trigger', action='store_true',
+                        help='Claude dispatch\'ini gönderme, outbox\'a al (transport.py --replay ile gönderilir)')
+    parser.add_argument('--data-file', help='Dakikalık OHLCV CSV/Parquet dosyası (göstergeler için)')
+    parser.add_argument('--state-dir', help='Artımlı gösterge durumu klasörü (verilirse göstergeler bar bar güncellenir)')
+    parser.add_argument('--prefilter', action='store_true', help='Piyasa değişmediyse LLM çağrılarını atla')
+    parser.add_argument('--prefilter-dir', default='results/prefilter', help='Ön filtre görüntülerinin klasörü')
+    parser.add_argument('--coalesce', choices=ONE_SHOT_KINDS,
+                        help='Aynı sembol için çalışan analize bağlan (varsayılan: LATU_COALESCE; '
+                             'memory sadece worker.py serve içindir)')
     
     args = parser.parse_args()
     
-    print("🚀 LATU GPT Analysis Pipeline Başlatıldı")
-    print(f"📊 Analiz edilen sembol: {args.symbol}")
-    print(f"💰 Fiyat: ${args.price}")
-    print(f"📈 Değişim: {args.change}%")
-    print(f"📊 Volume: {args.volume:,.0f}")
+    checkpoint = None
+    if args.resume:
+        try:
+            checkpoint = resume_checkpoint(args.resume)
+        except CheckpointNotFound as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+        args.symbol = args.symbol or checkpoint.symbol
+        for name in ('price', 'change', 'volume'):
+            if getattr(args, name) is None:
+                setattr(args, name, checkpoint.inputs.get(name))
     
-    # GPT analizini yap
-    gpt_result = gpt_first_analysis(args.symbol, args.price, args.change, args.volume)
+    missing = [name for name in ('symbol', 'price', 'change', 'volume') if getattr(args, name) is None]
+    if missing:
+        parser.error(f"gerekli argümanlar eksik: {', '.join('--' + name for name in missing)}")
     
-    if gpt_result:
-        # Dashboard'a GPT sonucunu gönder
-        send_result_to_dashboard(args.symbol, 'gpt-completed', gpt_result, args.webhook_url)
+    log(f"🚀 LATU GPT Analysis Pipeline Başlatıldı: {args.symbol} (fiyat ${args.price}, değişim {args.change}%, "
+        f"volume {args.volume:,.0f})", event='run_started', stage='gpt', symbol=args.symbol, price=args.price,
+        change=args.change, volume=args.volume)
+    
+    # OHLCV verisi verildiyse göstergeleri hesapla
+    data = candles = None
+    if args.data_file:
+        from market_data import load_candles, last_window
+        try:
+            candles = load_candles(args.data_file, args.symbol)
+        except ValueError as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+        data = last_window(candles)
+        log(f"📈 {len(data)} dakikalık mum yüklendi: {args.data_file}", event='candles_loaded', bars=len(data),
+            path=args.data_file)
+    
+    # Artımlı durum: sadece yeni barları işle, tam pencereyi yeniden hesaplama
+    indicators = None
+    if args.state_dir:
+        from streaming_indicators import load_state, save_state
+        state = load_state(args.symbol, args.state_dir)
+        if data is not None:
+            added = state.update_from_frame(data)
+        else:
+            added = int(state.update(args.price))
+        save_state(state, args.state_dir)
+        indicators = state.snapshot()
+        log(f"⚡ Gösterge durumu güncellendi: {added} yeni bar, toplam {indicators['bars']}",
+            event='indicator_state_updated', added=added, bars=indicators['bars'])
+    
+    # Çoklu zaman dilimi: 1m ring + 5m/15m/1h/4h barları, durum varsa artımlı
+    if args.state_dir:
+        from timeframes import load_state as load_timeframes, save_state as save_timeframes
+        frames = load_timeframes(args.symbol, args.state_dir)
+        if candles is not None:
+            frames.update_from_frame(candles)
+        else:
+            frames.update(args.price)
+        save_timeframes(frames, args.state_dir)
+        indicators['timeframes'] = frames.snapshot()
+    elif candles is not None:
+        from market_data import compute_indicators
+        from timeframes import timeframe_snapshot
+        indicators = compute_indicators(data)
+        indicators['timeframes'] = timeframe_snapshot(candles, args.symbol)
+    
+    # Ön filtre: piyasa anlamlı değişmediyse önceki kararı gönder, zinciri tetikleme
+    prefilter = None
+    if args.prefilter:
+        from prefilter import PreFilter
+        prefilter = PreFilter(args.prefilter_dir)
+        should_run, _, previous = prefilter.check(args.symbol, args.price, args.change, args.volume, indicators)
+        if not should_run:
+            send_result_to_dashboard(args.symbol, 'gpt-skipped', previous['results']['gpt'], args.webhook_url)
+            log("⏭️ GPT aşaması atlandı, önceki karar gönderildi", event='run_skipped', stage='gpt')
+            return
+    
+    def analyse(snapshot):
+        with run_context(args.symbol, args.resume) as run_id:
+            return run_chain(snapshot, run_id)
+    
+    def run_chain(snapshot, run_id):
+        # Checkpoint: Claude / final runner'ı ölürse zincir buradan yeniden başlamaz
+        stage_checkpoint = checkpoint or open_checkpoint(run_id, args.symbol, snapshot)
         
-        # Claude aşamasını tetikle
-        trigger_claude_stage(args.symbol, gpt_result, args.webhook_url)
+        # GPT analizini yap
+        relay = StreamRelay(args.symbol, 'gpt', args.webhook_url) if args.stream else None
+        gpt_result = run_stage(stage_checkpoint, 'gpt', gpt_first_analysis, args.symbol, snapshot['price'],
+                               snapshot['change'], snapshot['volume'], data=data, indicators=indicators, relay=relay)
+        if relay is not None:
+            relay.close()
         
-        print("🎯 GPT aşaması başarıyla tamamlandı!")
+        if gpt_result:
+            if prefilter:
+                prefilter.record(args.symbol, snapshot['price'], snapshot['change'], snapshot['volume'],
+                                 {'gpt': gpt_result}, indicators)
+            
+            # Dashboard'a GPT sonucunu gönder
+            send_result_to_dashboard(args.symbol, 'gpt-completed', gpt_result, args.webhook_url)
+            
+            # Claude aşamasını tetikle
+            trigger_claude_stage(args.symbol, gpt_result, args.webhook_url, run_id, defer=args.no_trigger)
+            log(f"📌 Run: {run_id}", event='run_id', run=run_id)
+        elif stage_checkpoint is not None:
+            stage_checkpoint.finish('gpt aşaması başarısız')
+        return gpt_result
+    
+    # Birleştirme: aynı sembol için çalışan analiz varsa ikinci zinciri başlatma
+    snapshot = {'price': args.price, 'change': args.change, 'volume': args.volume}
+    coalescer = coalescer_from_env(args.coalesce, one_shot=True)
+    if coalescer:
+        gpt_result, coalesced = coalescer.run(flight_key(args.symbol, KIND_GPT), snapshot, analyse)
+    else:
+        gpt_result, coalesced = analyse(snapshot), False
+    
+    if gpt_result:
+        if coalesced:
+            log("🔗 Çalışan analize bağlanıldı, sonuç ve Claude tetiklemesi onun tarafından gönderildi",
+                event='run_coalesced', stage='gpt')
+        log("🎯 GPT aşaması başarıyla tamamlandı!", event='run_completed', stage='gpt')
         
     else:
-        print("❌ GPT analizi başarısız!")
+        log("❌ GPT analizi başarısız!", event='run_failed', level=logging.ERROR, stage='gpt')
         exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 Aşamalar Arası Handoff Deposu
+LATU Trading System - Handoff Pipeline
+
+GPT ve Claude çıktıları dispatch `client_payload`'ına ve komut satırına
+tam metin olarak gömülmez. Metin içerik adresli (sha256), sıkıştırılmış
+(zstandard kuruluysa zstd, değilse gzip) bir blob olarak yerel diske
+yazılır; aşamalar arasında sadece kısa referans kimliği taşınır. GitHub
+Actions'ta klasör her job sonunda artifact olarak yüklenir, sonraki job
+payload'daki handoff_run_id ile indirir. Blob okunurken içerik özeti
+doğrulanır.
+
+    python scripts/claude_analysis.py --symbol BTCUSDT --gpt-result-ref 9f86d081884c7d659a2feaa0c55ad015 ...
+    python scripts/handoff.py put < analysis.txt
+    python scripts/handoff.py get 9f86d081884c7d659a2feaa0c55ad015
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import time
+from metrics import log
+
+DEFAULT_HANDOFF_DIR = 'results/handoff'
+# Bu süredir okunmayan / yazılmayan blob'lar silinir
+DEFAULT_TTL = 7 * 86400
+GC_INTERVAL = 3600
+
+CODEC_ZSTD = 'zstd'
+CODEC_GZIP = 'gzip'
+EXTENSIONS = {CODEC_ZSTD: '.zst', CODEC_GZIP: '.gz'}
+
+# sha256 özetinin ilk 128 biti: payload ve argv'de kısa, çakışma pratikte yok
+REF_LENGTH = 32
+_REF = re.compile(r'^[0-9a-f]{%d}$' % REF_LENGTH)
+
+
+class HandoffError(Exception):
+    """📦 Referansın blob'u yok ya da içerik özeti tutmuyor"""
+
+
+def content_ref(text):
+    """🔑 Metnin içerik adresi"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:REF_LENGTH]
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+def default_codec():
+    """🗜️ zstandard kuruluysa zstd, değilse gzip"""
+    return CODEC_ZSTD if _zstd() else CODEC_GZIP
+
+def compress(data, codec):
+    if codec == CODEC_ZSTD:
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    # mtime=0: aynı içerik aynı bayt dizisi
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def decompress(data, codec):
+    if codec == CODEC_ZSTD:
+        zstandard = _zstd()
+        if zstandard is None:
+            raise HandoffError('zstd blob okumak için zstandard paketi gerekli')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HandoffStore:
+    """📦 Klasördeki içerik adresli, sıkıştırılmış metin blob'ları"""
+
+    def __init__(self, directory=DEFAULT_HANDOFF_DIR, codec=None, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.codec = codec or default_codec()
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ref, codec):
+        if not _REF.match(ref or ''):
+            raise HandoffError(f"Geçersiz handoff referansı: {ref!r}")
+        return os.path.join(self.directory, ref + EXTENSIONS[codec])
+
+    def put(self, text):
+        """📥 Metni sakla ve referansını döndür (aynı içerik ikinci kez yazılmaz)"""
+
+        ref = content_ref(text)
+        for codec in EXTENSIONS:
+            path = self._path(ref, codec)
+            if os.path.exists(path):
+                # TTL'i yenile: zincir hâlâ bu blob'u kullanıyor
+                os.utime(path)
+                return ref
+
+        self.maybe_gc()
+        data = text.encode('utf-8')
+        blob = compress(data, self.codec)
+        path = self._path(ref, self.codec)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(blob)
+        os.replace(temporary, path)
+        log(f"📦 Handoff blob'u yazıldı: {ref} ({len(data):,} → {len(blob):,} bayt, {self.codec})",
+            event='handoff_put', ref=ref, size=len(data), compressed=len(blob), codec=self.codec)
+        return ref
+
+    def get(self, ref):
+        """📤 Referansın metnini oku ve içerik özetini doğrula"""
+
+        for codec in EXTENSIONS:
+            path = self._path(ref, codec)
+            try:
+                with open(path, 'rb') as f:
+                    blob = f.read()
+            except FileNotFoundError:
+                continue
+            text = decompress(blob, codec).decode('utf-8')
+            if content_ref(text) != ref:
+                raise HandoffError(f"Handoff blob'u bozuk: {ref}")
+            return text
+        raise HandoffError(f"Handoff blob'u bulunamadı: {ref} ({self.directory})")
+
+    def gc(self, ttl=None):
+        """🧹 TTL'i geçen blob'ları ve yarım kalmış geçici dosyaları sil"""
+
+        ttl = self.ttl if ttl is None else ttl
+        expired = time.time() - ttl
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(tuple(EXTENSIONS.values()) + ('.tmp',)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < expired:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            log(f"🧹 {removed} bayat handoff blob'u silindi", event='handoff_gc', removed=removed)
+        return removed
+
+    def maybe_gc(self):
+        """🧹 Son temizlikten GC_INTERVAL geçtiyse gc()"""
+
+        marker = os.path.join(self.directory, '.gc')
+        try:
+            if time.time() - os.path.getmtime(marker) < GC_INTERVAL:
+                return 0
+        except FileNotFoundError:
+            pass
+        with open(marker, 'w'):
+            pass
+        return self.gc()
+
+
+def handoff_from_env():
+    """📦 LATU_HANDOFF (varsayılan: açık), LATU_HANDOFF_DIR, LATU_HANDOFF_CODEC ile store (kapalıysa None)"""
+
+    if os.environ.get('LATU_HANDOFF', 'on').lower() in ('0', 'off', 'false', 'no'):
+        return None
+    return HandoffStore(os.environ.get('LATU_HANDOFF_DIR', DEFAULT_HANDOFF_DIR),
+                        os.environ.get('LATU_HANDOFF_CODEC') or None,
+                        float(os.environ.get('LATU_HANDOFF_TTL', DEFAULT_TTL)))
+
+def load_ref(ref):
+    """📤 Referansı oku (LATU_HANDOFF kapalı olsa da klasörden okunur)"""
+    return HandoffStore(os.environ.get('LATU_HANDOFF_DIR', DEFAULT_HANDOFF_DIR)).get(ref)
+
+def attach_results(payload, **results):
+    """
+    📦 Aşama sonuçlarını payload'a ekle: handoff açıksa '<ad>_ref' referansları
+    (ve Actions'ta blob'ları taşıyan artifact'ın run'ı), kapalıysa tam metin.
+    """
+
+    store = handoff_from_env()
+    for name, text in results.items():
+        if store is None:
+            payload[name] = text
+        else:
+            payload[f'{name}_ref'] = store.put(text)
+    if store is not None and os.environ.get('GITHUB_RUN_ID'):
+        payload['handoff_run_id'] = os.environ['GITHUB_RUN_ID']
+    return payload
+
+
+def main():
+    """📦 Blob yazma / okuma ve temizlik"""
+
+    parser = argparse.ArgumentParser(description='LATU Aşamalar Arası Handoff Deposu')
+    parser.add_argument('--dir', default=os.environ.get('LATU_HANDOFF_DIR', DEFAULT_HANDOFF_DIR),
+                        help='Handoff klasörü')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('put', help='stdin\'deki metni sakla ve referansını yaz')
+    get_parser = commands.add_parser('get', help='Referansın metnini yaz')
+    get_parser.add_argument('ref')
+    gc_parser = commands.add_parser('gc', help='Bayat blob\'ları sil')
+    gc_parser.add_argument('--ttl', type=float, help='Saniye (varsayılan: LATU_HANDOFF_TTL ya da 7 gün)')
+
+    args = parser.parse_args()
+    store = HandoffStore(args.dir, os.environ.get('LATU_HANDOFF_CODEC') or None,
+                         float(os.environ.get('LATU_HANDOFF_TTL', DEFAULT_TTL)))
+
+    if args.command == 'put':
+        print(store.put(sys.stdin.read()))
+    elif args.command == 'get':
+        try:
+            sys.stdout.write(store.get(args.ref))
+        except HandoffError as e:
+            print(f"❌ {e}")
+            exit(1)
+    else:
+        print(f"🧹 Silinen blob: {store.gc(args.ttl)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📐 Gösterge Parametreleri
+LATU Trading System - Indicator Parameters
+
+Vektörel (market_data) ve artımlı (streaming_indicators) motorların
+paylaştığı pencere ve periyot sabitleri ile prompt satırı biçimlendirmesi.
+Bağımlılığı yoktur; O(1) güncelleme ve prompt yolu bunlar için pandas
+yüklemez.
+"""
+
+WINDOW_MINUTES = 1440
+EMA_FAST = 20
+EMA_SLOW = 50
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2.0
+VOLATILITY_MINUTES = 240
+
+
+def format_indicator_lines(indicators):
+    """📝 Göstergeleri prompt'a eklenecek satırlara çevir"""
+
+    macd_state = 'Pozitif' if indicators['macd_hist'] > 0 else 'Negatif'
+
+    return '\n'.join([
+        f"- EMA{EMA_FAST}: ${indicators['ema_fast']:,.2f} | EMA{EMA_SLOW}: ${indicators['ema_slow']:,.2f}",
+        f"- EMA{EMA_SLOW} mesafesi: ${indicators['ema_distance']:,.2f}",
+        f"- RSI({RSI_PERIOD}): {indicators['rsi']:.1f}",
+        f"- MACD: {indicators['macd']:.4f} | Sinyal: {indicators['macd_signal']:.4f} | Histogram: {indicators['macd_hist']:.4f} ({macd_state})",
+        f"- Bollinger genişliği: %{indicators['bollinger_width_pct']:.2f}",
+        f"- Son 4 saat volatilite: %{indicators['volatility_4h_pct']:.2f}",
+        f"- Günlük aralık: ${indicators['day_low']:,.2f} - ${indicators['day_high']:,.2f} (pozisyon %{indicators['range_position_pct']:.0f})"
+    ])
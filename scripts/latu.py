@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧭 Ortak Komut Satırı
+LATU Trading System - CLI Pipeline
+
+Aşama script'leri tek giriş noktasından çalıştırılır. Alt komutun modülü
+ancak seçildiğinde import edilir; SDK'lar (openai / anthropic), requests,
+pandas / numpy ve /metrics sunucusu ilgili modüllerde ilk kullanımda
+yüklenir. Böylece `--help`, mock çalıştırmalar ve kısa ömürlü Actions
+job'ları sadece ihtiyaç duydukları import'ları öder. Alt komutun
+argümanları aynen modülün kendi main()'ine aktarılır.
+
+    python scripts/latu.py gpt --symbol BTCUSDT --price 43250 --change 2.5 --volume 1000000 --webhook-url ...
+    python scripts/latu.py run --symbol BTCUSDT --price 43250 --change 2.5 --volume 1000000 --webhook-url ...
+    python scripts/latu.py final --resume 3f2a9c1d0b7e4a55 --webhook-url ...
+"""
+
+import importlib
+import sys
+
+# alt komut -> (modül, açıklama)
+COMMANDS = {
+    'gpt': ('gpt_analysis', 'GPT ilk analiz'),
+    'claude': ('claude_analysis', 'Claude detaylı analiz'),
+    'final': ('final_comparison', 'GPT-Claude final karşılaştırma'),
+    'run': ('orchestrator', 'Üç aşama tek süreçte'),
+    'batch': ('batch_runner', 'Çoklu sembol batch analizi'),
+    'nightly': ('batch_api', 'Gece taraması batch-API modu'),
+    'worker': ('worker', 'Kalıcı analiz worker servisi'),
+    'checkpoint': ('checkpoint', 'Checkpoint listeleme / temizlik'),
+    'handoff': ('handoff', 'Handoff blob deposu'),
+    'outbox': ('transport', 'Transport outbox yönetimi'),
+    'timeframes': ('timeframes', 'Çoklu zaman dilimi önbelleği'),
+    'tokens': ('generation', 'Öğrenilen token bütçeleri'),
+}
+
+
+def usage():
+    lines = ['Kullanım: latu <komut> [argümanlar]', '', 'Komutlar:']
+    lines += [f"  {name:<12}{description}" for name, (_, description) in COMMANDS.items()]
+    lines += ['', "Komut argümanları için: latu <komut> --help"]
+    return '\n'.join(lines)
+
+def main(argv=None):
+    """🧭 Alt komutun modülünü yükle ve main()'ini kendi argümanlarıyla çalıştır"""
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Bilinmeyen komut: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    # argparse prog adı ve modülün argv okuması için
+    sys.argv = [f'latu {command}'] + args
+    return module.main()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔌 LLM Backend Katmanı
+LATU Trading System - LLM Backend Pipeline
+
+Aşama fonksiyonları (GPT, Claude, Final) API'ye doğrudan değil bu katman
+üzerinden gider. Böylece aynı zincir canlı API ile ya da tamamen offline
+mock backend ile çalıştırılabilir.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+# Desteklenen backend isimleri (LATU_LLM_BACKEND ortam değişkeni)
+BACKEND_ENV = 'LATU_LLM_BACKEND'
+DEFAULT_BACKEND = 'live'
+
+# Statik system prompt'lar için sağlayıcı prompt cache'i (Anthropic cache_control)
+PROMPT_CACHE_ENV = 'LATU_PROMPT_CACHE'
+
+
+def prompt_cache_enabled():
+    """🧊 Provider prompt cache'i açık mı (varsayılan: açık)"""
+    return os.environ.get(PROMPT_CACHE_ENV, 'on').lower() not in ('0', 'off', 'false', 'no')
+
+
+class LLMText(str):
+    """📝 Model ve token kullanımını taşıyan completion metni"""
+
+    def __new__(cls, text, model=None, usage=None):
+        value = super().__new__(cls, text)
+        value.model = model
+        value.usage = usage
+        return value
+
+
+class LiveBackend:
+    """🌐 Gerçek OpenAI / Anthropic API backend'i"""
+
+    def __init__(self):
+        self._anthropic_client = None
+
+    def warm(self):
+        """🔥 SDK'ları import et ve client'ı kur (uzun ömürlü worker başlangıcında)"""
+
+        if os.environ.get('OPENAI_API_KEY'):
+            self._openai_kwargs('gpt-4', None, '', 1, None)
+        if os.environ.get('ANTHROPIC_API_KEY'):
+            self._anthropic_kwargs('claude-3-sonnet-20240229', None, '', 1, None)
+
+    def _openai_kwargs(self, model, system, prompt, max_tokens, temperature):
+        import openai
+
+        # OpenAI API ayarları
+        openai.api_key = os.environ['OPENAI_API_KEY']
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        return openai, {
+            'model': model,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+
+    def _anthropic_kwargs(self, model, system, prompt, max_tokens, temperature):
+        import anthropic
+
+        # Anthropic client'ı tek sefer kur, sonraki çağrılarda tekrar kullan
+        if self._anthropic_client is None:
+            self._anthropic_client = anthropic.Anthropic(api_key=os.environ['ANTHROPIC_API_KEY'])
+
+        kwargs = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'messages': [{"role": "user", "content": prompt}]
+        }
+        if system and prompt_cache_enabled():
+            # Statik system bölümü her istekte aynı önek: cache'ten okunur
+            kwargs['system'] = [{'type': 'text', 'text': system, 'cache_control': {'type': 'ephemeral'}}]
+        elif system:
+            kwargs['system'] = system
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+
+        return self._anthropic_client, kwargs
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """🌐 Tek bir completion çağrısı yap ve metni döndür"""
+
+        from generation import EARLY_STOP_ALL, early_stop_mode
+
+        if early_stop_mode() == EARLY_STOP_ALL:
+            # Akışla alınır ki format tamamlanınca üretim kesilebilsin (usage yerel sayımla tahmin edilir)
+            return LLMText(''.join(self.stream(stage, provider, model, system, prompt, max_tokens, temperature)),
+                           model, None)
+
+        if provider == 'openai':
+            openai, kwargs = self._openai_kwargs(model, system, prompt, max_tokens, temperature)
+            response = openai.ChatCompletion.create(**kwargs)
+            # Statik system mesajı önde olduğu için OpenAI prefix cache'i otomatik devreye girer
+            details = response.usage.get('prompt_tokens_details') or {}
+            usage = {
+                'input_tokens': response.usage.prompt_tokens,
+                'output_tokens': response.usage.completion_tokens,
+                'cached_input_tokens': details.get('cached_tokens')
+            }
+            return LLMText(response.choices[0].message.content, model, usage)
+
+        if provider == 'anthropic':
+            client, kwargs = self._anthropic_kwargs(model, system, prompt, max_tokens, temperature)
+            response = client.messages.create(**kwargs)
+            usage = {
+                'input_tokens': response.usage.input_tokens,
+                'output_tokens': response.usage.output_tokens,
+                'cached_input_tokens': getattr(response.usage, 'cache_read_input_tokens', None)
+            }
+            return LLMText(response.content[0].text, model, usage)
+
+        raise ValueError(f"Bilinmeyen provider: {provider}")
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📡 Provider streaming API'si ile metin parçalarını üret (format tamamlanınca kesilir)"""
+
+        from generation import EARLY_STOP_OFF, early_stop_mode, watch
+
+        chunks = self._stream(stage, provider, model, system, prompt, max_tokens, temperature)
+        if early_stop_mode() == EARLY_STOP_OFF:
+            return chunks
+        return watch(stage, chunks)
+
+    def _stream(self, stage, provider, model, system, prompt, max_tokens, temperature):
+        if provider == 'openai':
+            openai, kwargs = self._openai_kwargs(model, system, prompt, max_tokens, temperature)
+            response = openai.ChatCompletion.create(stream=True, **kwargs)
+            try:
+                for chunk in response:
+                    delta = chunk.choices[0].delta.get('content')
+                    if delta:
+                        yield delta
+            finally:
+                # Akış erken kapatılırsa (hedge iptali, erken durdurma) HTTP yanıtı da kapanır
+                close = getattr(response, 'close', None)
+                if close is not None:
+                    close()
+            return
+
+        if provider == 'anthropic':
+            client, kwargs = self._anthropic_kwargs(model, system, prompt, max_tokens, temperature)
+            with client.messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    yield text
+            return
+
+        raise ValueError(f"Bilinmeyen provider: {provider}")
+
+
+# Mock yanıt şablonları - gerçek çıktı formatlarını taklit eder
+MOCK_GPT_RESPONSE = """### 🎯 TRADING DECISION TABLE
+| Aksiyon | Tetik Seviye | Stop Loss | Hedef | Pozisyon | Olasılık |
+|---------|--------------|-----------|-------|----------|----------|
+| 🟢 **AL** | {up:.2f} geçerse | {stop_long:.2f} | {target_long:.2f} | %0.5 | %55 |
+| 🔴 **SAT** | {down:.2f} altına düşerse | {stop_short:.2f} | {target_short:.2f} | %0.3 | %30 |
+| 🟡 **BEKLE** | {down:.2f} - {up:.2f} arası | - | - | - | %15 |
+| 🚪 **ÇIKIŞ** | Elinde varsa | {invalid:.2f} | - | Tümü | %10 |
+
+### 🚨 KRİTİK SEVİYELER
+- 💰 **Son Fiyat**: ${price:.2f}
+- 🔴 **Üst Direnç**: {resistance:.2f} (Red beklenir)
+- 🟢 **Alt Destek**: {support:.2f} (Alım fırsatı)
+- ⚠️ **Geçersizlik**: {invalid:.2f} (Strateji iptal)
+
+### ⚡ ACİL UYARILAR
+- 🚨 **Risk**: Mock backend - gerçek piyasa riski değerlendirilmedi
+- ⏰ **Zaman**: 2-4 saat
+- 🎯 **Fırsat**: {up:.2f} üzeri kapanış
+
+### 📊 ÖNCELİK SIRASI
+1. 🥇 **EN İYİ**: {up:.2f} kırılımında AL
+2. 🥈 **İKİNCİ**: {down:.2f} altında SAT
+3. 🥉 **ÜÇÜNCÜ**: Aralıkta BEKLE"""
+
+MOCK_CLAUDE_RESPONSE = """🤖 Claude Teknik Analiz - MOCK
+
+📊 **GPT İlk Değerlendirmesi Alındı**
+- GPT Kararı: AL
+- İlk momentum: Pozitif
+
+🧠 **Claude Derinlemesine Analiz:**
+
+**Teknik Göstergeler:**
+- RSI: 58 - Nötr/pozitif
+- MACD: Pozitif momentum
+- Volume Profil: Normal
+- Bollinger Bands: Daralma
+
+**Fiyat Seviyeleri:**
+- Destek: ${support:.2f}
+- Direnç: ${resistance:.2f}
+- Entry: ${up:.2f}
+- Stop Loss: ${stop_long:.2f}
+
+**Claude Risk Değerlendirmesi:**
+- Risk Seviyesi: Orta - mock backend
+- R/R Oranı: 1:2
+- Güvenilirlik Oranı: %65
+- Position Size Önerisi: %0.5
+
+**Market Psychology & Sentiment:**
+- Piyasa Duygusu: Neutral
+- Volume-Price İlişkisi: Convergence
+- Trend Gücü: Orta
+
+**Claude Kararı:** KOŞULLU AL
+
+**Stratejik Notlar:**
+- {resistance:.2f} direnci izlenmeli
+- Mock backend çıktısıdır
+- {down:.2f} altı senaryo iptal"""
+
+MOCK_FINAL_RESPONSE = """📊 **GPT-CLAUDE KARŞILAŞTIRMA TABLOSU - MOCK**
+
+| **KRİTER** | **GPT ANALİZİ** | **CLAUDE ANALİZİ** | **FARK/YORUM** |
+|------------|-----------------|-------------------|----------------|
+| **Karar** | AL | KOŞULLU AL | Uyumlu |
+| **Entry Seviyesi** | {up:.2f} | {up:.2f} | Aynı |
+| **Stop Loss** | {stop_long:.2f} | {stop_long:.2f} | Aynı |
+| **Hedef Seviye** | {target_long:.2f} | {resistance:.2f} | Claude daha temkinli |
+
+**🏆 FİNAL KARAR:**
+
+**Önerilen Strateji:** AL
+**Güvenilirlik:** %60
+**Pozisyon Büyüklüğü:** %0.5
+**Entry:** ${up:.2f}
+**Stop Loss:** ${stop_long:.2f}
+**Take Profit:** ${target_long:.2f}
+
+**⚡ HIZLI AKSİYON:**
+{up:.2f} kırılımında küçük pozisyonla AL
+
+**💡 SONUÇ:**
+Mock backend final değerlendirmesi"""
+
+MOCK_RESPONSES = {
+    'gpt': MOCK_GPT_RESPONSE,
+    'claude': MOCK_CLAUDE_RESPONSE,
+    'final': MOCK_FINAL_RESPONSE
+}
+
+_PRICE_PATTERN = re.compile(r'\$([\d,]+(?:\.\d+)?)|"last_price":([\d.]+)')
+
+
+class MockBackend:
+    """🧪 Offline test için sahte LLM backend'i"""
+
+    def __init__(self, latency=0.0, responses=None, default_price=100.0):
+        self.latency = latency
+        self.responses = dict(MOCK_RESPONSES)
+        if responses:
+            self.responses.update(responses)
+        self.default_price = default_price
+        self.calls = []
+
+    def _reference_price(self, prompt):
+        """💰 Prompt içindeki ilk dolar fiyatını referans al"""
+        match = _PRICE_PATTERN.search(prompt)
+        if match:
+            try:
+                return float((match.group(1) or match.group(2)).replace(',', ''))
+            except ValueError:
+                pass
+        return self.default_price
+
+    def _render(self, stage, provider, model, prompt):
+        """🧪 Aşamaya göre şablon yanıtı doldur"""
+
+        self.calls.append({'stage': stage, 'provider': provider, 'model': model})
+
+        price = self._reference_price(prompt)
+        levels = {
+            'price': price,
+            'up': price * 1.005,
+            'down': price * 0.995,
+            'stop_long': price * 0.99,
+            'stop_short': price * 1.01,
+            'target_long': price * 1.02,
+            'target_short': price * 0.98,
+            'resistance': price * 1.015,
+            'support': price * 0.985,
+            'invalid': price * 0.98
+        }
+        return self.responses[stage].format(**levels)
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """🧪 Aşamaya göre şablon yanıt döndür"""
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        text = self._render(stage, provider, model, prompt)
+        # Kaba token tahmini (~4 karakter/token)
+        usage = {
+            'input_tokens': (len(system or '') + len(prompt)) // 4,
+            'output_tokens': len(text) // 4
+        }
+        return LLMText(text, model, usage)
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None, chunk_size=24):
+        """📡 Şablon yanıtı parça parça üret (gecikme parçalara bölünür)"""
+
+        text = self._render(stage, provider, model, prompt)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+
+class RecordingBackend:
+    """📼 Başka bir backend'in yanıtlarını JSONL dosyasına kaydeden katman"""
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _append(self, stage, key, text, model, usage):
+        record = {'stage': stage, 'key': key, 'model': model, 'usage': usage, 'text': str(text)}
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📼 Çağrıyı geçir ve yanıtı kaydet"""
+
+        from response_cache import cache_key
+
+        text = self.backend.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+        self._append(stage, cache_key(provider, model, system, prompt, max_tokens, temperature),
+                     text, model, getattr(text, 'usage', None))
+        return text
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📼 Akışı geçir, bitince tam metni kaydet"""
+
+        from response_cache import cache_key
+
+        chunks = []
+        for chunk in self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature):
+            chunks.append(chunk)
+            yield chunk
+        self._append(stage, cache_key(provider, model, system, prompt, max_tokens, temperature),
+                     ''.join(chunks), model, None)
+
+
+class RecordedBackend:
+    """⏯️ Kaydedilmiş yanıtları (RecordingBackend JSONL'i) tekrar oynatan backend"""
+
+    def __init__(self, path, fallback=None):
+        self.fallback = fallback
+        self.counters = {'hits': 0, 'misses': 0}
+        self._responses = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._responses[record['key']] = record
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """⏯️ Aynı girdinin kaydını döndür; yoksa fallback (yoksa KeyError)"""
+
+        from response_cache import cache_key
+
+        record = self._responses.get(cache_key(provider, model, system, prompt, max_tokens, temperature))
+        if record is None:
+            self.counters['misses'] += 1
+            if self.fallback is None:
+                raise KeyError(f"Kayıtlı yanıt yok: {stage}/{model}")
+            return self.fallback.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+
+        self.counters['hits'] += 1
+        return LLMText(record['text'], record.get('model') or model, record.get('usage'))
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📡 Kaydı tek parça olarak üret"""
+        yield self.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+
+
+def get_backend(name=None):
+    """🔌 İsimden (veya LATU_LLM_BACKEND'den) backend oluştur"""
+
+    from response_cache import cache_from_env
+    from router import router_from_env
+
+    name = name or os.environ.get(BACKEND_ENV, DEFAULT_BACKEND)
+
+    if name == 'live':
+        backend = LiveBackend()
+    elif name == 'mock':
+        backend = MockBackend()
+    else:
+        raise ValueError(f"Bilinmeyen LLM backend: {name}")
+
+    # LATU_ROUTER / LATU_ROUTES ayarlıysa hedge + fallback, LATU_CACHE ayarlıysa yanıt cache'i ile sar
+    return cache_from_env(router_from_env(backend))
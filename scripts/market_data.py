@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 Piyasa Verisi ve Gösterge Hesaplama Modülü
+LATU Trading System - Market Data Pipeline
+
+Dakikalık OHLCV mumlarını CSV/Parquet dosyasından yükler ve EMA, RSI,
+MACD, Bollinger genişliği, 4 saatlik volatilite ve EMA mesafesini
+vektörel olarak hesaplar. Prompt'lar LLM'e gösterge uydurtmak yerine bu
+gerçek değerleri kullanır.
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+# Gösterge parametreleri artımlı motorla paylaşılır
+from indicator_params import (
+    WINDOW_MINUTES, EMA_FAST, EMA_SLOW, RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+    BOLLINGER_PERIOD, BOLLINGER_STD, VOLATILITY_MINUTES, format_indicator_lines
+)
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+TIMESTAMP_COLUMNS = ['timestamp', 'time', 'date', 'datetime', 'open_time']
+
+
+def load_candles(path, symbol=None):
+    """📂 CSV veya Parquet dosyasından dakikalık mumları yükle"""
+
+    if str(path).lower().endswith(('.parquet', '.pq')):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+
+    # Çok sembollü dosyalarda sembole göre filtrele
+    if symbol and 'symbol' in frame.columns:
+        frame = frame[frame['symbol'].astype(str).str.upper() == symbol.upper()]
+    if frame.empty:
+        raise ValueError(f"{symbol} için mum yok: {path}" if symbol else f"Dosyada mum yok: {path}")
+
+    timestamp_column = next((column for column in TIMESTAMP_COLUMNS if column in frame.columns), None)
+    if timestamp_column is None:
+        raise ValueError(f"Zaman damgası kolonu bulunamadı: {path}")
+
+    missing = [column for column in OHLCV_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Eksik OHLCV kolonları: {', '.join(missing)}")
+
+    timestamps = frame[timestamp_column]
+    if pd.api.types.is_numeric_dtype(timestamps):
+        # Epoch milisaniye (Binance) veya saniye
+        unit = 'ms' if timestamps.max() > 1e11 else 's'
+        index = pd.to_datetime(timestamps, unit=unit, utc=True)
+    else:
+        index = pd.to_datetime(timestamps, utc=True)
+
+    candles = frame[OHLCV_COLUMNS].astype('float64')
+    candles.index = pd.DatetimeIndex(index, name='timestamp')
+    return candles.sort_index()
+
+def last_window(data, minutes=WINDOW_MINUTES):
+    """🪟 Son N dakikalık pencereyi döndür"""
+    return data.iloc[-minutes:]
+
+def ema(values, span):
+    """📉 Üstel hareketli ortalama (NumPy dizi)"""
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+def rsi(close, period=RSI_PERIOD):
+    """📊 Wilder RSI (NumPy dizi)"""
+
+    delta = np.diff(close, prepend=close[0])
+    gains = np.clip(delta, 0, None)
+    losses = np.clip(-delta, 0, None)
+
+    # Wilder yumuşatması = alpha 1/period olan EMA
+    avg_gain = pd.Series(gains).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    avg_loss = pd.Series(losses).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        values = 100.0 - 100.0 / (1.0 + rs)
+    values[avg_loss == 0] = 100.0
+    values[(avg_loss == 0) & (avg_gain == 0)] = 50.0
+    return values
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """📈 MACD çizgisi, sinyal ve histogram"""
+
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def bollinger_width(close, period=BOLLINGER_PERIOD, num_std=BOLLINGER_STD):
+    """🎚️ Bollinger bant genişliği (orta banda göre %)"""
+
+    series = pd.Series(close)
+    middle = series.rolling(period, min_periods=1).mean()
+    std = series.rolling(period, min_periods=1).std(ddof=0)
+    return (2 * num_std * std / middle * 100).to_numpy()
+
+def compute_indicators(data):
+    """🧮 Pencere için son gösterge değerlerini hesapla"""
+
+    close = data['close'].to_numpy()
+    high = data['high'].to_numpy()
+    low = data['low'].to_numpy()
+    volume = data['volume'].to_numpy()
+
+    ema_fast = ema(close, EMA_FAST)
+    ema_slow = ema(close, EMA_SLOW)
+    rsi_values = rsi(close)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_width = bollinger_width(close)
+
+    last_close = close[-1]
+    recent = slice(-VOLATILITY_MINUTES, None)
+    day_high = high.max()
+    day_low = low.min()
+
+    return {
+        'bars': int(len(close)),
+        'start': str(data.index[0]),
+        'end': str(data.index[-1]),
+        'close': float(last_close),
+        'change_pct': float((last_close / close[0] - 1) * 100),
+        'volume': float(volume.sum()),
+        'day_high': float(day_high),
+        'day_low': float(day_low),
+        'range_position_pct': float((last_close - day_low) / (day_high - day_low) * 100) if day_high > day_low else 50.0,
+        'ema_fast': float(ema_fast[-1]),
+        'ema_slow': float(ema_slow[-1]),
+        'ema_distance': float(last_close - ema_slow[-1]),
+        'rsi': float(rsi_values[-1]),
+        'macd': float(macd_line[-1]),
+        'macd_signal': float(macd_signal[-1]),
+        'macd_hist': float(macd_hist[-1]),
+        'bollinger_width_pct': float(bb_width[-1]),
+        'volatility_4h_pct': float((high[recent].max() - low[recent].min()) / close[recent][0] * 100)
+    }
+
+def compute_indicator_series(data, window=WINDOW_MINUTES):
+    """🧮 Tüm seri boyunca bar başına göstergeler (backtest için tek geçişte, vektörel)"""
+
+    close = data['close']
+    high = data['high']
+    low = data['low']
+    close_values = close.to_numpy()
+
+    day_high = high.rolling(window, min_periods=1).max()
+    day_low = low.rolling(window, min_periods=1).min()
+    day_span = (day_high - day_low).to_numpy()
+    window_open = close.shift(window - 1).fillna(close.iloc[0])
+    recent_open = close.shift(VOLATILITY_MINUTES - 1).fillna(close.iloc[0])
+
+    ema_fast = ema(close_values, EMA_FAST)
+    ema_slow = ema(close_values, EMA_SLOW)
+    macd_line, macd_signal, macd_hist = macd(close_values)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        range_position = np.where(day_span > 0, (close_values - day_low.to_numpy()) / day_span * 100, 50.0)
+
+    return pd.DataFrame({
+        'close': close_values,
+        'change_pct': ((close / window_open - 1) * 100).to_numpy(),
+        'volume': data['volume'].rolling(window, min_periods=1).sum().to_numpy(),
+        'day_high': day_high.to_numpy(),
+        'day_low': day_low.to_numpy(),
+        'range_position_pct': range_position,
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'ema_distance': close_values - ema_slow,
+        'rsi': rsi(close_values),
+        'macd': macd_line,
+        'macd_signal': macd_signal,
+        'macd_hist': macd_hist,
+        'bollinger_width_pct': bollinger_width(close_values),
+        'volatility_4h_pct': ((high.rolling(VOLATILITY_MINUTES, min_periods=1).max()
+                               - low.rolling(VOLATILITY_MINUTES, min_periods=1).min()) / recent_open * 100).to_numpy()
+    }, index=data.index)
+
+def load_indicators(path, symbol=None, minutes=WINDOW_MINUTES):
+    """📂 Dosyadan son pencereyi yükleyip göstergeleri ve zaman dilimi trendlerini hesapla"""
+
+    from timeframes import timeframe_snapshot
+
+    candles = load_candles(path, symbol)
+    data = last_window(candles, minutes)
+    indicators = compute_indicators(data)
+    # Üst dilim EMA'ları için pencereden uzun geçmiş kullanılır
+    indicators['timeframes'] = timeframe_snapshot(candles, symbol or '')
+    return data, indicators
+
+def main():
+    """📈 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Piyasa Verisi Gösterge Hesaplama')
+    parser.add_argument('--data-file', required=True, help='Dakikalık OHLCV CSV/Parquet dosyası')
+    parser.add_argument('--symbol', help='Çok sembollü dosyada filtrelenecek sembol')
+    parser.add_argument('--window', type=int, default=WINDOW_MINUTES, help='Pencere uzunluğu (dakika)')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        data, indicators = load_indicators(args.data_file, args.symbol, args.window)
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit(1)
+    loaded = time.perf_counter()
+    compute_indicators(data)
+    computed = time.perf_counter()
+
+    print(f"📈 {indicators['bars']} mum: {indicators['start']} - {indicators['end']}")
+    print(format_indicator_lines(indicators))
+    print(f"⏱️ Yükleme: {(loaded - started) * 1000:.1f}ms, hesaplama: {(computed - loaded) * 1000:.2f}ms")
+
+if __name__ == "__main__":
+    main()
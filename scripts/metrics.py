@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 Metrik ve Yapılandırılmış Log Katmanı
+LATU Trading System - Metrics Pipeline
+
+Her aşama fonksiyonu ve HTTP çağrısı etrafında süre, ilk token süresi
+(TTFT), giriş/çıkış token'ları, model başına tahmini maliyet, cache
+hit'leri ve retry'lar kaydedilir. Metrikler yerel bir porttan Prometheus
+text formatında (LATU_METRICS_PORT) ve run başına JSON satırları olarak
+(LATU_METRICS_FILE) dışa aktarılır. `log()` çıktıları varsayılan olarak
+eski emoji satırlarıyla aynıdır; LATU_LOG_FORMAT=json ile JSON olur.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from prompts import count_tokens
+
+# Model başına fiyat (USD / 1M token: giriş, çıkış)
+MODEL_PRICES = {
+    'gpt-4': (30.0, 60.0),
+    'gpt-3.5-turbo': (0.5, 1.5),
+    'claude-3-sonnet-20240229': (3.0, 15.0),
+    'claude-3-haiku-20240307': (0.25, 1.25)
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'latu_stage_seconds': ('histogram', 'Aşama fonksiyonu toplam süresi'),
+    'latu_stage_phase_seconds': ('histogram', 'Aşama içi faz süresi (prompt, llm, store)'),
+    'latu_stage_failures_total': ('counter', 'Sonuç döndürmeyen aşama çağrıları'),
+    'latu_llm_calls_total': ('counter', 'LLM çağrı sayısı'),
+    'latu_llm_ttft_seconds': ('histogram', 'İlk token süresi'),
+    'latu_llm_tokens_total': ('counter', 'LLM token sayısı (direction=input/output/cached)'),
+    'latu_llm_cost_usd_total': ('counter', 'Tahmini LLM maliyeti (USD)'),
+    'latu_cache_requests_total': ('counter', 'Yanıt cache istekleri (result=hit/miss)'),
+    'latu_http_seconds': ('histogram', 'Webhook / dispatch teslim süresi'),
+    'latu_http_retries_total': ('counter', 'HTTP yeniden denemeleri'),
+    'latu_http_failures_total': ('counter', 'Teslim edilemeyen HTTP gönderimleri'),
+    'latu_worker_requests_total': ('counter', 'Worker istekleri (status=done/retry/failed)'),
+    'latu_worker_request_seconds': ('histogram', 'Worker istek işleme süresi'),
+    'latu_coalesce_total': ('counter', 'Birleştirme kapısı istekleri (outcome=executed/coalesced)'),
+    'latu_router_hedges_total': ('counter', 'p95 aşıldığında gönderilen hedge istekleri'),
+    'latu_router_cancelled_total': ('counter', 'Kazanamadığı için akışı kapatılan (iptal edilen) çağrılar'),
+    'latu_router_fallbacks_total': ('counter', 'Hata sonrası sonraki modele düşen çağrılar'),
+    'latu_router_wins_total': ('counter', 'Yanıtı kullanılan model'),
+    'latu_router_timeouts_total': ('counter', 'Süre sınırını aşan aşama çağrıları'),
+    'latu_generation_events_total': ('counter', 'Üretim kontrolü (event=early_stop/continuation)')
+}
+
+_span = contextvars.ContextVar('latu_span', default=None)
+_run_id = contextvars.ContextVar('latu_run_id', default=None)
+
+
+def model_cost(model, input_tokens, output_tokens):
+    """💵 MODEL_PRICES'a göre çağrı maliyeti (USD)"""
+
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return ((input_tokens or 0) * input_price + (output_tokens or 0) * output_price) / 1e6
+
+
+class MetricsRegistry:
+    """📊 Süreç içi sayaç / histogram deposu"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name, amount=1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def value(self, name, **labels):
+        """🔎 Sayaç değeri (histogram için gözlem sayısı)"""
+        key = self._key(name, labels)
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            histogram = self._histograms.get(key)
+            return histogram['count'] if histogram else 0
+
+    def total(self, name):
+        """➕ Bir sayacın tüm etiketlerdeki toplamı"""
+        with self._lock:
+            return sum(value for (metric, _), value in self._counters.items() if metric == name)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """📝 Prometheus text exposition formatı"""
+
+        def label_text(labels, extra=None):
+            pairs = list(labels) + (extra or [])
+            if not pairs:
+                return ''
+            escaped = (f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                       for k, v in pairs)
+            return '{' + ','.join(escaped) + '}'
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']}
+                          for key, h in self._histograms.items()}
+
+        lines = []
+        names = sorted({key[0] for key in counters} | {key[0] for key in histograms})
+        for name in names:
+            kind, help_text = METRIC_HELP.get(name, ('counter' if any(k[0] == name for k in counters)
+                                                     else 'histogram', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{label_text(labels)} {value:g}")
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(self.buckets, histogram['buckets']):
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', f'{bound:g}')])} {count}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# 🪵 Yapılandırılmış log
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'event': getattr(record, 'event', None),
+            'message': record.getMessage()
+        }
+        span = _span.get()
+        if span:
+            payload.update(run_id=span['run_id'], stage=span['stage'], symbol=span['symbol'])
+        elif _run_id.get():
+            payload['run_id'] = _run_id.get()
+        payload.update(getattr(record, 'fields', None) or {})
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class _StdoutHandler(logging.StreamHandler):
+    """Her kayıtta güncel sys.stdout'a yazar (redirect_stdout ile uyumlu)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+logger = logging.getLogger('latu')
+
+def _configure_logger():
+    if logger.handlers:
+        return
+    handler = _StdoutHandler()
+    if os.environ.get('LATU_LOG_FORMAT', '').lower() == 'json':
+        handler.setFormatter(_JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get('LATU_LOG_LEVEL', 'INFO').upper())
+    logger.propagate = False
+
+def log(message, event=None, level=logging.INFO, **fields):
+    """🪵 Metin mesajı + makine okunur alanlar (LATU_LOG_FORMAT=json ile JSON satırı)"""
+
+    _configure_logger()
+    logger.log(level, message, extra={'event': event, 'fields': fields})
+
+
+# 🧵 Run / aşama bağlamı
+def current_run_id():
+    """🔗 Etkin run kimliği (run_context veya aşama içinden)"""
+    span = _span.get()
+    return span['run_id'] if span else _run_id.get()
+
+@contextlib.contextmanager
+def run_context(symbol=None, run_id=None):
+    """🔗 Bir sembolün uçtan uca run'ı; aşama kayıtları aynı run_id'yi taşır"""
+
+    run_id = run_id or uuid.uuid4().hex[:16]
+    token = _run_id.set(run_id)
+    started = time.perf_counter()
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
+        _export({'type': 'run', 'run_id': run_id, 'symbol': symbol,
+                 'seconds': round(time.perf_counter() - started, 6)})
+
+@contextlib.contextmanager
+def phase(name):
+    """⏱️ Etkin aşamanın içindeki bir fazı ölç (store, file, ...)"""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        span = _span.get()
+        if span is not None:
+            span['phases'][name] = span['phases'].get(name, 0.0) + seconds
+            registry.observe('latu_stage_phase_seconds', seconds, stage=span['stage'], phase=name)
+
+def instrument_stage(stage):
+    """🎯 Aşama fonksiyonunu süre / faz / token ölçümüyle sar"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(symbol, *args, **kwargs):
+            span = {
+                'stage': stage, 'symbol': symbol, 'run_id': _run_id.get() or uuid.uuid4().hex[:16],
+                'started': time.perf_counter(), 'phases': {}, 'calls': []
+            }
+            token = _span.set(span)
+            result = None
+            try:
+                result = func(symbol, *args, **kwargs)
+                return result
+            finally:
+                _span.reset(token)
+                _finish_stage(span, result is not None)
+        return wrapper
+    return decorator
+
+def _finish_stage(span, ok):
+    seconds = time.perf_counter() - span['started']
+    registry.observe('latu_stage_seconds', seconds, stage=span['stage'])
+    if not ok:
+        registry.inc('latu_stage_failures_total', stage=span['stage'])
+
+    calls = span['calls']
+    _export({
+        'type': 'stage',
+        'run_id': span['run_id'],
+        'symbol': span['symbol'],
+        'stage': span['stage'],
+        'ok': ok,
+        'seconds': round(seconds, 6),
+        'phases': {name: round(value, 6) for name, value in span['phases'].items()},
+        'ttft': calls[0]['ttft'] if calls else None,
+        'input_tokens': sum(call['input_tokens'] or 0 for call in calls),
+        'output_tokens': sum(call['output_tokens'] or 0 for call in calls),
+        'cached_input_tokens': sum(call['cached_input_tokens'] or 0 for call in calls),
+        'cost_usd': round(sum(call['cost_usd'] for call in calls), 6),
+        'cache_hits': sum(1 for call in calls if call.get('cache') == 'hit'),
+        'models': sorted({call['model'] for call in calls})
+    })
+
+
+# 🔌 LLM çağrıları
+class InstrumentedBackend:
+    """📊 Backend çağrılarında TTFT, token ve maliyet kaydeden katman"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        # stats(), calls vb. sarılan backend'den gelir
+        return getattr(self.backend, name)
+
+    def _record(self, stage, model, started, ttft, text, usage, cache=None):
+        seconds = time.perf_counter() - started
+        estimated = usage is None
+        if estimated:
+            # Streaming yanıtlarda usage yok: yerel token sayımıyla tahmin
+            usage = {'input_tokens': None, 'output_tokens': count_tokens(text, model)}
+        cost = model_cost(model, usage.get('input_tokens'), usage.get('output_tokens'))
+
+        registry.inc('latu_llm_calls_total', stage=stage, model=model)
+        registry.observe('latu_llm_ttft_seconds', ttft, stage=stage, model=model)
+        for direction, key in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                               ('cached', 'cached_input_tokens')):
+            if usage.get(key):
+                registry.inc('latu_llm_tokens_total', usage[key], stage=stage, model=model, direction=direction)
+        if cost:
+            registry.inc('latu_llm_cost_usd_total', cost, stage=stage, model=model)
+
+        span = _span.get()
+        if span is not None:
+            if not span['calls']:
+                # Aşama başından ilk LLM çağrısına kadar geçen süre = prompt hazırlığı
+                span['phases']['prompt'] = started - span['started']
+            span['phases']['llm'] = span['phases'].get('llm', 0.0) + seconds
+            registry.observe('latu_stage_phase_seconds', seconds, stage=stage, phase='llm')
+            span['calls'].append({'model': model, 'seconds': seconds, 'ttft': round(ttft, 6),
+                                  'input_tokens': usage.get('input_tokens'),
+                                  'output_tokens': usage.get('output_tokens'),
+                                  'cached_input_tokens': usage.get('cached_input_tokens'),
+                                  'estimated': estimated, 'cost_usd': cost,
+                                  'cache': cache})
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        started = time.perf_counter()
+        text = self.backend.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+        # Tam yanıt API'sinde ilk token = yanıtın gelişi; yönlendirici başka model seçmiş olabilir
+        self._record(stage, getattr(text, 'model', None) or model, started, time.perf_counter() - started, text,
+                     getattr(text, 'usage', None), getattr(text, 'cache', None))
+        return text
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        started = time.perf_counter()
+        ttft = None
+        cache = None
+        chunks = []
+        for chunk in self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                cache = getattr(chunk, 'cache', None)
+            chunks.append(chunk)
+            yield chunk
+        self._record(stage, model, started, ttft if ttft is not None else time.perf_counter() - started,
+                     ''.join(chunks), {} if cache == 'hit' else None, cache)
+
+def instrument(backend):
+    """📊 Backend'i (bir kez) metrik katmanıyla sar"""
+    return backend if isinstance(backend, InstrumentedBackend) else InstrumentedBackend(backend)
+
+def record_cache(stage, hit):
+    """🗄️ Cache hit / miss sayacı"""
+    registry.inc('latu_cache_requests_total', stage=stage, result='hit' if hit else 'miss')
+
+
+# 🔗 HTTP çağrıları
+def http_target(url):
+    """🏷️ URL'den etiket: dispatch / webhook"""
+    return 'dispatch' if '/dispatches' in url else 'webhook'
+
+def record_http(url, seconds, ok):
+    target = http_target(url)
+    registry.observe('latu_http_seconds', seconds, target=target)
+    if not ok:
+        registry.inc('latu_http_failures_total', target=target)
+
+def record_retry(url):
+    registry.inc('latu_http_retries_total', target=http_target(url))
+
+
+# 📤 Dışa aktarım
+_export_lock = threading.Lock()
+
+def _export(event):
+    """📄 LATU_METRICS_FILE ayarlıysa olayı JSON satırı olarak ekle"""
+
+    path = os.environ.get('LATU_METRICS_FILE')
+    if not path:
+        return
+    event = {'ts': round(time.time(), 3), **event}
+    directory = os.path.dirname(path)
+    with _export_lock:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+def _metrics_handler():
+    """🌐 /metrics handler sınıfı (http.server sadece serve() çağrılınca yüklenir)"""
+
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return _MetricsHandler
+
+_server = None
+
+def configure(port=None, path=None):
+    """⚙️ CLI bayraklarını uygula: JSONL dosyası ve /metrics portu"""
+
+    if path:
+        os.environ['LATU_METRICS_FILE'] = path
+    return serve(port)
+
+def summary():
+    """📊 Süreç boyunca toplanan LLM çağrı / token / maliyet özeti"""
+    return (f"📊 LLM çağrı: {registry.total('latu_llm_calls_total'):.0f}, "
+            f"token: {registry.total('latu_llm_tokens_total'):,.0f}, "
+            f"tahmini maliyet: ${registry.total('latu_llm_cost_usd_total'):.4f}")
+
+def serve(port=None, host='127.0.0.1'):
+    """🌐 /metrics uç noktasını arka planda aç (port yoksa LATU_METRICS_PORT)"""
+
+    global _server
+    port = port or os.environ.get('LATU_METRICS_PORT')
+    if not port or _server is not None:
+        return _server
+
+    from http.server import ThreadingHTTPServer
+    _server = ThreadingHTTPServer((host, int(port)), _metrics_handler())
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    log(f"📊 Metrikler: http://{host}:{_server.server_address[1]}/metrics", event='metrics_server',
+        port=_server.server_address[1])
+    return _server
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎼 Tek Süreç Pipeline Orkestratörü
+LATU Trading System - Orchestrator Pipeline
+
+GPT → Claude → Final aşamalarını tek Python sürecinde çalıştırır ve
+sonuçları aşamalar arasında bellekte aktarır. Eski repository_dispatch
+zinciri `--mode dispatch` ile hâlâ kullanılabilir. `--speculative` ile
+Claude, GPT'yi beklemeden aynı piyasa görüntüsüyle paralel başlar; iki
+bağımsız karar final aşamasında uzlaştırılır. Her aşamadan sonra run
+checkpoint'e yazılır; `--resume <run-id>` sadece eksik aşamaları çalıştırır.
+"""
+
+import argparse
+import contextvars
+import logging
+import time
+import metrics
+from metrics import log
+from llm_backend import get_backend
+from prefilter import PreFilter, DEFAULT_STATE_DIR as PREFILTER_DIR
+from stream_relay import StreamRelay
+from coalesce import coalescer_from_env, flight_key, ONE_SHOT_KINDS
+from checkpoint import open_checkpoint, resume_checkpoint, run_stage, CheckpointNotFound
+from gpt_analysis import gpt_first_analysis, trigger_claude_stage, send_result_to_dashboard, build_market_section
+from claude_analysis import claude_detailed_analysis
+from final_comparison import final_comparison_analysis, send_final_result_to_dashboard
+
+MODE_INLINE = 'inline'
+MODE_DISPATCH = 'dispatch'
+
+def run_pipeline(symbol, price, change, volume, webhook_url=None, backend=None, indicators=None, prefilter=None,
+                 stream=False, on_decision=None, narrative=None, speculative=False, run_id=None):
+    """
+    🎼 Üç aşamayı tek süreçte çalıştır ve sonuçları döndür (speculative: GPT ve Claude paralel).
+    run_id'nin checkpoint'i varsa tamamlanmış aşamalar yeniden çalıştırılmaz.
+    """
+
+    relays = {}
+    if stream:
+        relays = {stage: StreamRelay(symbol, stage, webhook_url, on_decision) for stage in ('gpt', 'claude', 'final')}
+
+    try:
+        with metrics.run_context(symbol, run_id) as run_id:
+            checkpoint = open_checkpoint(run_id, symbol, {'price': price, 'change': change, 'volume': volume})
+            results = _run_stages(symbol, price, change, volume, webhook_url, backend, indicators, prefilter, relays,
+                                  narrative, speculative, checkpoint)
+            if checkpoint is not None:
+                checkpoint.close(results)
+            results['run_id'] = run_id
+            return results
+    finally:
+        for relay in relays.values():
+            relay.close()
+
+def _run_stages(symbol, price, change, volume, webhook_url, backend, indicators, prefilter, relays, narrative=None,
+                speculative=False, checkpoint=None):
+    """🎼 GPT → Claude → Final sırası"""
+
+    backend = backend or get_backend()
+    results = {'symbol': symbol, 'gpt': None, 'claude': None, 'final': None, 'timings': {}, 'skipped': False}
+
+    # 0. Ön filtre: piyasa anlamlı değişmediyse önceki kararı döndür
+    if prefilter:
+        should_run, _, previous = prefilter.check(symbol, price, change, volume, indicators,
+                                                   required=('gpt', 'claude', 'final'))
+        if not should_run:
+            results.update(previous['results'])
+            results['skipped'] = True
+            if webhook_url:
+                send_final_result_to_dashboard(symbol, results['final'], webhook_url)
+            return results
+
+    # 1-2. GPT ve Claude: sıralı (Claude GPT kaydını alır) veya spekülatif paralel
+    run = _run_speculative if speculative else _run_serial
+    gpt_result, claude_result = run(symbol, price, change, volume, webhook_url, backend, indicators, relays, results,
+                                    checkpoint)
+    if not (gpt_result and claude_result):
+        return results
+
+    # 3. Final karşılaştırma
+    started = time.perf_counter()
+    final_result = run_stage(checkpoint, 'final', final_comparison_analysis, symbol, gpt_result, claude_result,
+                             backend=backend, relay=relays.get('final'), narrative=narrative)
+    results['timings']['final'] = time.perf_counter() - started
+
+    if not final_result:
+        log("❌ Final aşaması başarısız", event='pipeline_stopped', level=logging.ERROR, symbol=symbol, stage='final')
+        return results
+
+    results['final'] = final_result
+    if webhook_url:
+        send_final_result_to_dashboard(symbol, final_result, webhook_url)
+
+    if prefilter:
+        prefilter.record(symbol, price, change, volume, results, indicators)
+
+    return results
+
+def _run_serial(symbol, price, change, volume, webhook_url, backend, indicators, relays, results, checkpoint=None):
+    """🔗 GPT → Claude sırası (Claude prompt'u GPT karar kaydını içerir)"""
+
+    # 1. GPT ilk analiz
+    started = time.perf_counter()
+    gpt_result = run_stage(checkpoint, 'gpt', gpt_first_analysis, symbol, price, change, volume, backend=backend,
+                           indicators=indicators, relay=relays.get('gpt'))
+    results['timings']['gpt'] = time.perf_counter() - started
+
+    if not gpt_result:
+        log("❌ GPT aşaması başarısız, pipeline durduruldu", event='pipeline_stopped', level=logging.ERROR,
+            symbol=symbol, stage='gpt')
+        return None, None
+
+    results['gpt'] = gpt_result
+    if webhook_url:
+        send_result_to_dashboard(symbol, 'gpt-completed', gpt_result, webhook_url)
+
+    # 2. Claude detaylı analiz (GPT sonucu bellekten)
+    started = time.perf_counter()
+    claude_result = run_stage(checkpoint, 'claude', claude_detailed_analysis, symbol, gpt_result, backend=backend,
+                              indicators=indicators, relay=relays.get('claude'))
+    results['timings']['claude'] = time.perf_counter() - started
+
+    if not claude_result:
+        log("❌ Claude aşaması başarısız, pipeline durduruldu", event='pipeline_stopped', level=logging.ERROR,
+            symbol=symbol, stage='claude')
+        return gpt_result, None
+
+    results['claude'] = claude_result
+    if webhook_url:
+        send_result_to_dashboard(symbol, 'claude-completed', claude_result, webhook_url)
+
+    return gpt_result, claude_result
+
+def _run_speculative(symbol, price, change, volume, webhook_url, backend, indicators, relays, results,
+                     checkpoint=None):
+    """⚡ GPT ve Claude aynı piyasa görüntüsüyle paralel; uzlaştırma final aşamasında"""
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    market_section = build_market_section(symbol, price, change, volume, indicators=indicators)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # run_id bağlamı Claude thread'ine taşınır
+        claude_future = executor.submit(contextvars.copy_context().run, run_stage, checkpoint, 'claude',
+                                        claude_detailed_analysis, symbol, None, backend=backend,
+                                        indicators=indicators, relay=relays.get('claude'),
+                                        market_section=market_section)
+
+        gpt_result = run_stage(checkpoint, 'gpt', gpt_first_analysis, symbol, price, change, volume, backend=backend,
+                               indicators=indicators, relay=relays.get('gpt'))
+        results['timings']['gpt'] = time.perf_counter() - started
+        if gpt_result:
+            results['gpt'] = gpt_result
+            if webhook_url:
+                send_result_to_dashboard(symbol, 'gpt-completed', gpt_result, webhook_url)
+
+        claude_result = claude_future.result()
+        results['timings']['claude'] = time.perf_counter() - started
+
+    if claude_result:
+        results['claude'] = claude_result
+        if webhook_url:
+            send_result_to_dashboard(symbol, 'claude-completed', claude_result, webhook_url)
+
+    if not (gpt_result and claude_result):
+        failed = ' ve '.join(name for name, value in (('GPT', gpt_result), ('Claude', claude_result)) if not value)
+        log(f"❌ {failed} aşaması başarısız (spekülatif mod), pipeline durduruldu", event='pipeline_stopped',
+            level=logging.ERROR, symbol=symbol, stage=failed)
+    return gpt_result, claude_result
+
+def run_dispatch_chain(symbol, price, change, volume, webhook_url, backend=None, indicators=None):
+    """🔄 Eski mod: sadece GPT aşamasını çalıştır, kalanını dispatch ile tetikle"""
+
+    gpt_result = gpt_first_analysis(symbol, price, change, volume, backend=backend, indicators=indicators)
+
+    if gpt_result:
+        send_result_to_dashboard(symbol, 'gpt-completed', gpt_result, webhook_url)
+        trigger_claude_stage(symbol, gpt_result, webhook_url)
+
+    return gpt_result
+
+def main():
+    """🎼 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Tek Süreç Pipeline Orkestratörü')
+    parser.add_argument('--symbol', help='Trading sembolü')
+    parser.add_argument('--price', type=float, help='Güncel fiyat')
+    parser.add_argument('--change', type=float, help='Değişim yüzdesi')
+    parser.add_argument('--volume', type=float, help='Volume')
+    parser.add_argument('--webhook-url', help='Dashboard webhook URL')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help='Checkpoint\'teki tamamlanmış aşamaları kullanıp sadece eksikleri çalıştır')
+    parser.add_argument('--mode', choices=[MODE_INLINE, MODE_DISPATCH], default=MODE_INLINE,
+                        help='inline: tek süreç, dispatch: GitHub repository_dispatch zinciri')
+    parser.add_argument('--backend', choices=['live', 'mock'], help='LLM backend (varsayılan: LATU_LLM_BACKEND)')
+    parser.add_argument('--data-file', help='Dakikalık OHLCV CSV/Parquet dosyası (göstergeler için)')
+    parser.add_argument('--stream', action='store_true', help='Çıktıları streaming ile dashboard ve dosyaya aktar')
+    parser.add_argument('--prefilter', action='store_true', help='Piyasa değişmediyse LLM çağrılarını atla')
+    parser.add_argument('--prefilter-dir', default=PREFILTER_DIR, help='Ön filtre görüntülerinin klasörü')
+    parser.add_argument('--narrative', action='store_true', default=None,
+                        help='Final aşamasında yerel motor yerine LLM anlatılı karşılaştırma')
+    parser.add_argument('--speculative', action='store_true',
+                        help='Claude\'u GPT\'yi beklemeden aynı piyasa verisiyle paralel başlat')
+    parser.add_argument('--coalesce', choices=ONE_SHOT_KINDS,
+                        help='Aynı sembol için çalışan pipeline\'a bağlan (varsayılan: LATU_COALESCE; '
+                             'memory sadece worker.py serve içindir)')
+    parser.add_argument('--metrics-port', type=int, help='Prometheus /metrics portu (varsayılan: LATU_METRICS_PORT)')
+    parser.add_argument('--metrics-file', help='Aşama metriklerinin JSONL dosyası (varsayılan: LATU_METRICS_FILE)')
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics_port, args.metrics_file)
+
+    if args.resume:
+        if args.mode == MODE_DISPATCH:
+            parser.error('--resume sadece inline modda kullanılabilir')
+        try:
+            checkpoint = resume_checkpoint(args.resume)
+        except CheckpointNotFound as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+        # Eksik piyasa argümanları checkpoint'teki ilk girdilerden
+        args.symbol = args.symbol or checkpoint.symbol
+        for name in ('price', 'change', 'volume'):
+            if getattr(args, name) is None:
+                setattr(args, name, checkpoint.inputs.get(name))
+        log(f"📌 Devam edilen run: {args.resume} (tamamlanan: {', '.join(checkpoint.completed_stages()) or '-'})",
+            event='run_resumed', run=args.resume, completed=checkpoint.completed_stages())
+
+    missing = [name for name in ('symbol', 'price', 'change', 'volume') if getattr(args, name) is None]
+    if missing:
+        parser.error(f"gerekli argümanlar eksik: {', '.join('--' + name for name in missing)}")
+
+    log(f"🎼 LATU Pipeline Orkestratörü Başlatıldı: {args.symbol} (mod: {args.mode})", event='run_started',
+        stage='pipeline', symbol=args.symbol, mode=args.mode)
+
+    backend = get_backend(args.backend)
+
+    # OHLCV verisi verildiyse göstergeleri bir kez hesapla, iki aşama da kullanır
+    indicators = None
+    if args.data_file:
+        from market_data import load_indicators
+        try:
+            _, indicators = load_indicators(args.data_file, args.symbol)
+        except ValueError as e:
+            log(f"❌ {e}", event='input_error', level=logging.ERROR, error=str(e))
+            exit(1)
+
+    if args.mode == MODE_DISPATCH:
+        if not args.webhook_url:
+            parser.error('--mode dispatch için --webhook-url gerekli')
+
+        if not run_dispatch_chain(args.symbol, args.price, args.change, args.volume, args.webhook_url,
+                                  backend=backend, indicators=indicators):
+            log("❌ GPT analizi başarısız!", event='run_failed', level=logging.ERROR, stage='gpt')
+            exit(1)
+
+        log("🎯 GPT aşaması tamamlandı, Claude aşaması dispatch ile tetiklendi", event='run_completed', stage='gpt')
+        return
+
+    prefilter = PreFilter(args.prefilter_dir) if args.prefilter else None
+
+    def analyse(snapshot):
+        return run_pipeline(args.symbol, snapshot['price'], snapshot['change'], snapshot['volume'], args.webhook_url,
+                            backend=backend, indicators=indicators, prefilter=prefilter, stream=args.stream,
+                            narrative=args.narrative, speculative=args.speculative, run_id=args.resume)
+
+    # Birleştirme: aynı sembol için çalışan pipeline varsa onun sonucunu bekle
+    snapshot = {'price': args.price, 'change': args.change, 'volume': args.volume}
+    coalescer = coalescer_from_env(args.coalesce, one_shot=True)
+    if coalescer:
+        results, coalesced = coalescer.run(flight_key(args.symbol), snapshot, analyse)
+    else:
+        results, coalesced = analyse(snapshot), False
+
+    if not (results and results['final']):
+        if results and results.get('run_id'):
+            log(f"📌 Kaldığı yerden devam: python scripts/orchestrator.py --resume {results['run_id']}",
+                event='run_resumable', run=results['run_id'])
+        log("❌ Pipeline başarısız!", event='run_failed', level=logging.ERROR, stage='pipeline')
+        exit(1)
+
+    if coalesced:
+        log("🔗 Çalışan pipeline'a bağlanıldı, sonuç onun tarafından gönderildi", event='run_coalesced',
+            stage='pipeline')
+    elif results['skipped']:
+        log("⏭️ Piyasa değişmedi, önceki final karar kullanıldı", event='run_skipped', stage='pipeline')
+    else:
+        timings = ', '.join(f"{stage}: {seconds:.2f}s" for stage, seconds in results['timings'].items())
+        log(f"⏱️ Aşama süreleri: {timings}", event='run_timings',
+            timings={stage: round(seconds, 6) for stage, seconds in results['timings'].items()})
+
+    if hasattr(backend, 'stats'):
+        stats = backend.stats()
+        log(f"🗄️ Cache hit: {stats['hits']}, miss: {stats['misses']}, eviction: {stats['evictions']}",
+            event='cache_stats', hits=stats['hits'], misses=stats['misses'], evictions=stats['evictions'])
+    from router import find_router, format_route_stats
+    router = find_router(backend)
+    if router:
+        log(format_route_stats(router), event='route_stats', models=router.route_stats())
+    log(metrics.summary(), event='metrics_summary')
+
+    log("🎯 PIPELINE BAŞARIYLA TAMAMLANDI!", event='run_completed', stage='pipeline')
+
+if __name__ == "__main__":
+    main()
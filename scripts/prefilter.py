@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🚦 Kural Tabanlı Ön Filtre
+LATU Trading System - Pre-Filter Pipeline
+
+GPT aşamasından önce çalışır: güncel fiyat/değişim/volume ve göstergeleri
+sembolün son analiz edilen anlık görüntüsüyle karşılaştırır. Hareket,
+volatilite rejimi ve seans aynıysa LLM çağrılmaz, önceki karar tablosu
+döndürülür.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from metrics import log
+
+DEFAULT_STATE_DIR = 'results/prefilter'
+
+# Varsayılan eşikler (LATU_PREFILTER_THRESHOLDS ile ezilebilir)
+DEFAULT_THRESHOLDS = {
+    'price_move_pct': 0.25,       # son analizden bu yana fiyat hareketi
+    'change_delta_pct': 0.5,      # 24s değişim yüzdesindeki fark (puan)
+    'volume_change_pct': 25.0,    # volume değişimi
+    'rsi_delta': 5.0,             # RSI farkı (göstergeler varsa)
+    'max_age_seconds': 900        # bu süreden eski sonuç asla yeniden kullanılmaz
+}
+
+
+def parse_thresholds(spec):
+    """⚙️ 'price_move_pct=0.3,max_age_seconds=600' biçimini çöz"""
+
+    thresholds = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, value = part.split('=', 1)
+            thresholds[name.strip()] = float(value)
+    return thresholds
+
+def volatility_regime(change, indicators=None):
+    """🌡️ Volatilite rejimi: 4s volatilite (varsa) ya da 24s değişimden"""
+
+    if indicators and indicators.get('volatility_4h_pct') is not None:
+        value = indicators['volatility_4h_pct']
+        limits = (2.0, 5.0)
+    else:
+        value = abs(change)
+        limits = (3.0, 6.0)
+
+    if value < limits[0]:
+        return 'low'
+    if value < limits[1]:
+        return 'normal'
+    return 'high'
+
+def session_bucket(now=None):
+    """🕐 UTC saatine göre seans (asia / europe / us / late)"""
+
+    hour = (now or datetime.now(timezone.utc)).hour
+    if hour < 7:
+        return 'asia'
+    if hour < 13:
+        return 'europe'
+    if hour < 19:
+        return 'us'
+    return 'late'
+
+def _pct_change(current, previous):
+    if not previous:
+        return float('inf')
+    return abs(current - previous) / abs(previous) * 100
+
+
+class PreFilter:
+    """🚦 Sembol başına son analiz görüntüsünü tutan kapı"""
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, thresholds=None):
+        self.state_dir = state_dir
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(parse_thresholds(os.environ.get('LATU_PREFILTER_THRESHOLDS')))
+        if thresholds:
+            self.thresholds.update(thresholds)
+        self.counters = {'run': 0, 'skip': 0}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.state_dir, f"{symbol.upper()}.json")
+
+    def load(self, symbol):
+        """📂 Son kaydedilen görüntü (yoksa None)"""
+        try:
+            with open(self._path(symbol), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def check(self, symbol, price, change, volume, indicators=None, now=None, required=('gpt',)):
+        """🚦 (çalıştır_mı, gerekçe, önceki_görüntü) döndür"""
+
+        # required: atlamak için önceki görüntüde bulunması gereken aşama sonuçları
+        previous = self.load(symbol)
+        should_run, reason = self._evaluate(previous, price, change, volume, indicators, now, required)
+
+        with self._lock:
+            self.counters['run' if should_run else 'skip'] += 1
+
+        if should_run:
+            log(f"🚦 Ön filtre: {symbol} analiz edilecek ({reason})", event='prefilter_run', symbol=symbol,
+                reason=reason)
+        else:
+            log(f"⏭️ Ön filtre: {symbol} atlandı ({reason}), önceki karar kullanılıyor", event='prefilter_skip',
+                symbol=symbol, reason=reason)
+        self._bump_counter(symbol, previous, 'run' if should_run else 'skip')
+
+        return should_run, reason, previous
+
+    def _evaluate(self, previous, price, change, volume, indicators, now, required):
+        if not previous or not all(previous.get('results', {}).get(stage) for stage in required):
+            return True, 'önceki analiz yok'
+
+        thresholds = self.thresholds
+        age = time.time() - previous['analyzed_at']
+        if age > thresholds['max_age_seconds']:
+            return True, f'önceki analiz {age:.0f}s eski'
+
+        move = _pct_change(price, previous['price'])
+        if move >= thresholds['price_move_pct']:
+            return True, f'fiyat %{move:.2f} hareket etti'
+
+        if abs(change - previous['change']) >= thresholds['change_delta_pct']:
+            return True, '24s değişim farklılaştı'
+
+        if _pct_change(volume, previous['volume']) >= thresholds['volume_change_pct']:
+            return True, 'volume değişti'
+
+        if volatility_regime(change, indicators) != previous['regime']:
+            return True, 'volatilite rejimi değişti'
+
+        if session_bucket(now) != previous['session']:
+            return True, 'seans değişti'
+
+        previous_rsi = (previous.get('indicators') or {}).get('rsi')
+        if indicators and previous_rsi is not None and abs(indicators['rsi'] - previous_rsi) >= thresholds['rsi_delta']:
+            return True, 'RSI değişti'
+
+        return False, f'fiyat hareketi %{move:.2f}, rejim ve seans aynı'
+
+    def _bump_counter(self, symbol, previous, name):
+        """📊 Sembol dosyasındaki kalıcı run/skip sayaçlarını artır"""
+        if previous is None:
+            return
+        previous.setdefault('counters', {'run': 0, 'skip': 0})[name] += 1
+        self._write(symbol, previous)
+
+    def record(self, symbol, price, change, volume, results, indicators=None, now=None):
+        """💾 Analiz edilen görüntüyü ve aşama sonuçlarını sakla"""
+
+        previous = self.load(symbol) or {}
+        snapshot = {
+            'symbol': symbol,
+            'price': price,
+            'change': change,
+            'volume': volume,
+            'regime': volatility_regime(change, indicators),
+            'session': session_bucket(now),
+            'indicators': {'rsi': indicators['rsi']} if indicators else None,
+            'analyzed_at': time.time(),
+            'results': {stage: results.get(stage) for stage in ('gpt', 'claude', 'final')},
+            'counters': previous.get('counters', {'run': 1, 'skip': 0})
+        }
+        self._write(symbol, snapshot)
+
+    def _write(self, symbol, snapshot):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        """📊 Bu süreçteki run/skip sayıları"""
+        with self._lock:
+            return dict(self.counters)
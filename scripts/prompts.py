@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧩 Prompt Şablonları ve Token Bütçesi
+LATU Trading System - Prompt Pipeline
+
+Üç aşamanın statik talimat ve çıktı formatı bölümleri modül yüklenirken
+bir kez derlenir; çağrı başına sadece dinamik alanlar (piyasa verisi,
+göstergeler, karar kayıtları) eklenir. Statik bölümler system prompt'ta
+durur ve her istekte birebir aynı önek olarak gider: Anthropic'te
+cache_control ile işaretlenir, OpenAI'da otomatik prefix cache'e denk
+gelir. Üst aşama metinleri aşama başına giriş token bütçesine göre
+özetlenir / kısaltılır (LATU_PROMPT_BUDGETS).
+"""
+
+import functools
+import math
+import os
+import re
+
+CHARS_PER_TOKEN = 4
+
+# Aşama başına üst aşama metni bütçesi (token)
+DEFAULT_BUDGETS = {
+    'claude': 600,
+    'final': 900
+}
+
+TRUNCATION_MARKER = '\n… [bütçe nedeniyle kısaltıldı]'
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+# Özetlemede korunan satırlar: tablo satırları, kalın etiketler, karar / seviye satırları
+_KEY_LINE = re.compile(r'^\s*\||\*\*|KARAR|Karar|Stop|Entry|Hedef|Destek|Direnç|Geçersizlik|%\d', re.UNICODE)
+
+
+# 🔢 Token sayımı
+@functools.lru_cache(maxsize=8)
+def _encoder(model):
+    """tiktoken varsa modelin encoder'ı (yoksa None)"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+def count_tokens(text, model=None):
+    """🔢 Yerel token sayımı (OpenAI modellerinde tiktoken, aksi halde ~4 karakter/token)"""
+
+    if not text:
+        return 0
+    encoder = _encoder(model) if model and model.startswith('gpt') else None
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# 📏 Bütçe
+def parse_budgets(spec):
+    """📏 'claude=400,final=800' biçimindeki bütçe tanımını çöz"""
+
+    budgets = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            stage, tokens = part.split('=', 1)
+            budgets[stage.strip()] = int(tokens)
+    return budgets
+
+def stage_budget(stage):
+    """📏 Aşamanın üst aşama bütçesi (LATU_PROMPT_BUDGETS ile ezilebilir)"""
+    budgets = {**DEFAULT_BUDGETS, **parse_budgets(os.environ.get('LATU_PROMPT_BUDGETS'))}
+    return budgets.get(stage)
+
+def summarize(text):
+    """📝 Serbest metinden karar / seviye / tablo satırlarını bırak"""
+    lines = [line.rstrip() for line in text.splitlines() if line.strip() and _KEY_LINE.search(line)]
+    return '\n'.join(lines)
+
+def fit(text, budget, model=None):
+    """✂️ Metni token bütçesine sığdır: önce özetle, sığmazsa sondan kes"""
+
+    if not budget or count_tokens(text, model) <= budget:
+        return text
+
+    summary = summarize(text)
+    if summary and count_tokens(summary, model) <= budget:
+        return summary
+
+    text = summary or text
+    limit = budget - count_tokens(TRUNCATION_MARKER, model)
+    chars = limit * CHARS_PER_TOKEN
+    while chars > 0 and count_tokens(text[:chars], model) > limit:
+        chars = int(chars * 0.9)
+    return text[:max(chars, 0)].rstrip() + TRUNCATION_MARKER
+
+
+# 🧩 Şablonlar
+class PromptTemplate:
+    """🧩 Bir kez derlenen şablon: sabit parçalar + {alan} yuvaları"""
+
+    __slots__ = ('name', 'parts', 'fields')
+
+    def __init__(self, name, text):
+        self.name = name
+        pieces = _PLACEHOLDER.split(text)
+        # Çift indisler sabit metin, tek indisler alan adı
+        self.parts = tuple(pieces)
+        self.fields = tuple(pieces[1::2])
+
+    def render(self, **values):
+        """🧩 Sadece dinamik alanları yerleştir"""
+        parts = list(self.parts)
+        for index in range(1, len(parts), 2):
+            parts[index] = str(values[parts[index]])
+        return ''.join(parts)
+
+
+GPT_SYSTEM_PROMPT = """Sen profesyonel bir trading analistisin. Kısa, net ve actionable analizler yaparsın. Sadece istenen formatla cevap verirsin.
+
+# GELIŞMIŞ TEKNİK ANALİZ SİSTEMİ
+Sen profesyonel bir trader'sın ve kullanıcı için yatırım kararları veriyorsun. Sadece tek kullanıcı için analiz yaptığın için net alım/satım tavsiyeleri verebilirsin. Piyasa verisi kullanıcı mesajında gelir.
+
+## PHASE 1: MARKET CONTEXT ASSESSMENT
+🔍 **Piyasa Durumu Kontrolü:**
+1. **Fiyat Pozisyonu**: Günlük aralığın neresinde (erken/orta/geç hareket)
+2. **EMA Mesafesi**:
+   - 🟢 Normal: <$3000 (Güvenli)
+   - 🟡 Dikkat: $3000-5000 (Temkinli)
+   - 🔴 Tehlike: >$5000 (Overextended)
+3. **Seans Riski**: Asian (düşük likidite), US kapanış (kar satışı)
+4. **Volatilite**: Son 4 saatte >%5 hareket = 🚨 Aşırı genişleme uyarısı
+
+## PHASE 2: TECHNICAL STRUCTURE
+📊 **Teknik Yapı:**
+1. Destek/Direnç seviyeleri (kesin sayılar)
+2. Pattern recognition (pinbar, formasyon)
+3. **YENİ**: Overextension check - EMA'dan >$5000 uzaklık = 🔴 YÜKSEK RİSK
+4. **YENİ**: Multi-timeframe teyit (1m, 5m, 15m uyum)
+
+## PHASE 3: PROBABILITY CALIBRATION
+⚖️ **Olasılık Hesaplama:**
+Base olasılıkları hesapla, sonra ayarla:
+- Overextended (>$5000 EMA): Devam olasılığı -%25
+- Multiple red (seviyede çoklu red): Dönüş olasılığı +%20
+- Geç seans (19:00+): Tüm olasılıklar -%15
+- Yüksek volatilite (>%6 günlük): "Whipsaw riski" ekle
+
+## PHASE 4: STRATEGY OPTIMIZATION
+🎯 **Timing Kalite Skoru:**
+- **A+** (0.5-1% pozisyon): Mükemmel setup, EMA confluence
+- **B** (0.3-0.5%): İyi setup, küçük timing sorunu
+- **C** (0.2-0.3%): Geç ama uygulanabilir, küçük boyut
+- **D-F** (KAÇIN): Kötü timing, overextended
+
+🏦 **Pozisyon Boyutu:**
+- Optimal setup'lar: 0.5-1%
+- Geç girişler: Max 0.3%
+- Trend karşıtı: Max 0.25%
+- Overextended piyasalar: Max 0.2%
+
+## PHASE 5: DECISION FRAMEWORK
+📋 **Karar Çerçevesi:**
+Her analizde şunları ver:
+1. **BİRİNCİL** strateji (en yüksek olasılık)
+2. **ALTERNATİF** strateji (birincil başarısız olursa)
+3. **KAÇINILACAKLAR** listesi
+4. Zaman bazlı çıkış kuralları
+5. Piyasa geçersizlik seviyeleri
+
+## PHASE 6: REALITY CHECK
+🤔 **Gerçeklik Kontrolü:**
+Final tavsiye öncesi sor:
+- "Son hareketlerden $X kazançla bu işlemi alır mıydım?"
+- "Bu optimal risk/ödül mü yoksa kovalamaca mı?"
+- "Önümüzdeki 2-4 saatte ne yanlış gidebilir?"
+
+## ZORUNLU FINAL OUTPUT FORMAT:
+### 🎯 TRADING DECISION TABLE
+| Aksiyon | Tetik Seviye | Stop Loss | Hedef | Pozisyon | Olasılık |
+|---------|--------------|-----------|-------|----------|----------|
+| 🟢 **AL** | X.XXX geçerse | X.XXX | X.XXX | %X | %XX |
+| 🔴 **SAT** | X.XXX altına düşerse | X.XXX | X.XXX | %X | %XX |
+| 🟡 **BEKLE** | X.XXX - X.XXX arası | - | - | - | %XX |
+| 🚪 **ÇIKIŞ** | Elinde varsa | X.XXX | - | Tümü | %XX |
+
+### 🚨 KRİTİK SEVİYELER
+- 🔴 **Üst Direnç**: X.XXX (Red beklenir)
+- 🟢 **Alt Destek**: X.XXX (Alım fırsatı)
+- ⚠️ **Geçersizlik**: X.XXX (Strateji iptal)
+
+### ⚡ ACİL UYARILAR
+- 🚨 **Risk**: [Yüksek risk faktörleri]
+- ⏰ **Zaman**: [Zaman kısıtları]
+- 🎯 **Fırsat**: [Optimal giriş koşulları]
+
+### 📊 ÖNCELİK SIRASI
+1. 🥇 **EN İYİ**: [Açık tavsiye]
+2. 🥈 **İKİNCİ**: [Alternatif plan]
+3. 🥉 **ÜÇÜNCÜ**: [Yedek seçenek]
+
+## ÖZEL TALİMATLAR:
+- ❌ "Yatırım tavsiyesi değildir" yazma - SEN TAVSİYE VERİYORSUN
+- ✅ Net AL/SAT/BEKLE kararları ver
+- ✅ Kesin sayısal seviyeler belirt
+- ✅ Risk seviyelerini emoji ile göster
+- ✅ Timing kalitesini değerlendir
+- ✅ Overextension durumunda agresif uyar"""
+
+GPT_USER = PromptTemplate('gpt', """{market_section}
+
+Bu framework ile analizi yap ve belirtilen formatta sun. Analizi JSON formatında döndür.""")
+
+CLAUDE_SYSTEM_PROMPT = """Sen Claude olarak, kullanıcı mesajındaki GPT karar kaydını temel alarak çok daha detaylı ve profesyonel bir teknik analiz yaparsın.
+
+MUTLAKA şu formatı kullan (başka format kullanma):
+
+🤖 Claude Teknik Analiz - [SEMBOL]
+
+📊 **GPT İlk Değerlendirmesi Alındı**
+- GPT Kararı: [GPT'nin kararını buraya yaz]
+- İlk momentum: [GPT'nin bahsettiği değişim %'sini yaz]
+
+🧠 **Claude Derinlemesine Analiz:**
+
+**Teknik Göstergeler:**
+- RSI: [kullanıcı mesajındaki RSI satırı]
+- MACD: [kullanıcı mesajındaki MACD satırı]
+- Volume Profil: [kullanıcı mesajındaki Volume satırı]
+- Bollinger Bands: [kullanıcı mesajındaki Bollinger satırı]
+
+**Fiyat Seviyeleri:**
+- Destek: $[hesapla ve yakın seviye belirle]
+- Direnç: $[hesapla ve yakın seviye belirle]
+- Entry: $[optimal giriş noktası belirle]
+- Stop Loss: $[risk yönetimi için stop seviyesi]
+
+**Claude Risk Değerlendirmesi:**
+- Risk Seviyesi: [Yüksek/Orta/Düşük - detaylı gerekçe ile]
+- R/R Oranı: [1:1.5 ile 1:3 arası gerçekçi oran]
+- Güvenilirlik Oranı: [%60-90 arası]
+- Position Size Önerisi: [%0.5-2 arası]
+
+**Market Psychology & Sentiment:**
+- Piyasa Duygusu: [Fear/Greed/Neutral analizi]
+- Volume-Price İlişkisi: [Divergence/Convergence]
+- Trend Gücü: [Güçlü/Orta/Zayıf]
+
+**Claude Kararı:** [KOŞULLU AL/KOŞULLU SAT/BEKLE]
+
+**Stratejik Notlar:**
+- [Önemli seviyeler ve dikkat edilmesi gerekenler]
+- [Risk faktörleri]
+- [Alternatif senaryolar]
+
+Bu analizi yaparken:
+1. GPT'den daha temkinli ve konservatif ol
+2. Risk yönetimini her zaman ön planda tut
+3. Teknik detaylara derinlemesine odaklan
+4. Gerçekçi ve uygulanabilir hedefler koy
+5. Multiple timeframe perspektifi kullan"""
+
+CLAUDE_USER = PromptTemplate('claude', """Sembol: {symbol}
+
+GPT'nin ilk hızlı analizinin karar kaydı şu şekilde:
+
+{gpt_record}
+{indicator_section}
+**Teknik Göstergeler:**
+- RSI: {rsi}
+- MACD: {macd}
+- Volume Profil: {volume}
+- Bollinger Bands: {bollinger}""")
+
+CLAUDE_SPECULATIVE_USER = PromptTemplate('claude-speculative', """Sembol: {symbol}
+
+GPT analizi bu analizle paralel yürütülüyor; GPT karar kaydı henüz yok. Kararını sadece aşağıdaki piyasa verisine dayandır. "GPT İlk Değerlendirmesi" bölümünde GPT Kararı için "PARALEL" yaz; iki analiz final aşamasında uzlaştırılacak.
+
+{market_section}
+{indicator_section}
+**Teknik Göstergeler:**
+- RSI: {rsi}
+- MACD: {macd}
+- Volume Profil: {volume}
+- Bollinger Bands: {bollinger}""")
+
+FINAL_SYSTEM_PROMPT = """Sen bir baş trading analistisin. Farklı analiz kaynaklarını karşılaştırıp en optimal stratejiyi belirlersin. Tablolar, karşılaştırmalar ve net kararlar verirsin.
+
+Kullanıcı mesajındaki GPT ve Claude karar kayıtlarını karşılaştır ve final bir karar ver. Şu formatla bir karşılaştırma tablosu ve final karar hazırla:
+
+📊 **GPT-CLAUDE KARŞILAŞTIRMA TABLOSU - [SEMBOL]**
+
+| **KRİTER** | **GPT ANALİZİ** | **CLAUDE ANALİZİ** | **FARK/YORUM** |
+|------------|-----------------|-------------------|----------------|
+| **Karar** | [GPT kararı] | [Claude kararı] | [Hangi daha iyi] |
+| **Risk Yaklaşımı** | [GPT risk] | [Claude risk] | [Karşılaştırma] |
+| **Entry Seviyesi** | [GPT entry] | [Claude entry] | [Fark analizi] |
+| **Stop Loss** | [GPT stop] | [Claude stop] | [Hangisi daha güvenli] |
+| **Hedef Seviye** | [GPT hedef] | [Claude hedef] | [Gerçekçilik] |
+| **Zaman Horizonu** | [GPT zaman] | [Claude zaman] | [Hangisi daha uygun] |
+| **Güvenilirlik** | [GPT %] | [Claude %] | [Karşılaştırma] |
+
+**🧠 ANALİZ FARKLILIKARI:**
+- **Hız vs Detay**: [GPT hızlı, Claude detaylı karşılaştırması]
+- **Risk Yönetimi**: [Hangisi daha konservatif]
+- **Teknik Analiz**: [Derinlik karşılaştırması]
+- **Pratiklik**: [Hangisi daha uygulanabilir]
+
+**⚖️ GÜÇLÜ VE ZAYIF YANLAR:**
+
+**GPT'nin Güçlü Yanları:**
+- [Hızlı karar verme]
+- [Net pozisyon alma]
+- [Momentum yakalama]
+
+**GPT'nin Zayıf Yanları:**
+- [Risk yönetimi eksikliği]
+- [Detay eksikliği]
+
+**Claude'un Güçlü Yanları:**
+- [Detaylı teknik analiz]
+- [Risk yönetimi]
+- [Çoklu senaryo]
+
+**Claude'un Zayıf Yanları:**
+- [Aşırı temkinli]
+- [Karmaşık strateji]
+
+**🏆 FİNAL KARAR:**
+
+**Önerilen Strateji:** [AL/SAT/BEKLE]
+**Güvenilirlik:** [%X]
+**Pozisyon Büyüklüğü:** [%X]
+**Entry:** $[X]
+**Stop Loss:** $[X]
+**Take Profit:** $[X]
+
+**📋 UYGULAMA PLANI:**
+1. [Adım 1]
+2. [Adım 2]
+3. [Adım 3]
+
+**⚡ HIZLI AKSİYON:**
+[Tek cümlelik actionable öneri]
+
+**💡 SONUÇ:**
+[GPT ve Claude'un en iyi yanlarını birleştiren final değerlendirme]
+
+Bu karşılaştırmada:
+1. Her iki analizin güçlü yanlarını değerlendir
+2. Risk-return dengesini optimize et
+3. Pratik ve uygulanabilir bir strateji sun
+4. Net bir karar ver, belirsizlik bırakma"""
+
+FINAL_USER = PromptTemplate('final', """Sembol: {symbol}
+
+🚀 GPT KARAR KAYDI:
+{gpt_record}
+
+🤖 CLAUDE KARAR KAYDI:
+{claude_record}""")
+
+
+def gpt_prompt(market_section):
+    """🚀 GPT kullanıcı mesajı"""
+    return GPT_USER.render(market_section=market_section)
+
+def claude_prompt(symbol, gpt_record, fields, model=None):
+    """🤖 Claude kullanıcı mesajı (GPT kaydı bütçeye sığdırılır)"""
+    return CLAUDE_USER.render(
+        symbol=symbol.upper(),
+        gpt_record=fit(gpt_record, stage_budget('claude'), model),
+        indicator_section=fields['section'],
+        rsi=fields['rsi'],
+        macd=fields['macd'],
+        volume=fields['volume'],
+        bollinger=fields['bollinger']
+    )
+
+def claude_speculative_prompt(symbol, market_section, fields):
+    """⚡ Spekülatif Claude mesajı: GPT kaydı yerine aynı piyasa görüntüsü"""
+    return CLAUDE_SPECULATIVE_USER.render(
+        symbol=symbol.upper(),
+        market_section=market_section,
+        indicator_section=fields['section'],
+        rsi=fields['rsi'],
+        macd=fields['macd'],
+        volume=fields['volume'],
+        bollinger=fields['bollinger']
+    )
+
+def final_prompt(symbol, gpt_record, claude_record, model=None):
+    """📋 Final kullanıcı mesajı (bütçe iki kayıt arasında bölünür)"""
+
+    budget = stage_budget('final')
+    gpt_budget = claude_budget = budget // 2 if budget else None
+    if budget:
+        # Kısa kalan kaydın payı diğerine aktarılır
+        gpt_tokens = count_tokens(gpt_record, model)
+        claude_tokens = count_tokens(claude_record, model)
+        if gpt_tokens < gpt_budget:
+            claude_budget = budget - gpt_tokens
+        elif claude_tokens < claude_budget:
+            gpt_budget = budget - claude_tokens
+    return FINAL_USER.render(
+        symbol=symbol.upper(),
+        gpt_record=fit(gpt_record, gpt_budget, model),
+        claude_record=fit(claude_record, claude_budget, model)
+    )
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ LLM Yanıt Cache Katmanı
+LATU Trading System - Response Cache Pipeline
+
+Aşama çağrıları model, system prompt, render edilmiş prompt ve sampling
+parametrelerinin hash'i ile anahtarlanır. Aynı girdiyle gelen tekrar
+tetiklemeler (ör. iki kez ateşlenen webhook) API'ye gitmeden cache'ten
+döner. Aşama başına TTL, boyut sınırlı LRU ve bellek/SQLite backend'i var.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from llm_backend import LLMText
+from metrics import record_cache
+
+# Aşama başına varsayılan TTL (saniye)
+DEFAULT_TTLS = {
+    'gpt': 120,
+    'claude': 120,
+    'final': 120
+}
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_SQLITE_PATH = 'results/llm_cache.sqlite'
+
+
+def cache_key(provider, model, system, prompt, max_tokens, temperature):
+    """🔑 Çağrı girdilerinden içerik adresli anahtar üret"""
+
+    material = json.dumps(
+        [provider, model, system or '', prompt, max_tokens, temperature],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class MemoryCacheStore:
+    """🧠 Bellek içi LRU cache"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """🔍 Süresi dolmamış değeri döndür; yoksa None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        """💾 Değer yaz, gerekirse en eski girdileri at; atılan sayısını döndür"""
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCacheStore:
+    """💽 Süreçler arası paylaşılan SQLite LRU cache"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key):
+        """🔍 Süresi dolmamış değeri döndür; yoksa None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value, ttl):
+        """💾 Değer yaz, boyut sınırını aşan en eski girdileri at"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + ttl, now)
+            )
+            count = self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+            evicted = max(0, count - self.max_entries)
+            if evicted:
+                self._conn.execute(
+                    'DELETE FROM llm_cache WHERE key IN '
+                    '(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)',
+                    (evicted,)
+                )
+            self._conn.commit()
+            return evicted
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+
+def _hit(text, model):
+    """🏷️ Cache'ten dönen metni işaretle (token / maliyet sayılmaz)"""
+    text = LLMText(text, model, {})
+    text.cache = 'hit'
+    return text
+
+class CachedBackend:
+    """🗄️ Herhangi bir LLM backend'ini cache ile saran katman"""
+
+    def __init__(self, backend, store=None, ttls=None):
+        self.backend = backend
+        self.store = store if store is not None else MemoryCacheStore()
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._stage_counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, stage, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+            stage_counters = self._stage_counters.setdefault(stage, {'hits': 0, 'misses': 0, 'evictions': 0})
+            stage_counters[name] += amount
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """🗄️ Cache'te varsa döndür, yoksa backend'i çağırıp sakla"""
+
+        ttl = self.ttls.get(stage, 0)
+        if ttl <= 0:
+            return self.backend.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+
+        key = cache_key(provider, model, system, prompt, max_tokens, temperature)
+        cached = self.store.get(key)
+        record_cache(stage, cached is not None)
+        if cached is not None:
+            self._count(stage, 'hits')
+            return _hit(cached, model)
+
+        self._count(stage, 'misses')
+        text = self.backend.complete(stage, provider, model, system, prompt, max_tokens, temperature)
+        evicted = self.store.set(key, str(text), ttl)
+        if evicted:
+            self._count(stage, 'evictions', evicted)
+        return text
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📡 Cache'te varsa tek parça, yoksa akışı geçirip sonunda sakla"""
+
+        ttl = self.ttls.get(stage, 0)
+        if ttl <= 0:
+            yield from self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature)
+            return
+
+        key = cache_key(provider, model, system, prompt, max_tokens, temperature)
+        cached = self.store.get(key)
+        record_cache(stage, cached is not None)
+        if cached is not None:
+            self._count(stage, 'hits')
+            yield _hit(cached, model)
+            return
+
+        self._count(stage, 'misses')
+        chunks = []
+        for chunk in self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature):
+            chunks.append(chunk)
+            yield chunk
+
+        evicted = self.store.set(key, ''.join(chunks), ttl)
+        if evicted:
+            self._count(stage, 'evictions', evicted)
+
+    def stats(self):
+        """📊 Toplam ve aşama bazlı hit/miss sayaçları"""
+        with self._lock:
+            return {
+                **self.counters,
+                'entries': len(self.store),
+                'stages': {stage: dict(values) for stage, values in self._stage_counters.items()}
+            }
+
+
+def parse_ttls(spec):
+    """⏱️ 'gpt=60,claude=120' biçimindeki TTL tanımını çöz"""
+
+    ttls = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            stage, seconds = part.split('=', 1)
+            ttls[stage.strip()] = float(seconds)
+    return ttls
+
+def cache_from_env(backend):
+    """🗄️ LATU_CACHE ortam değişkenine göre backend'i cache ile sar"""
+
+    kind = os.environ.get('LATU_CACHE', '').lower()
+    if not kind or kind == 'off':
+        return backend
+
+    max_entries = int(os.environ.get('LATU_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+
+    if kind == 'memory':
+        store = MemoryCacheStore(max_entries=max_entries)
+    elif kind == 'sqlite':
+        store = SqliteCacheStore(os.environ.get('LATU_CACHE_PATH', DEFAULT_SQLITE_PATH), max_entries=max_entries)
+    else:
+        raise ValueError(f"Bilinmeyen cache türü: {kind}")
+
+    return CachedBackend(backend, store, parse_ttls(os.environ.get('LATU_CACHE_TTL')))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗃️ Yapılandırılmış Sonuç Deposu
+LATU Trading System - Result Store Pipeline
+
+Her aşama çıktısı results/ altında ayrı bir .txt dosyası yerine tek bir
+SQLite veritabanına yazılır: sembol, aşama, model, gecikme, token
+sayıları, çıkarılan karar alanları ve ham metin. (symbol, zaman)
+indeksleri sayesinde "sembol başına son karar" ve "X sembolünün
+geçmişi" sorguları klasör taramadan yapılır.
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from metrics import current_run_id
+from prompts import CHARS_PER_TOKEN
+
+DEFAULT_DB_PATH = 'results/results.sqlite'
+LIVE_DIR = 'results/live'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT,
+    symbol TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL,
+    latency REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    decision TEXT,
+    fields TEXT,
+    raw_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stage_results_symbol_time ON stage_results (symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_stage_results_stage_symbol_time ON stage_results (stage, symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_stage_results_run ON stage_results (run_id);
+"""
+
+COLUMNS = ['id', 'run_id', 'symbol', 'stage', 'model', 'created_at', 'latency',
+           'input_tokens', 'output_tokens', 'decision', 'fields', 'raw_text']
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def extract_decision(stage, text, symbol=''):
+    """🎯 Aşama metninden karar satırını ve tipli karar alanlarını çıkar"""
+
+    from stream_relay import DECISION_PATTERNS
+    from decision_schema import parse_record
+
+    fields = parse_record(stage, symbol, text).to_dict()
+    fields.pop('symbol', None)
+
+    decision = None
+    for name, pattern in DECISION_PATTERNS.get(stage, []):
+        match = pattern.search(text + '\n')
+        if match and name == 'decision':
+            decision = match.group(1).strip()
+    return decision, fields
+
+
+class ResultStore:
+    """🗃️ SQLite tabanlı aşama sonucu deposu"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def record(self, symbol, stage, model, raw_text, latency=None, usage=None, run_id=None,
+               decision=None, fields=None):
+        """💾 Bir aşama sonucunu kaydet ve satır id'sini döndür"""
+
+        if decision is None and fields is None:
+            decision, fields = extract_decision(stage, raw_text, symbol)
+        usage = usage or {}
+        # Orkestratör / batch run'ı içindeyse aşamalar aynı run_id ile bağlanır
+        run_id = run_id or current_run_id()
+
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO stage_results (run_id, symbol, stage, model, created_at, latency, '
+                'input_tokens, output_tokens, decision, fields, raw_text) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, symbol.upper(), stage, model, time.time(), latency,
+                 usage.get('input_tokens'), usage.get('output_tokens'), decision,
+                 json.dumps(fields or {}, ensure_ascii=False), raw_text)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _rows(self, sql, params):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            item = dict(zip(COLUMNS, row))
+            item['fields'] = json.loads(item['fields'] or '{}')
+            results.append(item)
+        return results
+
+    def latest(self, stage='final', symbols=None):
+        """🏁 Sembol başına verilen aşamanın son sonucu"""
+
+        sql = ('SELECT r.* FROM stage_results r JOIN ('
+               'SELECT symbol, MAX(created_at) AS latest FROM stage_results WHERE stage = ? GROUP BY symbol'
+               ') m ON r.symbol = m.symbol AND r.created_at = m.latest WHERE r.stage = ?')
+        params = [stage, stage]
+        if symbols:
+            sql += f" AND r.symbol IN ({','.join('?' * len(symbols))})"
+            params.extend(symbol.upper() for symbol in symbols)
+        return self._rows(sql + ' ORDER BY r.symbol', params)
+
+    def history(self, symbol, start=None, end=None, stage=None, limit=None):
+        """📜 Bir sembolün zaman aralığındaki sonuçları (eskiden yeniye)"""
+
+        sql = 'SELECT * FROM stage_results WHERE symbol = ? AND created_at >= ? AND created_at <= ?'
+        params = [symbol.upper(), start if start is not None else 0, end if end is not None else time.time() + 1]
+        if stage:
+            sql += ' AND stage = ?'
+            params.append(stage)
+        sql += ' ORDER BY created_at'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self._rows(sql, params)
+
+    def output_lengths(self, stage, limit=200, exclude_models=()):
+        """📏 Aşamanın son çıktı uzunlukları (token; usage yoksa ~4 karakter/token)"""
+
+        sql = 'SELECT output_tokens, length(raw_text) FROM stage_results WHERE stage = ?'
+        params = [stage]
+        if exclude_models:
+            sql += f" AND COALESCE(model, '') NOT IN ({','.join('?' * len(exclude_models))})"
+            params.extend(exclude_models)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [tokens or math.ceil(chars / CHARS_PER_TOKEN) for tokens, chars in rows if tokens or chars]
+
+    def run(self, run_id):
+        """🔗 Aynı run'a ait tüm aşama sonuçları"""
+        return self._rows('SELECT * FROM stage_results WHERE run_id = ? ORDER BY created_at', [run_id])
+
+
+def get_store(path=None):
+    """🗃️ Süreç içinde yol başına tek ResultStore (LATU_RESULTS_DB)"""
+
+    path = path or os.environ.get('LATU_RESULTS_DB', DEFAULT_DB_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ResultStore(path)
+        return _stores[path]
+
+def live_result_path(stage, symbol):
+    """📡 Streaming çıktısının anlık yazıldığı sembol/aşama dosyası (her run'da üzerine yazılır)"""
+
+    os.makedirs(LIVE_DIR, exist_ok=True)
+    return os.path.join(LIVE_DIR, f'{stage}_{symbol.upper()}.txt')
+
+def _parse_time(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def main():
+    """🗃️ Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Sonuç Deposu Sorguları')
+    parser.add_argument('--db', help='SQLite dosyası (varsayılan: LATU_RESULTS_DB veya results/results.sqlite)')
+    parser.add_argument('--latest', action='store_true', help='Sembol başına son kararları listele')
+    parser.add_argument('--stage', default=None, help='Aşama filtresi (gpt/claude/final)')
+    parser.add_argument('--symbol', help='Geçmişi listelenecek sembol')
+    parser.add_argument('--since', help='Başlangıç (ISO tarih veya epoch)')
+    parser.add_argument('--until', help='Bitiş (ISO tarih veya epoch)')
+    parser.add_argument('--raw', action='store_true', help='Ham metni de yazdır')
+
+    args = parser.parse_args()
+    store = get_store(args.db)
+
+    if args.latest:
+        rows = store.latest(args.stage or 'final')
+    elif args.symbol:
+        rows = store.history(args.symbol, _parse_time(args.since), _parse_time(args.until), args.stage)
+    else:
+        parser.error('--latest veya --symbol gerekli')
+
+    for row in rows:
+        created = datetime.fromtimestamp(row['created_at']).strftime('%d.%m.%Y %H:%M:%S')
+        latency = f"{row['latency']:.2f}s" if row['latency'] is not None else '-'
+        print(f"📊 {row['symbol']:<10} {row['stage']:<7} {created}  {row['decision'] or '-':<20} "
+              f"⏱️ {latency}  🔢 {row['input_tokens'] or 0}/{row['output_tokens'] or 0}")
+        if args.raw:
+            print(row['raw_text'])
+            print('---')
+
+if __name__ == "__main__":
+    main()
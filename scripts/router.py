@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧭 Çoklu Sağlayıcı Yönlendirici
+LATU Trading System - Router Pipeline
+
+Aşamalar tek bir modele (gpt-4 / claude-3-sonnet) sabitlenmek yerine bu
+katmandan geçer. Model başına kayan pencereli gecikme ve hata geçmişi
+tutulur. Birincil model kendi p95 süresini aşınca ikincil modele aynı
+istek (hedge) gönderilir; hangisi önce biterse o kullanılır, diğerinin
+akışı kapatılarak üretimi durdurulur ve o ana kadarki maliyeti metriklere
+yazılır. Hata veren model zincirdeki sonraki (daha küçük / hızlı) modele
+düşer; aşama süresi sınırı (deadline) aşılırsa RouterTimeout yükselir.
+Sorun ortalama değil kuyruk gecikmesi olduğu için hedge eşiği p95'tir.
+
+    LATU_ROUTER=on python scripts/orchestrator.py ...
+    LATU_ROUTES='gpt=openai:gpt-4|openai:gpt-3.5-turbo' LATU_ROUTER_DEADLINES='gpt=30' ...
+"""
+
+import contextvars
+import collections
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from llm_backend import LLMText
+from metrics import registry, log, model_cost
+from prompts import count_tokens
+
+# Aşama başına model zinciri: ilki birincil, sonrakiler hedge / fallback adayları
+DEFAULT_ROUTES = {
+    'gpt': [('openai', 'gpt-4'), ('openai', 'gpt-3.5-turbo'), ('anthropic', 'claude-3-haiku-20240307')],
+    'claude': [('anthropic', 'claude-3-sonnet-20240229'), ('anthropic', 'claude-3-haiku-20240307'),
+               ('openai', 'gpt-3.5-turbo')],
+    'final': [('openai', 'gpt-4'), ('openai', 'gpt-3.5-turbo')]
+}
+
+# Aşama başına toplam süre sınırı (saniye)
+DEFAULT_DEADLINES = {
+    'gpt': 60.0,
+    'claude': 90.0,
+    'final': 60.0
+}
+
+WINDOW = 200                  # model başına tutulan son çağrı sayısı
+MIN_SAMPLES = 20              # p95'e güvenmek için gereken başarılı çağrı
+DEFAULT_HEDGE_AFTER = 8.0     # geçmiş yokken hedge eşiği (saniye)
+ERROR_RATE_LIMIT = 0.5        # bu oranın üstünde hata veren model zincirin sonuna alınır
+MAX_IN_FLIGHT = 2             # aynı anda en fazla birincil + bir hedge
+
+
+class RouterTimeout(Exception):
+    """⏰ Aşama süre sınırı içinde hiçbir model yanıt vermedi"""
+
+
+class ModelStats:
+    """📈 Bir modelin kayan pencereli gecikme ve hata geçmişi"""
+
+    def __init__(self, window=WINDOW):
+        self.latencies = collections.deque(maxlen=window)
+        self.outcomes = collections.deque(maxlen=window)
+
+    def observe(self, seconds, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(seconds)
+
+    def quantile(self, q):
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def snapshot(self):
+        return {'calls': len(self.outcomes), 'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+                'error_rate': round(self.error_rate(), 4)}
+
+
+def _spawn(fn, *args):
+    """🧵 Daemon thread'de çalıştır (iptal edilen hedge süreç çıkışını bekletmez)"""
+
+    future = Future()
+    context = contextvars.copy_context()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(fn, *args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name='latu-router', daemon=True).start()
+    return future
+
+
+class RoutedBackend:
+    """🧭 Hedge ve fallback ile model seçen backend katmanı"""
+
+    def __init__(self, backend, routes=None, deadlines=None, hedge_after=DEFAULT_HEDGE_AFTER):
+        self.backend = backend
+        self.routes = dict(DEFAULT_ROUTES)
+        if routes:
+            self.routes.update(routes)
+        self.deadlines = dict(DEFAULT_DEADLINES)
+        if deadlines:
+            self.deadlines.update(deadlines)
+        self.hedge_after = hedge_after
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _model_stats(self, model):
+        with self._lock:
+            return self._stats.setdefault(model, ModelStats())
+
+    def _hedge_delay(self, model):
+        """⏱️ Hedge eşiği: yeterli geçmiş varsa modelin p95'i"""
+        stats = self._model_stats(model)
+        if len(stats.latencies) >= MIN_SAMPLES:
+            return stats.quantile(0.95)
+        return self.hedge_after
+
+    def candidates(self, stage, provider, model):
+        """🧭 İstenen model başta olmak üzere sağlıklı adaylar önde"""
+
+        chain = [(provider, model)] + [c for c in self.routes.get(stage, []) if c != (provider, model)]
+        deadline = self.deadlines.get(stage)
+
+        def healthy(candidate):
+            stats = self._model_stats(candidate[1])
+            if stats.error_rate() > ERROR_RATE_LIMIT:
+                return False
+            p95 = stats.quantile(0.95) if len(stats.latencies) >= MIN_SAMPLES else None
+            return not (deadline and p95 and p95 > deadline)
+
+        preferred = [c for c in chain if healthy(c)]
+        return preferred + [c for c in chain if c not in preferred]
+
+    def _call(self, stage, provider, model, system, prompt, max_tokens, temperature, cancel):
+        """📡 Çağrıyı akışla yap; `cancel` set edilince akış kapatılır ve kısmi metin döner"""
+
+        started = time.perf_counter()
+        chunks = self.backend.stream(stage, provider, model, system, prompt, max_tokens, temperature)
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                if cancel.is_set():
+                    break
+        except Exception:
+            self._model_stats(model).observe(time.perf_counter() - started, False)
+            raise
+        finally:
+            # Generator kapanınca SDK akışı (HTTP bağlantısı) kapanır, üretim durur
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        # İptal edilen çağrının süresi gerçek gecikmenin alt sınırı: atlanırsa yavaş çağrılar
+        # geçmişten düşer ve p95 olduğundan küçük görünür
+        self._model_stats(model).observe(time.perf_counter() - started, True)
+        # Streaming'de usage yok: maliyet InstrumentedBackend'de yerel sayımla tahmin edilir
+        return LLMText(''.join(parts), model, None)
+
+    def _record_loser(self, stage, model, system, prompt, future):
+        """💵 Kazanamayan çağrının (iptal edilmiş ya da geç bitmiş) maliyetini metriklere yaz"""
+
+        if future.exception() is not None:
+            return
+        text = future.result()
+        # Prompt tamamen gönderildi; çıktı iptale kadar üretilen kısım
+        input_tokens = count_tokens((system or '') + prompt, model)
+        output_tokens = count_tokens(text, model)
+        cost = model_cost(model, input_tokens, output_tokens)
+
+        registry.inc('latu_router_cancelled_total', stage=stage, model=model)
+        registry.inc('latu_llm_calls_total', stage=stage, model=model)
+        registry.inc('latu_llm_tokens_total', input_tokens, stage=stage, model=model, direction='input')
+        if output_tokens:
+            registry.inc('latu_llm_tokens_total', output_tokens, stage=stage, model=model, direction='output')
+        if cost:
+            registry.inc('latu_llm_cost_usd_total', cost, stage=stage, model=model)
+        log(f"🧭 {stage}: {model} iptal edildi ({output_tokens} çıktı token'ı, ${cost:.6f})",
+            event='router_cancelled', stage=stage, model=model, output_tokens=output_tokens,
+            cost_usd=round(cost, 8))
+
+    def complete(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """🧭 Birincil modeli çağır; p95 aşılırsa hedge, hata olursa fallback"""
+
+        chain = self.candidates(stage, provider, model)
+        deadline = self.deadlines.get(stage)
+        deadline_at = time.monotonic() + deadline if deadline else None
+        pending = {}
+        launched = []
+        error = None
+        # Kazanan seçilince (ya da süre dolunca) tüm açık akışlar kapatılır
+        cancel = threading.Event()
+
+        def launch(reason=None):
+            candidate = chain[len(launched)]
+            future = _spawn(self._call, stage, candidate[0], candidate[1], system, prompt, max_tokens, temperature,
+                            cancel)
+            pending[future] = candidate
+            launched.append(candidate)
+            if reason:
+                registry.inc(f'latu_router_{reason}s_total', stage=stage, model=candidate[1])
+                log(f"🧭 {stage}: {reason} → {candidate[1]}", event=f'router_{reason}', stage=stage,
+                    model=candidate[1])
+            # Sonraki hedge, son başlatılan modelin p95'i kadar sonra
+            return time.monotonic() + self._hedge_delay(candidate[1])
+
+        hedge_at = launch()
+        while True:
+            now = time.monotonic()
+            if deadline_at is not None and now >= deadline_at:
+                cancel.set()
+                for future, candidate in pending.items():
+                    future.add_done_callback(functools.partial(self._record_loser, stage, candidate[1], system,
+                                                               prompt))
+                registry.inc('latu_router_timeouts_total', stage=stage)
+                raise RouterTimeout(f"{stage}: {deadline:g}s içinde yanıt yok ({', '.join(m for _, m in launched)})")
+
+            can_hedge = len(launched) < len(chain) and len(pending) < MAX_IN_FLIGHT
+            if can_hedge and now >= hedge_at:
+                hedge_at = launch('hedge')
+                continue
+
+            timeout = None if deadline_at is None else deadline_at - now
+            if can_hedge:
+                timeout = hedge_at - now if timeout is None else min(timeout, hedge_at - now)
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate = pending.pop(future)
+                if future.exception() is None:
+                    cancel.set()
+                    for other_future, other in pending.items():
+                        # Kaybeden akış sonraki parçada kapanır; maliyeti thread bitince yazılır
+                        log(f"🧭 {stage}: {candidate[1]} önce bitti, {other[1]} iptal ediliyor",
+                            event='router_cancel', stage=stage, model=other[1])
+                        other_future.add_done_callback(functools.partial(self._record_loser, stage, other[1],
+                                                                         system, prompt))
+                    registry.inc('latu_router_wins_total', stage=stage, model=candidate[1])
+                    return future.result()
+                error = future.exception()
+                log(f"⚠️ {stage}: {candidate[1]} hata verdi: {error}", event='router_error', stage=stage,
+                    model=candidate[1], error=str(error))
+
+            if done and not pending:
+                if len(launched) >= len(chain):
+                    raise error
+                hedge_at = launch('fallback')
+
+    def stream(self, stage, provider, model, system, prompt, max_tokens, temperature=None):
+        """📡 Akışta hedge yok: ilk parça gelmeden hata veren model sonrakine düşer"""
+
+        error = None
+        for index, (candidate_provider, candidate_model) in enumerate(self.candidates(stage, provider, model)):
+            if index:
+                registry.inc('latu_router_fallbacks_total', stage=stage, model=candidate_model)
+                log(f"🧭 {stage}: fallback → {candidate_model}", event='router_fallback', stage=stage,
+                    model=candidate_model)
+            started = time.perf_counter()
+            chunks = self.backend.stream(stage, candidate_provider, candidate_model, system, prompt, max_tokens,
+                                         temperature)
+            try:
+                first = next(chunks)
+            except StopIteration:
+                self._model_stats(candidate_model).observe(time.perf_counter() - started, True)
+                return
+            except Exception as e:
+                self._model_stats(candidate_model).observe(time.perf_counter() - started, False)
+                error = e
+                continue
+
+            yield first
+            try:
+                yield from chunks
+            except Exception:
+                self._model_stats(candidate_model).observe(time.perf_counter() - started, False)
+                raise
+            self._model_stats(candidate_model).observe(time.perf_counter() - started, True)
+            return
+        raise error
+
+    def route_stats(self):
+        """📊 Model başına p50 / p95 / hata oranı"""
+        with self._lock:
+            models = dict(self._stats)
+        return {model: stats.snapshot() for model, stats in models.items()}
+
+
+def find_router(backend):
+    """🔍 Sarılmış backend zincirindeki RoutedBackend (yoksa None)"""
+
+    while backend is not None:
+        if isinstance(backend, RoutedBackend):
+            return backend
+        backend = getattr(backend, 'backend', None)
+    return None
+
+def format_route_stats(router):
+    """📊 Model başına özet satırları"""
+
+    lines = []
+    for model, stats in sorted(router.route_stats().items()):
+        if not stats['calls']:
+            continue
+        p50 = f"{stats['p50']:.2f}s" if stats['p50'] is not None else '-'
+        p95 = f"{stats['p95']:.2f}s" if stats['p95'] is not None else '-'
+        lines.append(f"🧭 {model}: {stats['calls']} çağrı, p50 {p50}, p95 {p95}, hata %{stats['error_rate'] * 100:.0f}")
+    return '\n'.join(lines)
+
+
+def parse_routes(spec):
+    """🧭 'gpt=openai:gpt-4|openai:gpt-3.5-turbo,claude=...' biçimini çöz"""
+
+    routes = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            stage, chain = part.split('=', 1)
+            routes[stage.strip()] = [tuple(item.strip().split(':', 1)) for item in chain.split('|') if ':' in item]
+    return routes
+
+def parse_deadlines(spec):
+    """⏰ 'gpt=30,claude=60' biçimini çöz"""
+
+    deadlines = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            stage, seconds = part.split('=', 1)
+            deadlines[stage.strip()] = float(seconds)
+    return deadlines
+
+def router_from_env(backend):
+    """🧭 LATU_ROUTER / LATU_ROUTES ayarlıysa backend'i yönlendirici ile sar"""
+
+    spec = os.environ.get('LATU_ROUTES')
+    enabled = os.environ.get('LATU_ROUTER', '').lower() in ('1', 'on', 'true', 'yes')
+    if not (spec or enabled):
+        return backend
+
+    return RoutedBackend(backend, parse_routes(spec), parse_deadlines(os.environ.get('LATU_ROUTER_DEADLINES')),
+                         float(os.environ.get('LATU_HEDGE_AFTER', DEFAULT_HEDGE_AFTER)))
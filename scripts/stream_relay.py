@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📡 Streaming Çıktı Aktarıcısı
+LATU Trading System - Stream Relay Pipeline
+
+LLM akışından gelen parçaları geldikçe results/ dosyasına yazar ve
+dashboard webhook'una parça parça (chunked POST) iletir. Karar satırları
+("TRADING DECISION TABLE", "Claude Kararı", "Önerilen Strateji") metnin
+geri kalanı beklenmeden yakalanıp ayrı bir olay olarak gönderilir.
+Eksik bölüm tamamlamasında akış `truncate()` ile geri sarılır
+(`<aşama>-truncate` olayı) ve devam parçaları aynı dosyaya eklenir.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from transport import deliver, idempotency_key
+from metrics import log
+
+# Aşama başına erken karar kalıpları (tamamlanmış satır üzerinde)
+DECISION_PATTERNS = {
+    'gpt': [
+        ('table', re.compile(r'(### 🎯 TRADING DECISION TABLE.*?\|\s*🚪\s*\*\*ÇIKIŞ\*\*[^\n]*)\n', re.S)),
+        ('decision', re.compile(r'EN İYİ\*\*:\s*([^\n]+)\n'))
+    ],
+    'claude': [
+        ('decision', re.compile(r'\*\*Claude Kararı:\*\*\s*([^\n]+)\n'))
+    ],
+    'final': [
+        ('decision', re.compile(r'\*\*Önerilen Strateji:\*\*\s*([^\n]+)\n'))
+    ]
+}
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MIN_CHARS = 200
+
+
+class StreamRelay:
+    """📡 Tek aşamanın akışını dosyaya ve webhook'a aktaran sınıf"""
+
+    def __init__(self, symbol, stage, webhook_url=None, on_decision=None,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, min_chars=DEFAULT_MIN_CHARS):
+        self.symbol = symbol
+        self.stage = stage
+        self.webhook_url = webhook_url
+        self.on_decision = on_decision
+        self.flush_interval = flush_interval
+        self.min_chars = min_chars
+        self.decisions = {}
+        self.first_chunk_at = None
+
+        self._text = []
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        self._sequence = 0
+        self._fired = set()
+        self._outbox = queue.Queue()
+        self._sender = None
+
+    def _post(self, payload):
+        """📤 Gönderimi arka plan thread'ine bırak, akışı bloklama"""
+
+        if not self.webhook_url:
+            return
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_loop, daemon=True)
+            self._sender.start()
+        self._outbox.put(payload)
+
+    def _send_loop(self):
+        while True:
+            payload = self._outbox.get()
+            if payload is None:
+                break
+            # Ara parçalar geçicidir: tek retry, outbox'a alınmaz; karar ve geri sarma olayları kuyruğa alınır
+            ok, status = deliver(self.webhook_url, payload, retries=1,
+                                 spool=payload['stage'].endswith(('-decision', '-truncate')),
+                                 key=idempotency_key(self.symbol, payload['stage'], f"{payload['timestamp']}#{payload['sequence']}"))
+            if not ok:
+                log(f"⚠️ Stream gönderim hatası: {status}", event='stream_webhook_failed', level=logging.WARNING,
+                    status=status)
+
+    def _payload(self, kind, **fields):
+        self._sequence += 1
+        return {
+            'symbol': self.symbol,
+            'stage': f'{self.stage}-{kind}',
+            'sequence': self._sequence,
+            'timestamp': datetime.now().isoformat(),
+            **fields
+        }
+
+    def _flush(self):
+        if self._pending:
+            self._post(self._payload('partial', delta=''.join(self._pending)))
+            self._pending = []
+            self._pending_chars = 0
+        self._last_flush = time.monotonic()
+
+    def _scan_decisions(self):
+        """🎯 Tamamlanmış karar satırlarını erken yakala"""
+
+        patterns = [item for item in DECISION_PATTERNS.get(self.stage, []) if item[0] not in self._fired]
+        if not patterns:
+            return
+
+        text = ''.join(self._text)
+        for name, pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                value = match.group(1).strip()
+                self._fired.add(name)
+                self.decisions[name] = value
+                log(f"🎯 Erken karar yakalandı ({self.stage}/{name})", event='early_decision', field=name,
+                    decision=value)
+                self._post(self._payload('decision', field=name, decision=value))
+                if self.on_decision:
+                    self.on_decision(self.stage, name, value)
+
+    def truncate(self, length, result_file=None):
+        """✂️ Akışı ilk `length` karaktere geri sar; dashboard'a ve dosyaya da uygula"""
+
+        self._flush()
+        text = ''.join(self._text)[:length]
+        self._text = [text]
+        # Atılan kısımda yakalanan kararlar devam akışında yeniden yakalanabilir
+        for name, pattern in DECISION_PATTERNS.get(self.stage, []):
+            if name in self._fired and not pattern.search(text):
+                self._fired.discard(name)
+                self.decisions.pop(name, None)
+        self._post(self._payload('truncate', length=len(text)))
+        if result_file:
+            with open(result_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def consume(self, chunks, result_file=None, append=False):
+        """📡 Akışı tüket; dosyaya yaz (append: dosyaya ekle), webhook'a ilet ve tam metni döndür"""
+
+        output = open(result_file, 'a' if append else 'w', encoding='utf-8') if result_file else None
+        try:
+            for chunk in chunks:
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = time.monotonic()
+
+                self._text.append(chunk)
+                if output:
+                    output.write(chunk)
+                    output.flush()
+
+                self._pending.append(chunk)
+                self._pending_chars += len(chunk)
+                if '\n' in chunk:
+                    self._scan_decisions()
+                if self._pending_chars >= self.min_chars or time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush()
+        finally:
+            if output:
+                output.close()
+
+        self._text.append('\n')
+        self._scan_decisions()
+        self._text.pop()
+        self._flush()
+        return ''.join(self._text)
+
+    def close(self):
+        """🏁 Bekleyen webhook gönderimlerini bitir"""
+
+        if self._sender is not None:
+            self._outbox.put(None)
+            self._sender.join(timeout=30)
+            self._sender = None
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ Artımlı (Streaming) Gösterge Motoru
+LATU Trading System - Streaming Indicator Pipeline
+
+Her yeni dakikalık mumda göstergeleri tüm 24 saatlik pencereyi yeniden
+hesaplamadan, bar başına O(1) (amortize) günceller: çalışan EMA'lar,
+Wilder RSI, ring buffer ile kayan varyans ve monoton kuyruklarla kayan
+max/min. Durum sembol başına JSON olarak saklanıp sonraki çalıştırmada
+kaldığı yerden devam eder.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+from collections import deque
+from datetime import datetime, timezone
+# market_data (pandas) sadece DataFrame/CLI yolunda, fonksiyon içinde yüklenir
+from indicator_params import (
+    WINDOW_MINUTES, EMA_FAST, EMA_SLOW, RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+    BOLLINGER_PERIOD, BOLLINGER_STD, VOLATILITY_MINUTES
+)
+from metrics import log
+
+DEFAULT_STATE_DIR = 'results/indicator_state'
+STATE_VERSION = 1
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+class RollingExtreme:
+    """📏 Monoton kuyrukla kayan pencere max/min (amortize O(1))"""
+
+    def __init__(self, window, mode):
+        self.window = window
+        self.mode = mode
+        self.items = deque()
+
+    def push(self, index, value):
+        if self.mode == 'max':
+            while self.items and self.items[-1][1] <= value:
+                self.items.pop()
+        else:
+            while self.items and self.items[-1][1] >= value:
+                self.items.pop()
+        self.items.append((index, value))
+        while self.items[0][0] <= index - self.window:
+            self.items.popleft()
+
+    def value(self):
+        return self.items[0][1] if self.items else None
+
+
+class IndicatorState:
+    """⚡ Sembol başına artımlı gösterge durumu"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.count = 0
+        self.last_timestamp = None
+        self.first_timestamps = deque(maxlen=WINDOW_MINUTES)
+
+        # Çalışan EMA'lar ve MACD
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_fast = None
+        self.macd_slow = None
+        self.macd_signal = None
+
+        # Wilder RSI
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+        # Bollinger için ring buffer + çalışan toplamlar
+        self.bb_closes = deque(maxlen=BOLLINGER_PERIOD)
+        self.bb_sum = 0.0
+        self.bb_sum_sq = 0.0
+
+        # 24 saatlik pencere: kapanışlar, volume ve kayan max/min
+        self.closes = deque(maxlen=WINDOW_MINUTES)
+        self.volumes = deque(maxlen=WINDOW_MINUTES)
+        self.volume_sum = 0.0
+        self.day_high = RollingExtreme(WINDOW_MINUTES, 'max')
+        self.day_low = RollingExtreme(WINDOW_MINUTES, 'min')
+        self.recent_high = RollingExtreme(VOLATILITY_MINUTES, 'max')
+        self.recent_low = RollingExtreme(VOLATILITY_MINUTES, 'min')
+
+    @staticmethod
+    def _ema(previous, value, alpha):
+        return value if previous is None else previous + alpha * (value - previous)
+
+    def update(self, close, high=None, low=None, volume=0.0, timestamp=None):
+        """⚡ Yeni bir bar ekle; aynı/eski zaman damgalı barları atla"""
+
+        timestamp = timestamp or datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        close = float(close)
+        high = float(high) if high is not None else close
+        low = float(low) if low is not None else close
+        volume = float(volume)
+        index = self.count
+
+        # EMA / MACD
+        self.ema_fast = self._ema(self.ema_fast, close, _alpha(EMA_FAST))
+        self.ema_slow = self._ema(self.ema_slow, close, _alpha(EMA_SLOW))
+        self.macd_fast = self._ema(self.macd_fast, close, _alpha(MACD_FAST))
+        self.macd_slow = self._ema(self.macd_slow, close, _alpha(MACD_SLOW))
+        self.macd_signal = self._ema(self.macd_signal, self.macd_fast - self.macd_slow, _alpha(MACD_SIGNAL))
+
+        # Wilder RSI
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.avg_gain += (max(delta, 0.0) - self.avg_gain) / RSI_PERIOD
+        self.avg_loss += (max(-delta, 0.0) - self.avg_loss) / RSI_PERIOD
+        self.prev_close = close
+
+        # Bollinger ring buffer
+        if len(self.bb_closes) == self.bb_closes.maxlen:
+            dropped = self.bb_closes[0]
+            self.bb_sum -= dropped
+            self.bb_sum_sq -= dropped * dropped
+        self.bb_closes.append(close)
+        self.bb_sum += close
+        self.bb_sum_sq += close * close
+
+        # 24 saatlik pencere
+        if len(self.volumes) == self.volumes.maxlen:
+            self.volume_sum -= self.volumes[0]
+        self.volumes.append(volume)
+        self.volume_sum += volume
+        self.closes.append(close)
+        self.first_timestamps.append(timestamp)
+
+        self.day_high.push(index, high)
+        self.day_low.push(index, low)
+        self.recent_high.push(index, high)
+        self.recent_low.push(index, low)
+
+        self.count += 1
+        self.last_timestamp = timestamp
+        return True
+
+    def update_from_frame(self, data):
+        """📥 DataFrame'den sadece son işlenen bardan yeni olanları ekle"""
+
+        added = 0
+        for timestamp, row in zip(data.index, data[['close', 'high', 'low', 'volume']].itertuples(index=False)):
+            if self.update(row.close, row.high, row.low, row.volume, timestamp.isoformat()):
+                added += 1
+        return added
+
+    def snapshot(self):
+        """📸 market_data.compute_indicators ile aynı anahtarlarla son değerler"""
+
+        if not self.count:
+            return None
+
+        close = self.closes[-1]
+        mean = self.bb_sum / len(self.bb_closes)
+        variance = max(self.bb_sum_sq / len(self.bb_closes) - mean * mean, 0.0)
+        bb_width = 2 * BOLLINGER_STD * math.sqrt(variance) / mean * 100 if mean else 0.0
+
+        if self.avg_loss == 0:
+            rsi = 50.0 if self.avg_gain == 0 else 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+        macd = self.macd_fast - self.macd_slow
+        day_high = self.day_high.value()
+        day_low = self.day_low.value()
+        recent_start = self.closes[-min(VOLATILITY_MINUTES, len(self.closes))]
+
+        return {
+            'bars': len(self.closes),
+            'start': self.first_timestamps[0],
+            'end': self.last_timestamp,
+            'close': close,
+            'change_pct': (close / self.closes[0] - 1) * 100,
+            'volume': self.volume_sum,
+            'day_high': day_high,
+            'day_low': day_low,
+            'range_position_pct': (close - day_low) / (day_high - day_low) * 100 if day_high > day_low else 50.0,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'ema_distance': close - self.ema_slow,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': self.macd_signal,
+            'macd_hist': macd - self.macd_signal,
+            'bollinger_width_pct': bb_width,
+            'volatility_4h_pct': (self.recent_high.value() - self.recent_low.value()) / recent_start * 100
+        }
+
+    def to_dict(self):
+        """💾 JSON'a yazılabilir durum"""
+        return {
+            'version': STATE_VERSION,
+            'symbol': self.symbol,
+            'count': self.count,
+            'last_timestamp': self.last_timestamp,
+            'first_timestamps': list(self.first_timestamps),
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'macd_fast': self.macd_fast,
+            'macd_slow': self.macd_slow,
+            'macd_signal': self.macd_signal,
+            'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss,
+            'bb_closes': list(self.bb_closes),
+            'closes': list(self.closes),
+            'volumes': list(self.volumes),
+            'day_high': list(self.day_high.items),
+            'day_low': list(self.day_low.items),
+            'recent_high': list(self.recent_high.items),
+            'recent_low': list(self.recent_low.items)
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        """📂 Kaydedilmiş durumdan geri yükle"""
+
+        state = cls(payload['symbol'])
+        for name in ('count', 'last_timestamp', 'ema_fast', 'ema_slow', 'macd_fast', 'macd_slow',
+                     'macd_signal', 'prev_close', 'avg_gain', 'avg_loss'):
+            setattr(state, name, payload[name])
+
+        state.first_timestamps.extend(payload['first_timestamps'])
+        state.bb_closes.extend(payload['bb_closes'])
+        state.bb_sum = sum(state.bb_closes)
+        state.bb_sum_sq = sum(value * value for value in state.bb_closes)
+        state.closes.extend(payload['closes'])
+        state.volumes.extend(payload['volumes'])
+        state.volume_sum = sum(state.volumes)
+
+        for name in ('day_high', 'day_low', 'recent_high', 'recent_low'):
+            getattr(state, name).items.extend(tuple(item) for item in payload[name])
+        return state
+
+
+def state_path(symbol, state_dir=DEFAULT_STATE_DIR):
+    return os.path.join(state_dir, f"{symbol.upper()}.json")
+
+def load_state(symbol, state_dir=DEFAULT_STATE_DIR):
+    """📂 Sembol durumunu yükle; yoksa ya da sürüm uyuşmazsa yeni durum"""
+
+    path = state_path(symbol, state_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') == STATE_VERSION:
+            return IndicatorState.from_dict(payload)
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError) as e:
+        log(f"⚠️ Gösterge durumu okunamadı, sıfırdan başlanıyor: {e}", event='state_load_failed',
+            level=logging.WARNING, kind='indicators', symbol=symbol, path=path, error=str(e))
+    return IndicatorState(symbol)
+
+def save_state(state, state_dir=DEFAULT_STATE_DIR):
+    """💾 Durumu atomik olarak kaydet"""
+
+    os.makedirs(state_dir, exist_ok=True)
+    path = state_path(state.symbol, state_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp_path, path)
+
+def main():
+    """⚡ Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Artımlı Gösterge Durumu')
+    parser.add_argument('--symbol', required=True, help='Trading sembolü')
+    parser.add_argument('--data-file', help='Yeni barların okunacağı OHLCV CSV/Parquet dosyası')
+    parser.add_argument('--price', type=float, help='Tek bir yeni fiyat barı')
+    parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR, help='Durum dosyalarının klasörü')
+
+    args = parser.parse_args()
+
+    state = load_state(args.symbol, args.state_dir)
+
+    if args.data_file:
+        from market_data import load_candles
+        try:
+            added = state.update_from_frame(load_candles(args.data_file, args.symbol))
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+        print(f"📥 {added} yeni bar eklendi")
+    if args.price is not None:
+        state.update(args.price)
+
+    save_state(state, args.state_dir)
+
+    snapshot = state.snapshot()
+    if snapshot:
+        from indicator_params import format_indicator_lines
+        print(f"⚡ {args.symbol}: {snapshot['bars']} bar, son: {snapshot['end']}")
+        print(format_indicator_lines(snapshot))
+
+if __name__ == "__main__":
+    main()
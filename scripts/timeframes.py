@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🕰️ Çoklu Zaman Dilimi Mum Önbelleği
+LATU Trading System - Timeframe Pipeline
+
+GPT prompt'unun "1m, 5m, 15m uyum" teyidi ve Claude'un "Multiple
+timeframe perspektifi" için gerçek veri üretir. Sembol başına dakikalık
+barlar NumPy ring buffer'da tutulur; 5m / 15m / 1h / 4h OHLCV barları her
+yeni dakikada artımlı güncellenir (oluşan bar + kapanmış bar ring'i),
+her zaman diliminin EMA'ları kapanan barda bir kez ilerletilir. Hem
+güncelleme hem okuma bar başına O(1)'dir; tüm seriyi yeniden örneklemek
+gerekmez, bu yüzden tek süreç yüzlerce sembole hizmet edebilir.
+
+    python scripts/timeframes.py --symbol BTCUSDT --data-file data/BTCUSDT.csv --state-dir results/indicator_state
+    python scripts/timeframes.py --symbol BTCUSDT --price 43250 --state-dir results/indicator_state
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from metrics import log
+
+# Zaman dilimi -> dakika (bucket'lar epoch'a hizalı: 4h barları 00/04/08... UTC)
+TIMEFRAMES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '4h': 240}
+# GPT prompt'undaki uyum teyidi bu üç dilime bakar
+ALIGNMENT_TIMEFRAMES = ('1m', '5m', '15m')
+
+MTF_EMA_FAST = 9
+MTF_EMA_SLOW = 21
+# Dakikalık ring 24 saat, üst dilimlerin kapanmış bar ring'leri daha kısa
+MINUTE_CAPACITY = 1440
+AGGREGATE_CAPACITY = 300
+# Dosyadan ilk yüklemede 4h EMA'sının ısınmasına yetecek geçmiş
+HISTORY_MINUTES = TIMEFRAMES['4h'] * (MTF_EMA_SLOW + 1)
+
+TREND_UP = 'up'
+TREND_DOWN = 'down'
+TREND_FLAT = 'flat'
+TREND_LABELS = {TREND_UP: 'Yükseliş', TREND_DOWN: 'Düşüş', TREND_FLAT: 'Yatay'}
+
+DEFAULT_STATE_DIR = 'results/indicator_state'
+STATE_VERSION = 1
+
+# Ring satırı: bucket başlangıcı (epoch dakika), open, high, low, close, volume
+MINUTE, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+def _ema(previous, value, alpha):
+    return value if previous is None else previous + alpha * (value - previous)
+
+def epoch_minute(timestamp=None):
+    """🕰️ ISO zaman damgasını (yoksa şu anı) epoch dakikasına çevir"""
+
+    if timestamp is None:
+        moment = datetime.now(timezone.utc)
+    else:
+        moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() // 60)
+
+def _isoformat(minute):
+    return datetime.fromtimestamp(minute * 60, timezone.utc).isoformat()
+
+
+class BarRing:
+    """🔁 Sabit kapasiteli NumPy OHLCV ring buffer'ı (ekleme ve son bar O(1))"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.rows = np.zeros((capacity, 6), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        if self.size < self.capacity:
+            self.rows[(self.start + self.size) % self.capacity] = row
+            self.size += 1
+        else:
+            # Dolu: en eski satırın üzerine yaz
+            self.rows[self.start] = row
+            self.start = (self.start + 1) % self.capacity
+
+    def last(self, count=1):
+        """📤 Son `count` satır (eskiden yeniye, kopya)"""
+
+        count = min(count, self.size)
+        indexes = (self.start + self.size - count + np.arange(count)) % self.capacity
+        return self.rows[indexes]
+
+    def latest(self):
+        return self.rows[(self.start + self.size - 1) % self.capacity] if self.size else None
+
+
+class Timeframe:
+    """📊 Tek zaman dilimi: oluşan bar, kapanmış bar ring'i ve çalışan EMA'lar"""
+
+    def __init__(self, name, minutes, capacity=AGGREGATE_CAPACITY):
+        self.name = name
+        self.minutes = minutes
+        self.bars = BarRing(capacity)
+        # Oluşan (henüz kapanmamış) bar
+        self.current = None
+        # Kapanmış barlar üzerinden EMA'lar
+        self.ema_fast = None
+        self.ema_slow = None
+        self.closed = 0
+
+    def update(self, minute, open_, high, low, close, volume):
+        """➕ Dakikalık barı oluşan bara ekle; bucket değiştiyse önceki barı kapat"""
+
+        bucket = minute - minute % self.minutes
+        if self.current is not None and self.current[MINUTE] != bucket:
+            self._close()
+        if self.current is None:
+            self.current = [bucket, open_, high, low, close, volume]
+            return
+        bar = self.current
+        bar[HIGH] = max(bar[HIGH], high)
+        bar[LOW] = min(bar[LOW], low)
+        bar[CLOSE] = close
+        bar[VOLUME] += volume
+
+    def _close(self):
+        self.bars.append(self.current)
+        close = self.current[CLOSE]
+        self.ema_fast = _ema(self.ema_fast, close, _alpha(MTF_EMA_FAST))
+        self.ema_slow = _ema(self.ema_slow, close, _alpha(MTF_EMA_SLOW))
+        self.closed += 1
+        self.current = None
+
+    def snapshot(self):
+        """📸 Oluşan barın kapanışıyla geçici EMA'lar ve trend bayrakları"""
+
+        if self.current is None:
+            return None
+
+        bar = self.current
+        close = bar[CLOSE]
+        # Kapanmış EMA'yı bozmadan oluşan barı da hesaba kat
+        ema_fast = _ema(self.ema_fast, close, _alpha(MTF_EMA_FAST))
+        ema_slow = _ema(self.ema_slow, close, _alpha(MTF_EMA_SLOW))
+
+        if close > ema_fast > ema_slow:
+            trend = TREND_UP
+        elif close < ema_fast < ema_slow:
+            trend = TREND_DOWN
+        else:
+            trend = TREND_FLAT
+
+        return {
+            'start': _isoformat(int(bar[MINUTE])),
+            'open': float(bar[OPEN]),
+            'high': float(bar[HIGH]),
+            'low': float(bar[LOW]),
+            'close': float(close),
+            'volume': float(bar[VOLUME]),
+            'change_pct': float((close / bar[OPEN] - 1) * 100) if bar[OPEN] else 0.0,
+            'ema_fast': float(ema_fast),
+            'ema_slow': float(ema_slow),
+            'above_ema_fast': bool(close > ema_fast),
+            'ema_fast_above_slow': bool(ema_fast > ema_slow),
+            'trend': trend,
+            'bars': self.closed + 1,
+            # EMA yavaş periyot kadar kapanmış bar görmeden trend bayrağı zayıftır
+            'warm': self.closed >= MTF_EMA_SLOW
+        }
+
+    def to_dict(self):
+        return {
+            'bars': self.bars.last(self.bars.size).tolist(),
+            'current': self.current,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'closed': self.closed
+        }
+
+    def load(self, payload):
+        for row in payload['bars']:
+            self.bars.append(row)
+        self.current = payload['current']
+        self.ema_fast = payload['ema_fast']
+        self.ema_slow = payload['ema_slow']
+        self.closed = payload['closed']
+
+
+class MultiTimeframe:
+    """🕰️ Sembol başına dakikalık ring ve tüm zaman dilimlerinin artımlı barları"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol.upper()
+        self.last_minute = None
+        self.timeframes = {
+            name: Timeframe(name, minutes, MINUTE_CAPACITY if minutes == 1 else AGGREGATE_CAPACITY)
+            for name, minutes in TIMEFRAMES.items()
+        }
+
+    @property
+    def minute_bars(self):
+        """🔁 Kapanmış dakikalık barların ring buffer'ı"""
+        return self.timeframes['1m'].bars
+
+    def push(self, minute, open_, high, low, close, volume=0.0):
+        """⚡ Dakikalık bar (epoch dakika); aynı dakika oluşan barı günceller, eski dakikalar atlanır"""
+
+        if self.last_minute is not None and minute < self.last_minute:
+            return False
+        # Aynı dakikadaki yeni fiyat oluşan barın HIGH/LOW/CLOSE'unu günceller (bkz. Timeframe.update)
+        for timeframe in self.timeframes.values():
+            timeframe.update(minute, open_, high, low, close, volume)
+        added = minute != self.last_minute
+        self.last_minute = minute
+        return added
+
+    def update(self, close, high=None, low=None, volume=0.0, timestamp=None, open_=None):
+        """⚡ streaming_indicators.IndicatorState.update ile aynı imza"""
+
+        close = float(close)
+        return self.push(epoch_minute(timestamp),
+                         float(open_) if open_ is not None else close,
+                         float(high) if high is not None else close,
+                         float(low) if low is not None else close,
+                         close, float(volume))
+
+    def update_from_frame(self, data):
+        """📥 DataFrame'den sadece son işlenen dakikadan yeni barları ekle"""
+
+        # Zaman birimi (ns / us) pandas sürümüne göre değişir; UTC dakikaya çevir
+        minutes = data.index.values.astype('datetime64[m]').astype(np.int64)
+        values = data[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        if self.last_minute is None:
+            # İlk yükleme: EMA'ları ısıtmaya yeten geçmiş yeterli
+            start = max(len(minutes) - HISTORY_MINUTES, 0)
+        else:
+            start = int(np.searchsorted(minutes, self.last_minute, side='right'))
+
+        added = 0
+        for minute, (open_, high, low, close, volume) in zip(minutes[start:].tolist(), values[start:].tolist()):
+            added += self.push(minute, open_, high, low, close, volume)
+        return added
+
+    def snapshot(self):
+        """📸 Zaman dilimi başına trend / EMA bayrakları ve 1m-5m-15m uyumu"""
+
+        if self.last_minute is None:
+            return None
+
+        frames = {name: timeframe.snapshot() for name, timeframe in self.timeframes.items()}
+        trends = {frames[name]['trend'] for name in ALIGNMENT_TIMEFRAMES}
+        alignment = trends.pop() if len(trends) == 1 else 'mixed'
+        return {
+            'end': _isoformat(self.last_minute),
+            'timeframes': frames,
+            'alignment': alignment,
+            'aligned': alignment in (TREND_UP, TREND_DOWN)
+        }
+
+    def to_dict(self):
+        """💾 JSON'a yazılabilir durum"""
+        return {
+            'version': STATE_VERSION,
+            'symbol': self.symbol,
+            'last_minute': self.last_minute,
+            'timeframes': {name: timeframe.to_dict() for name, timeframe in self.timeframes.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        """📂 Kaydedilmiş durumdan geri yükle"""
+
+        state = cls(payload['symbol'])
+        state.last_minute = payload['last_minute']
+        for name, timeframe in state.timeframes.items():
+            timeframe.load(payload['timeframes'][name])
+        return state
+
+
+class TimeframeBook:
+    """📚 Tek süreçte çok sembollü önbellek (worker / batch için thread-safe)"""
+
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        """🕰️ Sembolün durumu (ilk erişimde diskten ya da boş)"""
+
+        symbol = symbol.upper()
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None:
+                state = load_state(symbol, self.state_dir) if self.state_dir else MultiTimeframe(symbol)
+                self._states[symbol] = state
+            return state
+
+    def update(self, symbol, close, high=None, low=None, volume=0.0, timestamp=None):
+        state = self.get(symbol)
+        with self._lock:
+            return state.update(close, high, low, volume, timestamp)
+
+    def update_from_frame(self, symbol, data):
+        state = self.get(symbol)
+        with self._lock:
+            return state.update_from_frame(data)
+
+    def snapshot(self, symbol):
+        state = self.get(symbol)
+        with self._lock:
+            return state.snapshot()
+
+    def save(self):
+        """💾 Tüm sembolleri kaydet (state_dir yoksa sadece bellekte)"""
+
+        if not self.state_dir:
+            return
+        with self._lock:
+            payloads = [state.to_dict() for state in self._states.values()]
+        for payload in payloads:
+            _write_state(payload, self.state_dir)
+
+
+def timeframe_snapshot(data, symbol=''):
+    """📸 OHLCV DataFrame'inin son HISTORY_MINUTES dakikasından tek seferlik snapshot"""
+
+    state = MultiTimeframe(symbol)
+    state.update_from_frame(data)
+    return state.snapshot()
+
+def format_timeframe_lines(snapshot):
+    """📝 Zaman dilimi trendlerini prompt'a eklenecek satırlara çevir"""
+
+    lines = []
+    for name, frame in snapshot['timeframes'].items():
+        warm = '' if frame['warm'] else ', ısınmamış'
+        lines.append(f"- {name}: {TREND_LABELS[frame['trend']]} | Kapanış ${frame['close']:,.2f} | "
+                     f"EMA{MTF_EMA_FAST}: ${frame['ema_fast']:,.2f} | EMA{MTF_EMA_SLOW}: ${frame['ema_slow']:,.2f} | "
+                     f"bar %{frame['change_pct']:+.2f} ({frame['bars']} bar{warm})")
+    names = '/'.join(ALIGNMENT_TIMEFRAMES)
+    if snapshot['aligned']:
+        lines.append(f"- {names} uyumu: Var ({TREND_LABELS[snapshot['alignment']]})")
+    else:
+        lines.append(f"- {names} uyumu: Yok (karışık)")
+    return '\n'.join(lines)
+
+
+def state_path(symbol, state_dir=DEFAULT_STATE_DIR):
+    return os.path.join(state_dir, f"{symbol.upper()}.timeframes.json")
+
+def load_state(symbol, state_dir=DEFAULT_STATE_DIR):
+    """📂 Sembol durumunu yükle; yoksa ya da sürüm uyuşmazsa yeni durum"""
+
+    path = state_path(symbol, state_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') == STATE_VERSION:
+            return MultiTimeframe.from_dict(payload)
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError) as e:
+        log(f"⚠️ Zaman dilimi durumu okunamadı, sıfırdan başlanıyor: {e}", event='state_load_failed',
+            level=logging.WARNING, kind='timeframes', symbol=symbol, path=path, error=str(e))
+    return MultiTimeframe(symbol)
+
+def _write_state(payload, state_dir):
+    os.makedirs(state_dir, exist_ok=True)
+    path = state_path(payload['symbol'], state_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def save_state(state, state_dir=DEFAULT_STATE_DIR):
+    """💾 Durumu atomik olarak kaydet"""
+    _write_state(state.to_dict(), state_dir)
+
+def main():
+    """🕰️ Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Çoklu Zaman Dilimi Önbelleği')
+    parser.add_argument('--symbol', required=True, help='Trading sembolü')
+    parser.add_argument('--data-file', help='Yeni barların okunacağı OHLCV CSV/Parquet dosyası')
+    parser.add_argument('--price', type=float, help='Tek bir yeni fiyat barı')
+    parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR, help='Durum dosyalarının klasörü')
+
+    args = parser.parse_args()
+
+    state = load_state(args.symbol, args.state_dir)
+
+    if args.data_file:
+        from market_data import load_candles
+        try:
+            added = state.update_from_frame(load_candles(args.data_file, args.symbol))
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+        print(f"📥 {added} yeni bar eklendi")
+    if args.price is not None:
+        state.update(args.price)
+
+    save_state(state, args.state_dir)
+
+    snapshot = state.snapshot()
+    if snapshot:
+        print(f"🕰️ {state.symbol}: {snapshot['timeframes']['1m']['bars']} dakikalık bar, son: {snapshot['end']}")
+        print(format_timeframe_lines(snapshot))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔗 Ortak HTTP Taşıma Katmanı
+LATU Trading System - Transport Pipeline
+
+Dashboard webhook'ları ve GitHub dispatch çağrıları için tek bir
+keep-alive `requests.Session` havuzu. Sınırlı connect/read timeout,
+5xx/429'da jitter'lı exponential backoff, (sembol, aşama, zaman) başına
+idempotency anahtarı ve başarısız gönderimler için diskte kuyruk
+(outbox) + sonradan tekrar oynatma sağlar. `defer_delivery()` bir gönderimi hiç
+denemeden outbox'a alır; Actions job'ları sonraki aşamanın dispatch'ini
+handoff artifact'ı yüklendikten sonra `--replay` ile gönderir.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from metrics import log, record_http, record_retry
+
+# Bağlantı / okuma timeout'ları (saniye)
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 32
+
+DEFAULT_OUTBOX_DIR = 'results/outbox'
+OUTBOX_MAX_ATTEMPTS = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """🔗 Süreç içinde paylaşılan keep-alive session"""
+
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # requests ilk gönderimde yüklenir: --help ve mock çalıştırmalar ~40ms kazanır
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+def idempotency_key(symbol, stage, timestamp):
+    """🔑 (sembol, aşama, zaman) için sabit idempotency anahtarı"""
+    return hashlib.sha256(f"{symbol}|{stage}|{timestamp}".encode('utf-8')).hexdigest()[:32]
+
+def _backoff(attempt, retry_after=None):
+    """⏳ Full-jitter exponential backoff (Retry-After varsa ona uy)"""
+
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def _headers(headers=None, auth_env=None, key=None):
+    merged = dict(headers or {})
+    if auth_env:
+        merged['Authorization'] = f'token {os.environ[auth_env]}'
+    if key:
+        merged['Idempotency-Key'] = key
+    return merged
+
+def post_json(url, payload, headers=None, auth_env=None, key=None,
+              timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """📤 Retry'li JSON POST; son yanıtı döndürür (bağlantı hiç kurulamazsa istisna)"""
+
+    import requests
+
+    session = get_session()
+    request_headers = _headers(headers, auth_env, key)
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.post(url, json=payload, headers=request_headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            record_retry(url)
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            record_retry(url)
+            time.sleep(_backoff(attempt, response.headers.get('Retry-After')))
+            continue
+        return response
+
+
+def _spool(url, payload, headers, auth_env, key, expected, reason, attempts=1):
+    """💾 Başarısız gönderimi outbox'a yaz (token'lar diske yazılmaz)"""
+
+    outbox_dir = os.environ.get('LATU_OUTBOX_DIR', DEFAULT_OUTBOX_DIR)
+    os.makedirs(outbox_dir, exist_ok=True)
+
+    entry = {
+        'id': key or uuid.uuid4().hex,
+        'url': url,
+        'payload': payload,
+        'headers': headers or {},
+        'auth_env': auth_env,
+        'key': key,
+        'expected': list(expected),
+        'attempts': attempts,
+        'last_error': reason,
+        'queued_at': time.time()
+    }
+    path = os.path.join(outbox_dir, f"{entry['id']}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+def deliver(url, payload, headers=None, auth_env=None, key=None, expected=(200,),
+            timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, spool=True):
+    """📬 Teslim et; başarısızsa outbox'a al. (başarılı_mı, durum) döndürür"""
+
+    import requests
+
+    started = time.perf_counter()
+    try:
+        response = post_json(url, payload, headers, auth_env, key, timeout, retries)
+        if response.status_code in expected:
+            record_http(url, time.perf_counter() - started, True)
+            return True, response.status_code
+        reason = f'HTTP {response.status_code}'
+        status = response.status_code
+        # 4xx (429 hariç) kalıcı hatadır, tekrar denemenin anlamı yok
+        retryable = response.status_code in RETRY_STATUSES
+    except (requests.RequestException, KeyError) as e:
+        reason = str(e)
+        status = None
+        retryable = not isinstance(e, KeyError)
+
+    record_http(url, time.perf_counter() - started, False)
+    if spool and retryable:
+        path = _spool(url, payload, headers, auth_env, key, expected, reason)
+        log(f"📥 Gönderim kuyruğa alındı: {path}", event='outbox_queued', path=path, reason=reason)
+    return False, status if status is not None else reason
+
+def defer_delivery(url, payload, headers=None, auth_env=None, key=None, expected=(200,)):
+    """⏸️ Gönderimi şimdi yapma, outbox'a al (sonra replay_outbox ile teslim edilir)"""
+
+    path = _spool(url, payload, headers, auth_env, key, expected, 'ertelendi', attempts=0)
+    log(f"⏸️ Gönderim ertelendi: {path}", event='outbox_deferred', path=path)
+    return path
+
+def replay_outbox(outbox_dir=None, retries=1):
+    """🔁 Outbox'taki gönderimleri tekrar dene; (başarılı, kalan) döndür"""
+
+    outbox_dir = outbox_dir or os.environ.get('LATU_OUTBOX_DIR', DEFAULT_OUTBOX_DIR)
+    if not os.path.isdir(outbox_dir):
+        return 0, 0
+
+    delivered = remaining = 0
+    for name in sorted(os.listdir(outbox_dir)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(outbox_dir, name)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        ok, status = deliver(entry['url'], entry['payload'], entry['headers'], entry['auth_env'],
+                             entry['key'], tuple(entry['expected']), retries=retries, spool=False)
+        if ok:
+            os.remove(path)
+            delivered += 1
+            continue
+
+        entry['attempts'] += 1
+        entry['last_error'] = str(status)
+        if entry['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+            os.replace(path, f"{path}.dead")
+            log(f"💀 Gönderim {entry['attempts']} denemeden sonra bırakıldı: {name}", event='outbox_dead',
+                attempts=entry['attempts'])
+            continue
+
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+        remaining += 1
+
+    return delivered, remaining
+
+def main():
+    """🔗 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Transport Outbox Yönetimi')
+    parser.add_argument('--replay', action='store_true', help='Outbox\'taki başarısız gönderimleri tekrar dene')
+    parser.add_argument('--outbox-dir', help='Outbox klasörü (varsayılan: LATU_OUTBOX_DIR veya results/outbox)')
+    parser.add_argument('--retries', type=int, default=1, help='Gönderim başına deneme (backoff ile)')
+
+    args = parser.parse_args()
+
+    if args.replay:
+        delivered, remaining = replay_outbox(args.outbox_dir, args.retries)
+        print(f"🔁 Outbox: {delivered} teslim edildi, {remaining} bekliyor")
+        if remaining:
+            exit(1)
+
+if __name__ == "__main__":
+    main()
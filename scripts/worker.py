@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏭 Kalıcı Analiz Worker Servisi
+LATU Trading System - Worker Pipeline
+
+Her analiz için yeni bir Python süreci başlatmak yerine uzun ömürlü bir
+daemon, yerel kuyruktan istekleri çeker. openai / anthropic / requests
+bir kez import edilir; LLM client'ları ve HTTP keep-alive havuzu tüm
+istekler arasında paylaşılır. Kuyruk SQLite tabanlıdır (birden fazla
+üretici süreç güvenle yazabilir); testler ve benchmark için aynı arayüzü
+sunan bellek içi MemoryQueue vardır. Worker havuzu boyutu
+ayarlanabilir, SIGTERM/SIGINT ile yeni iş alınmadan eldeki işler bitirilir
+(graceful drain), kuyruk derinliği sınırı aşılınca dışarıdan gelen yeni
+istek reddedilir (backpressure; worker'ın eklediği sonraki aşama
+istekleri bu sınıra takılmaz). Başarısız istekler exponential backoff ile
+(`not_before`) yeniden denenir; geçersiz istekler yeniden denenmez.
+`--state-dir` ile sembol başına artımlı göstergeler ve çoklu zaman dilimi
+önbelleği (TimeframeBook) bellekte tutulur: her istek sadece yeni fiyatı
+O(1) ekler, durum dosyaları başlangıçta okunur ve drain'de yazılır. `--coalesce` ile aynı sembol için eşzamanlı gelen
+istekler tek çalıştırmada birleştirilir (bkz. coalesce.py).
+
+    python scripts/worker.py serve --workers 4
+    python scripts/worker.py submit --symbol BTCUSDT --price 65000 --change 1.2 --volume 1500000
+    python scripts/worker.py status
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import random
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+import metrics
+from metrics import log
+from checkpoint import open_checkpoint, run_stage
+from handoff import attach_results, load_ref
+
+DEFAULT_QUEUE_PATH = 'results/queue.sqlite'
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_DEPTH = 100
+DEFAULT_MAX_ATTEMPTS = 3
+# Bu süreden uzun 'running' kalan istekler çökmüş worker'dan kalmıştır
+DEFAULT_LEASE_SECONDS = 600
+POLL_INTERVAL = 0.2
+# Yeniden deneme gecikmesi: RETRY_BACKOFF_BASE * 2^(deneme-1), en fazla RETRY_BACKOFF_MAX (saniye)
+RETRY_BACKOFF_BASE = 5.0
+RETRY_BACKOFF_MAX = 300.0
+
+# İstek türleri (dispatch payload'undaki 'stage' alanıyla aynı adlar)
+STAGE_PIPELINE = 'pipeline'
+STAGE_GPT = 'gpt-first'
+STAGE_CLAUDE = 'claude-detailed'
+STAGE_FINAL = 'final-comparison'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    not_before REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status, id);
+"""
+
+
+class QueueFull(Exception):
+    """🚧 Kuyruk derinliği sınırı aşıldı (backpressure)"""
+
+
+class InvalidRequest(ValueError):
+    """🚫 İstek hiçbir denemede işlenemez (bilinmeyen tür / eksik alan); yeniden denenmez"""
+
+
+def with_run_id(request):
+    """🔖 Kalıcı run_id: yeniden denemeler aynı checkpoint'ten devam eder"""
+
+    if request.get('run_id'):
+        return request
+    return dict(request, run_id=uuid.uuid4().hex[:16])
+
+def retry_delay(attempts):
+    """⏳ Yeniden deneme gecikmesi: exponential backoff, yarısı jitter"""
+
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def require(request, *names):
+    """🚫 Eksik alanlı istekler yeniden denenmeden başarısız olur"""
+
+    missing = [name for name in names if request.get(name) is None]
+    if missing:
+        raise InvalidRequest(f"İstekte eksik alan: {', '.join(missing)}")
+
+def stage_input(request, name):
+    """📤 Aşama isteğindeki üst aşama sonucu (tam metin ya da handoff referansı)"""
+
+    if request.get(name):
+        return request[name]
+    return load_ref(request[f'{name}_ref'])
+
+def _stage_checkpoint(run_id, symbol, inputs=None, **outputs):
+    """📌 Aşama isteğinin checkpoint'i; payload'daki üst aşama çıktıları da yazılır"""
+
+    checkpoint = open_checkpoint(run_id, symbol, inputs)
+    if checkpoint is not None:
+        for stage, output in outputs.items():
+            if not checkpoint.output(stage):
+                checkpoint.complete(stage, output)
+    return checkpoint
+
+
+class MemoryQueue:
+    """🧪 Süreç içi kuyruk (test / benchmark için SQLiteQueue yerine)"""
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH):
+        self.max_depth = max_depth
+        self._pending = collections.deque()
+        self._records = {}
+        self._next_id = 1
+        self._condition = threading.Condition()
+
+    def put(self, request, internal=False):
+        """📮 İstek ekle; internal=True (worker'ın sonraki aşaması) derinlik sınırına takılmaz"""
+        request = with_run_id(request)
+        with self._condition:
+            if not internal and self.max_depth and len(self._pending) >= self.max_depth:
+                raise QueueFull(f"Kuyruk dolu ({len(self._pending)}/{self.max_depth})")
+            request_id = self._next_id
+            self._next_id += 1
+            self._records[request_id] = {'id': request_id, 'payload': request, 'status': 'pending', 'attempts': 0,
+                                         'enqueued_at': time.time(), 'started_at': None, 'finished_at': None,
+                                         'error': None, 'not_before': 0.0}
+            self._pending.append(request_id)
+            self._condition.notify()
+            return request_id
+
+    def get(self, timeout=None):
+        """📥 Sıradaki isteği al ((id, istek) ya da timeout'ta None)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                request_id = next((request_id for request_id in self._pending
+                                   if self._records[request_id]['not_before'] <= now), None)
+                if request_id is not None:
+                    break
+                # Geri çekilmedeki isteklerin en erkeni ya da timeout'a kadar bekle
+                waits = [self._records[request_id]['not_before'] - now for request_id in self._pending]
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    waits.append(remaining)
+                self._condition.wait(min(waits) if waits else None)
+            self._pending.remove(request_id)
+            record = self._records[request_id]
+            record.update(status='running', started_at=time.time(), attempts=record['attempts'] + 1)
+            return request_id, record['payload']
+
+    def ack(self, request_id):
+        with self._condition:
+            self._records[request_id].update(status='done', finished_at=time.time(), error=None)
+            self._condition.notify_all()
+
+    def fail(self, request_id, error, retry, delay=0.0):
+        with self._condition:
+            record = self._records[request_id]
+            record['error'] = error
+            if retry:
+                record.update(status='pending', not_before=time.time() + delay)
+                self._pending.append(request_id)
+            else:
+                record.update(status='failed', finished_at=time.time())
+            self._condition.notify_all()
+
+    def depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def record(self, request_id):
+        with self._condition:
+            return dict(self._records[request_id])
+
+    def counts(self):
+        with self._condition:
+            return dict(collections.Counter(record['status'] for record in self._records.values()))
+
+    def recover(self, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return 0
+
+    def wait_idle(self, timeout=None):
+        """⏳ Bekleyen ve çalışan istek kalmayana kadar bekle"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: all(record['status'] in ('done', 'failed') for record in self._records.values()), timeout)
+
+
+class SQLiteQueue:
+    """🗃️ SQLite tabanlı kalıcı kuyruk (üretici CLI'lar ve daemon aynı dosyayı paylaşır)"""
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_depth=DEFAULT_MAX_DEPTH):
+        self.path = path
+        self.max_depth = max_depth
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Aynı süreçteki put()'lar bekleyen worker'ları hemen uyandırır
+        self._wakeup = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        # Eski kuyruk dosyaları not_before sütunu olmadan oluşturulmuş olabilir
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(requests)')}
+        if 'not_before' not in columns:
+            self._conn.execute('ALTER TABLE requests ADD COLUMN not_before REAL NOT NULL DEFAULT 0')
+
+    def put(self, request, internal=False):
+        """📮 İstek ekle; internal=True (worker'ın sonraki aşaması) derinlik sınırına takılmaz"""
+        request = with_run_id(request)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                depth = self._conn.execute("SELECT COUNT(*) FROM requests WHERE status = 'pending'").fetchone()[0]
+                if not internal and self.max_depth and depth >= self.max_depth:
+                    raise QueueFull(f"Kuyruk dolu ({depth}/{self.max_depth})")
+                cursor = self._conn.execute('INSERT INTO requests (payload, enqueued_at) VALUES (?, ?)',
+                                            (json.dumps(request, ensure_ascii=False), time.time()))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def _claim(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            row = self._conn.execute(
+                "SELECT id, payload FROM requests WHERE status = 'pending' AND not_before <= ? ORDER BY id LIMIT 1",
+                (time.time(),)).fetchone()
+            if row:
+                self._conn.execute("UPDATE requests SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                                   "WHERE id = ?", (time.time(), row[0]))
+            self._conn.execute('COMMIT')
+        return (row[0], json.loads(row[1])) if row else None
+
+    def get(self, timeout=None):
+        """📥 Sıradaki isteği al ((id, istek) ya da timeout'ta None)"""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            claimed = self._claim()
+            if claimed:
+                return claimed
+            remaining = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if remaining <= 0:
+                return None
+            # Başka süreçlerin yazdıkları için kısa aralıklı yoklama
+            self._wakeup.wait(remaining)
+            self._wakeup.clear()
+
+    def _finish(self, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def ack(self, request_id):
+        self._finish("UPDATE requests SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+                     (time.time(), request_id))
+
+    def fail(self, request_id, error, retry, delay=0.0):
+        if retry:
+            self._finish("UPDATE requests SET status = 'pending', error = ?, not_before = ? WHERE id = ?",
+                         (error, time.time() + delay, request_id))
+        else:
+            self._finish("UPDATE requests SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                         (time.time(), error, request_id))
+
+    def depth(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM requests WHERE status = 'pending'").fetchone()[0]
+
+    def record(self, request_id):
+        with self._lock:
+            cursor = self._conn.execute('SELECT * FROM requests WHERE id = ?', (request_id,))
+            row = cursor.fetchone()
+            names = [column[0] for column in cursor.description]
+        if row is None:
+            raise KeyError(request_id)
+        record = dict(zip(names, row))
+        record['payload'] = json.loads(record['payload'])
+        return record
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute('SELECT status, COUNT(*) FROM requests GROUP BY status').fetchall())
+
+    def recover(self, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """♻️ Çökmüş worker'dan kalan 'running' istekleri kuyruğa geri al"""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE requests SET status = 'pending' "
+                                        "WHERE status = 'running' AND started_at < ?",
+                                        (time.time() - lease_seconds,))
+            return cursor.rowcount
+
+
+def queue_from_env(path=None, max_depth=None):
+    """🗃️ LATU_QUEUE_PATH / LATU_QUEUE_MAX_DEPTH ile SQLiteQueue"""
+
+    path = path or os.environ.get('LATU_QUEUE_PATH', DEFAULT_QUEUE_PATH)
+    if max_depth is None:
+        max_depth = int(os.environ.get('LATU_QUEUE_MAX_DEPTH', DEFAULT_MAX_DEPTH))
+    return SQLiteQueue(path, max_depth)
+
+def warm_backend(backend):
+    """🔥 Sarılmış backend zincirindeki canlı client'ları önceden kur"""
+
+    while backend is not None:
+        if hasattr(type(backend), 'warm'):
+            backend.warm()
+        backend = getattr(backend, 'backend', None)
+
+
+class WorkerPool:
+    """🏭 Kuyruktan istek çeken sıcak worker thread havuzu"""
+
+    def __init__(self, queue, workers=DEFAULT_WORKERS, backend=None, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 coalescer=None, state_dir=None):
+        from llm_backend import get_backend
+
+        self.queue = queue
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.coalescer = coalescer
+        self.state_dir = state_dir
+        # Sembol başına bellek içi gösterge durumu; tüm worker thread'leri paylaşır
+        self.timeframes = None
+        self._indicator_states = {}
+        self._indicator_lock = threading.Lock()
+        if state_dir:
+            from timeframes import TimeframeBook
+            self.timeframes = TimeframeBook(state_dir)
+        # Tek backend (ve içindeki client'lar) tüm istekler arasında paylaşılır
+        self.backend = backend or get_backend()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+    def start(self):
+        from transport import get_session
+
+        warm_backend(self.backend)
+        get_session()
+        recovered = self.queue.recover()
+        if recovered:
+            log(f"♻️ {recovered} yarım kalmış istek kuyruğa geri alındı", event='worker_recovered', count=recovered)
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f'latu-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        log(f"🏭 {self.workers} worker başlatıldı", event='worker_started', workers=self.workers)
+        return self
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            claimed = self.queue.get(timeout=POLL_INTERVAL)
+            if claimed is None:
+                continue
+            request_id, request = claimed
+            with self._active_lock:
+                self._active += 1
+            try:
+                self._process(request_id, request)
+            finally:
+                with self._active_lock:
+                    self._active -= 1
+
+    def _process(self, request_id, request):
+        stage = request.get('stage', STAGE_PIPELINE)
+        started = time.perf_counter()
+        permanent = False
+        try:
+            ok = self.handle(request)
+            error = None if ok else 'aşama sonuç döndürmedi'
+        except InvalidRequest as e:
+            ok, error, permanent = False, f'{type(e).__name__}: {e}', True
+        except Exception as e:
+            ok, error = False, f'{type(e).__name__}: {e}'
+
+        seconds = time.perf_counter() - started
+        metrics.registry.observe('latu_worker_request_seconds', seconds, stage=stage)
+        if ok:
+            self.queue.ack(request_id)
+            metrics.registry.inc('latu_worker_requests_total', stage=stage, status='done')
+            log(f"✅ İstek #{request_id} tamamlandı: {request.get('symbol')} {stage} ({seconds:.2f}s)",
+                event='worker_done', request_id=request_id, seconds=round(seconds, 6))
+            return
+
+        attempts = self.queue.record(request_id)['attempts']
+        retry = not permanent and attempts < self.max_attempts and not self._stopping.is_set()
+        delay = retry_delay(attempts) if retry else 0.0
+        self.queue.fail(request_id, error, retry, delay)
+        metrics.registry.inc('latu_worker_requests_total', stage=stage, status='retry' if retry else 'failed')
+        log(f"❌ İstek #{request_id} başarısız ({attempts}. deneme): {error}"
+            + (f", {delay:.1f}s sonra yeniden denenecek" if retry else ''), event='worker_failed',
+            request_id=request_id, attempts=attempts, retry=retry, delay=round(delay, 3), error=error)
+
+    def handle(self, request):
+        """🎯 İsteği türüne göre çalıştır; aşama istekleri sonraki aşamayı kuyruğa ekler"""
+
+        stage = request.get('stage', STAGE_PIPELINE)
+        require(request, 'symbol')
+        symbol = request['symbol']
+        webhook_url = request.get('webhook_url')
+
+        if stage in (STAGE_PIPELINE, STAGE_GPT):
+            require(request, 'price', 'change', 'volume')
+            run = self._run_pipeline if stage == STAGE_PIPELINE else self._run_gpt
+            snapshot = {'price': request['price'], 'change': request['change'], 'volume': request['volume']}
+            if self.coalescer is None:
+                return bool(run(request, snapshot))
+
+            # Aynı sembol için çalışan istek varsa onun sonucuna bağlan
+            from coalesce import flight_key, KIND_PIPELINE, KIND_GPT
+
+            key = flight_key(symbol, KIND_PIPELINE if stage == STAGE_PIPELINE else KIND_GPT)
+            result, _ = self.coalescer.run(key, snapshot, lambda fresh: run(request, fresh))
+            return bool(result)
+
+        if stage == STAGE_CLAUDE:
+            from claude_analysis import claude_detailed_analysis, send_result_to_dashboard
+
+            gpt_result = stage_input(request, 'gpt_result')
+            with metrics.run_context(symbol, request.get('run_id')) as run_id:
+                checkpoint = _stage_checkpoint(run_id, symbol, gpt=gpt_result)
+                claude_result = run_stage(checkpoint, 'claude', claude_detailed_analysis, symbol, gpt_result,
+                                          backend=self.backend)
+            if claude_result and webhook_url:
+                send_result_to_dashboard(symbol, 'claude-completed', claude_result, webhook_url)
+            if claude_result:
+                # Kuyruk satırında tam metinler yerine handoff referansları
+                # Kendi aşaması biten istek backpressure yüzünden başarısız sayılmaz
+                self.queue.put(attach_results({'stage': STAGE_FINAL, 'symbol': symbol, 'webhook_url': webhook_url,
+                                               'run_id': run_id}, gpt_result=gpt_result,
+                                              claude_result=claude_result), internal=True)
+            return bool(claude_result)
+
+        if stage == STAGE_FINAL:
+            from final_comparison import final_comparison_analysis, send_final_result_to_dashboard
+
+            gpt_result = stage_input(request, 'gpt_result')
+            claude_result = stage_input(request, 'claude_result')
+            with metrics.run_context(symbol, request.get('run_id')) as run_id:
+                checkpoint = _stage_checkpoint(run_id, symbol, gpt=gpt_result, claude=claude_result)
+                final_result = run_stage(checkpoint, 'final', final_comparison_analysis, symbol, gpt_result,
+                                         claude_result, backend=self.backend, narrative=request.get('narrative'))
+            if checkpoint is not None:
+                checkpoint.finish(None if final_result else 'final aşaması başarısız')
+            if final_result and webhook_url:
+                send_final_result_to_dashboard(symbol, final_result, webhook_url)
+            return bool(final_result)
+
+        raise InvalidRequest(f"Bilinmeyen istek türü: {stage}")
+
+    def _indicators(self, symbol, price):
+        """⚡ Yeni fiyatı bellek içi gösterge ve zaman dilimi durumuna ekle (--state-dir yoksa None)"""
+
+        if self.timeframes is None:
+            return None
+        from streaming_indicators import load_state
+
+        key = symbol.upper()
+        with self._indicator_lock:
+            state = self._indicator_states.get(key)
+            if state is None:
+                state = self._indicator_states[key] = load_state(key, self.state_dir)
+            state.update(price)
+            indicators = state.snapshot()
+        self.timeframes.update(key, price)
+        indicators['timeframes'] = self.timeframes.snapshot(key)
+        return indicators
+
+    def save_state(self):
+        """💾 Bellek içi gösterge durumlarını diske yaz"""
+
+        if self.timeframes is None:
+            return
+        from streaming_indicators import save_state
+
+        with self._indicator_lock:
+            for state in self._indicator_states.values():
+                save_state(state, self.state_dir)
+        self.timeframes.save()
+
+    def _run_pipeline(self, request, snapshot):
+        from orchestrator import run_pipeline
+
+        # Yeniden denemeler aynı run_id ile checkpoint'teki tamamlanmış aşamalardan devam eder
+        results = run_pipeline(request['symbol'], snapshot['price'], snapshot['change'], snapshot['volume'],
+                               request.get('webhook_url'), backend=self.backend,
+                               indicators=self._indicators(request['symbol'], snapshot['price']),
+                               stream=request.get('stream', False),
+                               narrative=request.get('narrative'), speculative=request.get('speculative', False),
+                               run_id=request.get('run_id'))
+        return results if results['final'] else None
+
+    def _run_gpt(self, request, snapshot):
+        # Eski dispatch zinciri: GitHub yerine aynı kuyruğa sonraki aşama eklenir
+        from gpt_analysis import gpt_first_analysis, send_result_to_dashboard
+
+        symbol = request['symbol']
+        webhook_url = request.get('webhook_url')
+        with metrics.run_context(symbol, request.get('run_id')) as run_id:
+            checkpoint = _stage_checkpoint(run_id, symbol, inputs=snapshot)
+            gpt_result = run_stage(checkpoint, 'gpt', gpt_first_analysis, symbol, snapshot['price'],
+                                   snapshot['change'], snapshot['volume'], backend=self.backend,
+                                   indicators=self._indicators(symbol, snapshot['price']))
+        if gpt_result and webhook_url:
+            send_result_to_dashboard(symbol, 'gpt-completed', gpt_result, webhook_url)
+        if gpt_result:
+            self.queue.put(attach_results({'stage': STAGE_CLAUDE, 'symbol': symbol, 'webhook_url': webhook_url,
+                                           'run_id': run_id}, gpt_result=gpt_result), internal=True)
+        return gpt_result
+
+    @property
+    def active(self):
+        with self._active_lock:
+            return self._active
+
+    def stop(self):
+        """🛑 Yeni istek almayı bırak (çalışan istekler sürer)"""
+        self._stopping.set()
+
+    def drain(self, timeout=None):
+        """🛑 Yeni istek alma, çalışan istekleri bitir (graceful drain)"""
+
+        self.stop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        self.save_state()
+        return all(not thread.is_alive() for thread in self._threads)
+
+    def wait(self):
+        """⏳ drain() çağrılana kadar bekle"""
+        while not self._stopping.wait(1.0):
+            pass
+
+
+def serve(args):
+    """🏭 Daemon: kuyruğu tüket, SIGTERM/SIGINT ile drain et"""
+
+    from llm_backend import get_backend
+
+    metrics.configure(args.metrics_port, args.metrics_file)
+    queue = queue_from_env(args.queue, args.max_depth)
+    from coalesce import coalescer_from_env
+
+    pool = WorkerPool(queue, args.workers, get_backend(args.backend), args.max_attempts,
+                      coalescer_from_env(args.coalesce), args.state_dir)
+
+    def stop(signum, frame):
+        log(f"🛑 Sinyal {signum}: yeni istek alınmıyor, {pool.active} çalışan istek bitiriliyor",
+            event='worker_draining', active=pool.active)
+        pool.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    depth = queue.depth()
+    log(f"🏭 LATU Worker Servisi Başlatıldı, kuyruk: {queue.path} (bekleyen: {depth}, sınır: {queue.max_depth})",
+        event='worker_started', queue=queue.path, depth=depth, max_depth=queue.max_depth, workers=args.workers)
+    pool.start()
+    pool.wait()
+    drained = pool.drain(args.drain_timeout)
+    if pool.coalescer:
+        stats = pool.coalescer.stats()
+        log(f"🔗 Çalıştırılan: {stats['executed']}, birleştirilen: {stats['coalesced']}", event='coalesce_stats',
+            executed=stats['executed'], coalesced=stats['coalesced'])
+    if drained:
+        log("✅ Worker servisi durduruldu", event='worker_stopped')
+    else:
+        log("⚠️ Drain süresi doldu, bazı istekler yarım kaldı", event='worker_stopped', level=logging.WARNING,
+            drained=False)
+
+def submit(args):
+    """📮 Kuyruğa istek ekle (kuyruk doluysa çıkış kodu 2)"""
+
+    request = {'stage': args.stage, 'symbol': args.symbol, 'webhook_url': args.webhook_url}
+    if args.stage in (STAGE_PIPELINE, STAGE_GPT):
+        if None in (args.price, args.change, args.volume):
+            raise SystemExit('❌ --price, --change ve --volume gerekli')
+        request.update(price=args.price, change=args.change, volume=args.volume)
+    if args.stage == STAGE_PIPELINE:
+        request.update(speculative=args.speculative, narrative=args.narrative)
+    if args.stage in (STAGE_CLAUDE, STAGE_FINAL):
+        if not args.gpt_result or (args.stage == STAGE_FINAL and not args.claude_result):
+            raise SystemExit('❌ --gpt-result (final için ayrıca --claude-result) gerekli')
+        request['gpt_result'] = args.gpt_result
+    if args.stage == STAGE_FINAL:
+        request['claude_result'] = args.claude_result
+
+    queue = queue_from_env(args.queue, args.max_depth)
+    try:
+        request_id = queue.put(request)
+    except QueueFull as e:
+        print(f"🚧 {e}, istek reddedildi")
+        exit(2)
+    print(f"📮 İstek kuyruğa alındı: #{request_id} ({args.symbol}, {args.stage})")
+
+def status(args):
+    """📊 Kuyruk durumunu göster"""
+
+    queue = queue_from_env(args.queue, args.max_depth)
+    counts = queue.counts()
+    print(f"🗃️ Kuyruk: {queue.path}")
+    for name in ('pending', 'running', 'done', 'failed'):
+        print(f"   {name:<8} {counts.get(name, 0)}")
+
+def main():
+    """🏭 Ana fonksiyon"""
+
+    parser = argparse.ArgumentParser(description='LATU Kalıcı Analiz Worker Servisi')
+    parser.add_argument('--queue', help='Kuyruk SQLite dosyası (varsayılan: LATU_QUEUE_PATH veya results/queue.sqlite)')
+    parser.add_argument('--max-depth', type=int, help='Bekleyen istek sınırı (varsayılan: LATU_QUEUE_MAX_DEPTH veya 100)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='Kuyruğu tüketen daemon')
+    serve_parser.add_argument('--workers', type=int, default=int(os.environ.get('LATU_WORKERS', DEFAULT_WORKERS)))
+    serve_parser.add_argument('--backend', choices=['live', 'mock'], help='LLM backend (varsayılan: LATU_LLM_BACKEND)')
+    serve_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='İstek başına deneme')
+    serve_parser.add_argument('--drain-timeout', type=float, default=120.0, help='Durdurmada bekleme süresi (saniye)')
+    serve_parser.add_argument('--state-dir', help='Artımlı gösterge / zaman dilimi durumu klasörü (bellekte tutulur, '
+                                                   'drain\'de yazılır)')
+    serve_parser.add_argument('--coalesce', choices=['off', 'memory', 'sqlite'],
+                              help='Aynı sembol için eşzamanlı istekleri birleştir (varsayılan: LATU_COALESCE)')
+    serve_parser.add_argument('--metrics-port', type=int, help='Prometheus /metrics portu (varsayılan: LATU_METRICS_PORT)')
+    serve_parser.add_argument('--metrics-file', help='Aşama metriklerinin JSONL dosyası (varsayılan: LATU_METRICS_FILE)')
+    serve_parser.set_defaults(func=serve)
+
+    submit_parser = commands.add_parser('submit', help='Kuyruğa analiz isteği ekle')
+    submit_parser.add_argument('--stage', choices=[STAGE_PIPELINE, STAGE_GPT, STAGE_CLAUDE, STAGE_FINAL],
+                               default=STAGE_PIPELINE)
+    submit_parser.add_argument('--symbol', required=True, help='Trading sembolü')
+    submit_parser.add_argument('--price', type=float, help='Güncel fiyat')
+    submit_parser.add_argument('--change', type=float, help='Değişim yüzdesi')
+    submit_parser.add_argument('--volume', type=float, help='Volume')
+    submit_parser.add_argument('--gpt-result', help='GPT analiz sonucu (claude/final aşamaları)')
+    submit_parser.add_argument('--claude-result', help='Claude analiz sonucu (final aşaması)')
+    submit_parser.add_argument('--webhook-url', help='Dashboard webhook URL')
+    submit_parser.add_argument('--speculative', action='store_true', help='GPT ve Claude paralel')
+    submit_parser.add_argument('--narrative', action='store_true', default=None, help='LLM anlatılı final')
+    submit_parser.set_defaults(func=submit)
+
+    status_parser = commands.add_parser('status', help='Kuyruk durumu')
+    status_parser.set_defaults(func=status)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()